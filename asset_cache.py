@@ -0,0 +1,133 @@
+import os
+import threading
+from collections import OrderedDict
+from svglib.svglib import svg2rlg
+
+
+class SvgAssetCache:
+    """Prozessweiter Cache für geparste SVG-Icons.
+
+    Jede Datei wird nur einmal mit svg2rlg geparst. Der Schlüssel ist
+    (Pfad, Dateigröße, mtime), damit geänderte Icons neu geladen werden.
+    Skalierte Kopien werden ebenfalls gecacht; alle zurückgegebenen
+    Drawings sind geteilt und dürfen nicht verändert werden.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (path, size, mtime, scale) -> Drawing oder None
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+        return False, None
+
+    def _put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            # LRU: älteste Einträge verwerfen
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def load(self, path, size, mtime):
+        """Gibt das ungeskalierte Drawing zurück; (hit, drawing)."""
+        key = (path, size, mtime, None)
+        found, drawing = self._get(key)
+        if found:
+            return True, drawing
+        drawing = svg2rlg(path)
+        self._put(key, drawing)
+        return False, drawing
+
+    def scaled(self, path, size, mtime, scale):
+        """Gibt eine skalierte Kopie zurück; (hit, drawing)."""
+        key = (path, size, mtime, round(scale, 6))
+        found, drawing = self._get(key)
+        if found:
+            return True, drawing
+        _, original = self.load(path, size, mtime)
+        drawing = None
+        if original is not None:
+            drawing = original.copy()
+            drawing.scale(scale, scale)
+        self._put(key, drawing)
+        return False, drawing
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def session(self):
+        return SvgAssetSession(self)
+
+
+class SvgAssetSession:
+    """Sicht auf den SvgAssetCache für genau einen Export.
+
+    Merkt sich pro Pfad das Ergebnis von os.stat, damit jede Datei nur
+    einmal pro Export geprüft wird, und zählt Treffer/Fehlversuche.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._stats = {}  # path -> (size, mtime) oder None, wenn Datei fehlt
+        self.hits = 0
+        self.misses = 0
+
+    def _stat(self, path):
+        if path not in self._stats:
+            try:
+                st = os.stat(path)
+                self._stats[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                self._stats[path] = None
+        return self._stats[path]
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def is_missing(self, path):
+        return self._stat(path) is None
+
+    def fit(self, path, size=None, box=None):
+        """Skalierte Kopie des Icons oder None (Datei fehlt / nicht lesbar).
+
+        size: längste Seite in Punkten, box: (Breite, Höhe) zum Einpassen.
+        """
+        st = self._stat(path)
+        if st is None:
+            return None
+        hit, original = self.cache.load(path, *st)
+        if original is None:
+            self._count(hit)
+            return None
+        if box is not None:
+            scale = min(box[0] / original.width, box[1] / original.height)
+        else:
+            scale = size / max(original.width, original.height)
+        hit, drawing = self.cache.scaled(path, *st, scale)
+        self._count(hit)
+        return drawing
+
+    def scaled(self, path, scale):
+        """Icon mit fester Skalierung, z.B. für Karten aus dem Fragment-Cache."""
+        st = self._stat(path)
+        if st is None:
+            return None
+        hit, drawing = self.cache.scaled(path, *st, scale)
+        self._count(hit)
+        return drawing
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Standard-Cache für den ganzen Prozess
+svg_cache = SvgAssetCache()
@@ -0,0 +1,65 @@
+"""Misst die Zeit pro Karte: Design-Dict pro Karte vs. einmal kompiliertes Design.
+
+Beide Varianten laufen ohne Display-Listen-Cache (max_entries=0), jede
+Karte geht also durch layout_card; sonst würde die kompilierte Variante
+nur das Abspielen gecachter Display-Listen messen.
+
+Aufruf aus dem Projektordner:
+    python -m benchmarks.bench_compiled_design --design designs/school_test.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from asset_cache import svg_cache
+from card_layout import DisplayListCache
+from compiled_design import CompiledDesign
+from export_spellcards_pdf import FONT_NAME, IconForms, RenderContext, render_card_pdf
+
+
+def time_cards(spells, design, rounds):
+    c = canvas.Canvas(io.BytesIO(), pagesize=A4)
+    ctx = RenderContext(svg_assets=svg_cache.session(), icon_forms=IconForms(), display_lists=DisplayListCache(max_entries=0))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            for spell in spells:
+                render_card_pdf(c, 20, 20, spell, design, ctx=ctx)
+                c.showPage()
+    return (time.perf_counter() - start) / (rounds * len(spells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--design", default="designs/school_test.json")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with open("src/spells.json", "r", encoding="utf-8") as f:
+        spells = json.load(f)
+    with open(args.design, "r", encoding="utf-8") as f:
+        design_config = json.load(f)
+
+    compile_start = time.perf_counter()
+    compiled = CompiledDesign(design_config, FONT_NAME)
+    compile_time = time.perf_counter() - compile_start
+
+    # einmal aufwärmen (SVG-Cache, Fonts)
+    time_cards(spells[:20], compiled, 1)
+    per_card_dict = time_cards(spells, design_config, args.rounds)
+    per_card_compiled = time_cards(spells, compiled, args.rounds)
+
+    print(f"Karten:             {len(spells)} x {args.rounds}")
+    print(f"Kompilieren:        {compile_time * 1e6:.0f} µs (einmalig)")
+    print(f"Dict pro Karte:     {per_card_dict * 1e6:.0f} µs")
+    print(f"Kompiliert:         {per_card_compiled * 1e6:.0f} µs")
+    print(f"Speedup pro Karte:  {per_card_dict / per_card_compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
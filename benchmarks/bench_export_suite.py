@@ -0,0 +1,251 @@
+"""Export-Benchmark: synthetische Decks (9, 900, 9000 Karten) gegen die mitgelieferten Designs.
+
+Pro Deck und Design wird export_spellcards_pdf in einem frischen Prozess
+gemessen: Karten pro Sekunde, Spitzen-RSS und Dateigröße. Die Werte werden
+mit benchmarks/export_baseline.json verglichen; bei einer Verschlechterung
+über die Toleranz hinaus endet der Lauf mit Exit-Code 1.
+
+Aufruf aus dem Projektordner:
+    python -m benchmarks.bench_export_suite
+    python -m benchmarks.bench_export_suite --sizes 9 900 --repeat 3
+    python -m benchmarks.bench_export_suite --update-baseline
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows: kein getrusage, Spitzen-RSS wird nicht gemessen
+    resource = None
+
+from card_renderer_utils import CLASS_COLORS, SCHOOL_COLORS
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "export_baseline.json")
+DEFAULT_SIZES = (9, 900, 9000)
+DEFAULT_DESIGNS = ["src/design_config.json"] + sorted(glob.glob("designs/*.json"))
+
+AOE_SHAPES = ("cone", "cube", "cylinder", "line", "radius", "sphere")
+AOE_SIZES = (5, 10, 15, 20, 30, 40, 60, 100)
+DAMAGE_TYPES = ("acid", "bludgeoning", "cold", "fire", "force", "lightning", "necrotic",
+                "piercing", "poison", "psychic", "radiant", "slashing", "thunder")
+DICE = ("d4", "d6", "d8", "d10", "d12")
+
+
+class DeckGenerator:
+    """Erzeugt reproduzierbare Zauber, die den echten in src/spells.json ähneln.
+
+    Beschreibungslängen, Zeitangaben, Reichweiten und Wortschatz werden aus
+    den echten Zaubern gezogen; dazu kommen Schadenswürfel (auch mehrere pro
+    Karte und "when"-Steigerungen), Flächen-Icons und alle Schulen und Klassen.
+    """
+
+    def __init__(self, source="src/spells.json", seed=0):
+        with open(source, "r", encoding="utf-8") as f:
+            spells = json.load(f)
+        self.seed = seed
+        self.lengths = [len(s.get("description", "")) for s in spells if s.get("description")]
+        self.words = " ".join(s.get("description", "") for s in spells).split()
+        self.casting_times = [s["casting_time"] for s in spells if s.get("casting_time")]
+        self.durations = [s["duration"] for s in spells if s.get("duration")]
+        self.ranges = [s["range"] for s in spells if s.get("range")]
+        self.levels = [s["level"] for s in spells if s.get("level")]
+        self.name_words = sorted({w.strip(".,;:()").capitalize() for w in self.words if w.isalpha() and len(w) > 3})
+
+    def description(self, rng):
+        target = rng.choice(self.lengths)
+        start = rng.randrange(len(self.words))
+        parts, length = [], 0
+        while length < target:
+            word = self.words[(start + len(parts)) % len(self.words)]
+            parts.append(word)
+            length += len(word) + 1
+        # Schadenswürfel wie in echten Beschreibungen ("takes 3d6 fire damage")
+        roll = rng.random()
+        damage = []
+        if roll < 0.45:
+            damage.append(f"takes {rng.randint(1, 10)}{rng.choice(DICE)} {rng.choice(DAMAGE_TYPES)} damage")
+        if roll < 0.12:
+            damage.append(f"and {rng.randint(1, 6)}{rng.choice(DICE)} {rng.choice(DAMAGE_TYPES)} damage")
+        if roll < 0.2:
+            damage.append(f"The damage increases by 1{rng.choice(DICE)} when you reach 5th level.")
+        for phrase in damage:
+            parts.insert(rng.randrange(len(parts) + 1), phrase)
+        text = " ".join(parts)
+        # Absätze wie im Original
+        if len(text) > 400 and rng.random() < 0.6:
+            cut = text.find(". ", len(text) // 2)
+            if cut > 0:
+                text = text[:cut + 1] + "\n\n" + text[cut + 2:]
+        return text
+
+    def spell(self, rng, number):
+        classes = rng.sample(sorted(CLASS_COLORS), rng.randint(1, 3))
+        spell = {
+            "name": f"{rng.choice(self.name_words)} {rng.choice(self.name_words)} {number}",
+            "level": rng.choice(self.levels),
+            "school": rng.choice(sorted(SCHOOL_COLORS)),
+            "classes": classes,
+            "casting_time": rng.choice(self.casting_times),
+            "duration": rng.choice(self.durations),
+            "range": rng.choice(self.ranges),
+            "components": {
+                "verbal": rng.random() < 0.9,
+                "somatic": rng.random() < 0.8,
+                "material": rng.random() < 0.5,
+            },
+            "ritual": rng.random() < 0.1,
+            "description": self.description(rng),
+            "tags": classes + [f"level{number % 10}"],
+        }
+        if rng.random() < 0.3:
+            spell["AreaOfEffect"] = f"{rng.choice(AOE_SIZES)} ft. {rng.choice(AOE_SHAPES)}"
+        return spell
+
+    def deck(self, size):
+        """size Zauber; gleiche Größe und gleicher Seed ergeben dasselbe Deck."""
+        rng = random.Random(f"{self.seed}/{size}")
+        return [self.spell(rng, i) for i in range(size)]
+
+
+def peak_rss_mb():
+    """Spitzen-RSS dieses Prozesses in MB (None ohne resource-Modul)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: Bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(job):
+    """Ein Export in einem eigenen Prozess (damit Caches und RSS nicht mitwandern)."""
+    design_path, size, seed, workers = job
+    from export_spellcards_pdf import export_spellcards_pdf
+
+    spells = DeckGenerator(seed=seed).deck(size)
+    with open(design_path, "r", encoding="utf-8") as f:
+        design = json.load(f)
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = export_spellcards_pdf(spells, design, output_dir=output_dir, base_name="bench", workers=workers)
+        seconds = time.perf_counter() - start
+    return {
+        "cards": size,
+        "seconds": seconds,
+        "cards_per_sec": size / seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "file_size": report["file_size"],
+    }
+
+
+def run_case(design_path, size, seed=0, workers=1, repeat=1):
+    """Bester von repeat Läufen, jeder in einem frisch gestarteten Prozess."""
+    best = None
+    context = multiprocessing.get_context("spawn")
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(_run_case, (design_path, size, seed, workers)).result()
+        if best is None or result["cards_per_sec"] > best["cards_per_sec"]:
+            best = result
+    return best
+
+
+def case_key(design_path, size):
+    return f"{os.path.splitext(os.path.basename(design_path))[0]}/{size}"
+
+
+def compare(result, base, tolerance, size_tolerance):
+    """Liste der Verschlechterungen gegenüber der Baseline (leer = ok)."""
+    problems = []
+    if result["cards_per_sec"] < base["cards_per_sec"] * (1 - tolerance):
+        problems.append(f"Karten/s {result['cards_per_sec']:.0f} statt {base['cards_per_sec']:.0f}")
+    if result["peak_rss_mb"] and base.get("peak_rss_mb") and result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+        problems.append(f"RSS {result['peak_rss_mb']:.0f} MB statt {base['peak_rss_mb']:.0f} MB")
+    if result["file_size"] > base["file_size"] * (1 + size_tolerance):
+        problems.append(f"Datei {result['file_size'] / 1024:.0f} KB statt {base['file_size'] / 1024:.0f} KB")
+    return problems
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--designs", nargs="+", default=DEFAULT_DESIGNS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="workers für export_spellcards_pdf")
+    parser.add_argument("--repeat", type=int, default=1, help="bester von N Läufen")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="erlaubte Verschlechterung von Karten/s und RSS")
+    parser.add_argument("--size-tolerance", type=float, default=0.02, help="erlaubter Zuwachs der Dateigröße")
+    parser.add_argument("--update-baseline", action="store_true", help="Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--json", dest="json_path", help="Ergebnisse zusätzlich als JSON schreiben")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    if baseline and (baseline.get("seed") != args.seed or baseline.get("workers") != args.workers):
+        print("Baseline mit anderem Seed/workers gemessen - kein Vergleich.")
+        baseline = None
+    base_results = baseline["results"] if baseline else {}
+
+    results = {}
+    regressions = 0
+    print(f"{'Fall':<24}{'Karten/s':>10}{'RSS MB':>9}{'Datei KB':>10}  Baseline")
+    for design_path in args.designs:
+        for size in args.sizes:
+            key = case_key(design_path, size)
+            result = results[key] = run_case(design_path, size, args.seed, args.workers, args.repeat)
+            rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] else "-"
+            base = base_results.get(key)
+            if base is None:
+                verdict = "keine"
+            else:
+                problems = compare(result, base, args.tolerance, args.size_tolerance)
+                regressions += bool(problems)
+                verdict = "LANGSAMER: " + ", ".join(problems) if problems else (
+                    f"ok ({result['cards_per_sec'] / base['cards_per_sec'] - 1:+.0%} Karten/s)")
+            print(f"{key:<24}{result['cards_per_sec']:>10.0f}{rss:>9}{result['file_size'] / 1024:>10.0f}  {verdict}")
+
+    data = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "workers": args.workers,
+        "results": results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    if args.update_baseline:
+        # bestehende Fälle behalten, die diesmal nicht gemessen wurden
+        data["results"] = {**base_results, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        print(f"Baseline gespeichert unter: {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{regressions} Fälle schlechter als die Baseline (Toleranz {args.tolerance:.0%}, Datei {args.size_tolerance:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
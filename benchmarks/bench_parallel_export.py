@@ -0,0 +1,52 @@
+"""Vergleicht seriellen und parallelen PDF-Export.
+
+Aufruf aus dem Projektordner:
+    python -m benchmarks.bench_parallel_export --repeat 5 --workers 4
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from export_spellcards_pdf import export_spellcards_pdf
+
+
+def load_spells(repeat):
+    with open("src/spells.json", "r", encoding="utf-8") as f:
+        spells = json.load(f)
+    with open("src/custom_spells.json", "r", encoding="utf-8") as f:
+        spells += json.load(f)
+    return spells * repeat
+
+
+def timed_export(spells, design, output_dir, workers):
+    start = time.perf_counter()
+    report = export_spellcards_pdf(spells, design, output_dir=output_dir, base_name=f"bench_w{workers}", workers=workers)
+    return time.perf_counter() - start, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="wie oft die Zauberliste wiederholt wird")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--design", default="src/design_config.json")
+    args = parser.parse_args()
+
+    spells = load_spells(args.repeat)
+    with open(args.design, "r", encoding="utf-8") as f:
+        design = json.load(f)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        serial_time, serial = timed_export(spells, design, output_dir, 1)
+        parallel_time, parallel = timed_export(spells, design, output_dir, args.workers)
+
+    print()
+    print(f"Karten:   {len(spells)} ({serial['pages']} Seiten)")
+    print(f"Seriell:  {serial_time:.2f} s")
+    print(f"Parallel: {parallel_time:.2f} s mit {args.workers} Prozessen")
+    print(f"Speedup:  {serial_time / parallel_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Prüft den inkrementellen Export: zweiter Lauf aus dem Karten-Cache muss ein gültiges PDF ergeben.
+
+Exportiert dieselben Zauber zweimal mit incremental=True (der zweite Lauf
+setzt die Seiten nur aus Fragmenten zusammen) und prüft in beiden PDFs,
+dass jede Form bzw. jedes Bild, das eine Seite per "/FormXob.* Do"
+benutzt, auch in den Ressourcen dieser Seite steht. Endet mit Exit-Code 1,
+wenn etwas fehlt.
+
+Aufruf aus dem Projektordner:
+    python -m benchmarks.check_incremental_export
+    python -m benchmarks.check_incremental_export --design designs/pinkt_test.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import re
+import sys
+import tempfile
+
+from export_spellcards_pdf import export_spellcards_pdf
+
+_DO_RE = re.compile(rb"/(FormXob\.\S+) Do")
+
+
+def missing_xobjects(pdf_path):
+    """[(Seite, Name)] aller benutzten Formen/Bilder, die in den Seitenressourcen fehlen."""
+    from pypdf import PdfReader
+
+    missing = []
+    for number, page in enumerate(PdfReader(pdf_path).pages):
+        resources = page.get("/Resources") or {}
+        xobjects = resources.get_object().get("/XObject") or {}
+        available = set(xobjects.get_object().keys()) if xobjects else set()
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+        for name in sorted(set(_DO_RE.findall(data))):
+            if "/" + name.decode("latin-1") not in available:
+                missing.append((number, name.decode("latin-1")))
+    return missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--design", default="src/design_config.json")
+    parser.add_argument("--spells", default="src/spells.json")
+    args = parser.parse_args(argv)
+
+    with open(args.spells, "r", encoding="utf-8") as f:
+        spells = json.load(f)
+    with open(args.design, "r", encoding="utf-8") as f:
+        design = json.load(f)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as output_dir:
+        for run in ("erster Lauf", "aus dem Cache"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                report = export_spellcards_pdf(spells, design, output_dir=output_dir, base_name="check", incremental=True)
+            fragments = report["fragments"] or {}
+            missing = missing_xobjects(report["output_path"])
+            print(f"{run}: {fragments.get('reused', 0)} Karten wiederverwendet, {len(missing)} fehlende Ressourcen")
+            for number, name in missing[:10]:
+                print(f"  Seite {number + 1}: {name}")
+            failed = failed or bool(missing)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
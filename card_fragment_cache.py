@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+
+from reportlab.pdfbase.pdfdoc import xObjectName
+
+# bei Änderungen am Kartenrendering hochzählen, damit alte Fragmente ungültig werden
+FRAGMENT_FORMAT = 3
+
+# Obergrenze für den Cache-Ordner (ein Fragment hat einige KB)
+FRAGMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# aktive Aufnahmen pro Canvas (siehe record_card_resource)
+_captures = weakref.WeakKeyDictionary()
+
+_FONT_RE = re.compile(r"(/F\d+)(?= [\d.]+ Tf)")
+_FONT_PLACEHOLDER_RE = re.compile(r"/@F(\d+)@")
+# Form-/Bildaufrufe im Fragment; beim Einfügen über doForm neu angemeldet
+_FORM_DO_RE = re.compile(r"/FormXob\.(\S+) Do")
+
+
+def record_card_resource(c, kind, value):
+    """Merkt sich Bilder/Icons/Rahmen-Formen, die eine gerade aufgenommene Karte benutzt."""
+    capture = _captures.get(c)
+    if capture is not None and value not in capture[kind]:
+        capture[kind].append(value)
+
+
+def image_xobject_name(path, mask=None):
+    """Name, unter dem drawImage eine Bilddatei anlegt (wie Canvas.drawImage in ReportLab 5)."""
+    digest = hashlib.md5(f"{path}{mask}".encode("utf-8"), usedforsecurity=False).hexdigest()
+    return xObjectName(digest)
+
+
+def asset_versions(design_config, assets_dir="src/img"):
+    """(Pfad, Größe, mtime) aller Assets, die eine Karte beeinflussen können."""
+    paths = []
+    for root, _, files in os.walk(assets_dir):
+        paths.extend(os.path.join(root, name) for name in files)
+    bg_path = design_config.get("background_image", {}).get("path")
+    if bg_path:
+        paths.append(bg_path)
+
+    versions = []
+    for path in sorted(set(paths)):
+        try:
+            st = os.stat(path)
+            versions.append([path, st.st_size, st.st_mtime_ns])
+        except OSError:
+            versions.append([path, None, None])
+    return versions
+
+
+def fragment_key(spell, design_config, versions, extra=None):
+    """Inhalts-Hash aus normalisiertem Zauber, Design und Asset-Versionen."""
+    payload = json.dumps(
+        {"format": FRAGMENT_FORMAT, "spell": spell, "design": design_config,
+         "assets": versions, "extra": extra},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CardFragmentCache:
+    """On-Disk-Cache gerenderter Karten (PDF-Operatoren relativ zum Kartenursprung).
+
+    Ein Fragment enthält den Inhaltsstrom einer Karte, die benutzten Fonts
+    (als Platzhalter), Icon-Formen und Bilder. Beim Wiederverwenden werden
+    diese Ressourcen im Zieldokument angelegt und der Strom nur noch
+    eingefügt, ohne Layout, SVG oder Bilder erneut zu verarbeiten.
+    Aufnahme und Einfügen arbeiten direkt auf ReportLabs Inhaltsstrom
+    (c._code, c._doc.fontMapping); die Version ist in requirements.txt
+    deshalb auf 5.x festgelegt.
+    Benutzte Fragmente bekommen eine neue mtime; prune() löscht die am
+    längsten unbenutzten, bis der Ordner unter max_bytes liegt.
+    """
+
+    def __init__(self, cache_dir, versions=None, max_bytes=FRAGMENT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.versions = versions or []
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.reused = 0
+        self.rendered = 0
+        self.evicted = 0
+
+    def key(self, spell, design_config, extra=None):
+        return fragment_key(spell, design_config, self.versions, extra)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                fragment = json.load(f)
+            # mtime als Zeitpunkt der letzten Benutzung (für prune)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return fragment if fragment.get("format") == FRAGMENT_FORMAT else None
+
+    def store(self, key, fragment):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(fragment, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("Fragment konnte nicht gespeichert werden:", e)
+
+    def capture(self, c, x, y, render):
+        """Rendert eine Karte über render() am Ursprung und nimmt sie als Fragment auf."""
+        c.saveState()
+        c.translate(x, y)
+        start = len(c._code)
+        _captures[c] = {"icons": [], "images": [], "chrome": []}
+        try:
+            render()
+        finally:
+            resources = _captures.pop(c)
+        code = "\n".join(c._code[start:])
+        c.restoreState()
+
+        # interne Font-Namen (/F1, /F2, ...) sind pro Dokument verschieden
+        internal_to_ps = {internal: ps for ps, internal in c._doc.fontMapping.items()}
+        fonts = []
+
+        def placeholder(match):
+            ps_name = internal_to_ps[match.group(1)]
+            if ps_name not in fonts:
+                fonts.append(ps_name)
+            return f"/@F{fonts.index(ps_name)}@"
+
+        self.rendered += 1
+        return {
+            "format": FRAGMENT_FORMAT,
+            "code": _FONT_RE.sub(placeholder, code),
+            "fonts": fonts,
+            "icons": resources["icons"],
+            "images": resources["images"],
+            "chrome": resources["chrome"],
+        }
+
+    def replay(self, c, fragment, x, y, ensure_icon, ensure_chrome=None, resolve_image=None):
+        """Fügt ein Fragment an (x, y) ein.
+
+        ensure_icon(c, name, path, scale) legt Icon-Formen an,
+        ensure_chrome(c, farbe) die Form für Hintergrund und Rahmen.
+        resolve_image(c, path, mask) liefert den Pfad, unter dem gleiche
+        Bildbytes schon im Dokument liegen (ImageDedupe.resolve); der
+        Bildaufruf im Strom wird dann auf dieses Bild umgeschrieben.
+        Erst werden alle Formen und Bilder im Dokument angelegt (beginForm/
+        endForm setzt die Ressourcenliste einer leeren Seite zurück), danach
+        wird der Strom eingefügt und jede Form per doForm für die Seite
+        angemeldet.
+        """
+        names = [c._doc.getInternalFontName(ps) for ps in fragment["fonts"]]
+        code = _FONT_PLACEHOLDER_RE.sub(lambda m: names[int(m.group(1))], fragment["code"])
+
+        for name, path, scale in fragment["icons"]:
+            if not ensure_icon(c, name, path, scale):
+                return False
+        for color in fragment["chrome"]:
+            if ensure_chrome is None:
+                return False
+            ensure_chrome(c, color)
+        for path, mask in fragment["images"]:
+            if not os.path.exists(path):
+                return False
+            canonical = resolve_image(c, path, mask) if resolve_image else path
+            if canonical != path:
+                code = code.replace(f"/{image_xobject_name(path, mask)} Do", f"/{image_xobject_name(canonical, mask)} Do")
+            # legt das Bild im Dokument an, der Zeichenbefehl steckt schon im Fragment
+            start = len(c._code)
+            c.drawImage(canonical, 0, 0, 1, 1, mask=mask)
+            del c._code[start:]
+
+        c.saveState()
+        c.translate(x, y)
+        # split() liefert abwechselnd Code und Form-Namen
+        for i, part in enumerate(_FORM_DO_RE.split(code)):
+            if i % 2:
+                c.doForm(part)
+            elif part.strip("\n"):
+                c._code.append(part.strip("\n"))
+        c.restoreState()
+        self.reused += 1
+        return True
+
+    def prune(self):
+        """Löscht die am längsten unbenutzten Fragmente, bis der Ordner max_bytes unterschreitet."""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+                        total += st.st_size
+        except OSError:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self.evicted += removed
+        return removed
+
+    def stats(self):
+        return {"reused": self.reused, "rendered": self.rendered, "evicted": self.evicted}
@@ -0,0 +1,359 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from card_fragment_cache import asset_versions
+from render_profiler import NULL_PROFILER
+from text_layout import fit_font_size
+
+
+class CardDisplayList:
+    """Ergebnis von layout_card: Zeichenbefehle einer Karte, unabhängig vom Ausgabegerät.
+
+    Koordinaten in Punkten relativ zur linken unteren Kartenecke, y nach
+    oben (wie im PDF); das Tk-Backend rechnet selbst auf Pixel von oben um.
+    ops ist eine Liste von Tupeln, das erste Element ist der Befehl:
+
+      ("chrome", farbe)                  Hintergrund und Rahmen
+      ("font", name, größe) / ("fill", farbe)
+      ("string", x, y, text)             eine Zeile ab Grundlinie y
+      ("layout", x, y, layout, style)    umbrochener Text, y = Unterkante
+      ("icon", pfad, x, y, modus, maß)   SVG, modus "size" (Zahl) oder "box" ((w, h))
+      ("image", pfad, x, y, w, h)        Rasterbild, Seitenverhältnis bleibt
+      ("report", art, asset, detail)     Hinweis für ExportDiagnostics
+      ("count", gruppe, schlüssel)       Zähler des RenderContext (Statistik)
+      ("lap", stufe)                     Ende einer Profiler-Stufe
+    """
+
+    __slots__ = ("name", "width", "height", "ops")
+
+    def __init__(self, name, width, height, ops):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.ops = ops
+
+
+def card_components(spell):
+    """Komponenten als "V, S, M" (aus Booleans oder einem String)."""
+    comps = spell.get("components", "")
+    if isinstance(comps, dict):
+        flags = []
+        if comps.get("verbal"): flags.append("V")
+        if comps.get("somatic"): flags.append("S")
+        if comps.get("material"): flags.append("M")
+        return ", ".join(flags)
+    if isinstance(comps, str):
+        # fallback falls doch ein String drin steht
+        return comps.strip()
+    return ""
+
+def card_text_fields(spell):
+    """Texte der einzeiligen Felder einer Karte, Schlüssel wie TEXT_ELEMENT_KEYS."""
+    return {
+        "spell_name": spell.get("name", "Unbenannt"),
+        "spell_level": f"Level {spell.get('level', '')}".capitalize(),
+        "casting_time": spell.get("casting_time", ""),
+        "duration": spell.get("duration", ""),
+        "range": f"Range: {spell.get('range', '')}",
+        "components": f"Components: {card_components(spell)}"
+    }
+
+def parse_area_of_effect(spell):
+    """("20 ft.", "sphere") aus AreaOfEffect, sonst ("", "")."""
+    aoe_raw = spell.get("AreaOfEffect", "")
+    if aoe_raw:
+        parts = aoe_raw.lower().split("ft.")
+        if len(parts) >= 2:
+            return parts[0].strip() + " ft.", parts[1].strip()
+    return "", ""
+
+def extract_damage_dice_from_description(desc):
+    matches = re.findall(r"\b(\d+d\d+\s+\w+)\b", desc.lower())
+    return matches if matches else []
+
+
+def layout_card(spell, design, layouts, svg_assets, assets_dir="src/img", profiler=NULL_PROFILER):
+    """Berechnet das Layout einer Karte einmal als CardDisplayList.
+
+    design: CompiledDesign; layouts: TextLayoutCache; svg_assets: Session des
+    SvgAssetCache (für die Maße der Icons). Hier steckt die komplette
+    Interpretation des Designs; PDF-Export, Bildexport und Designer-Vorschau
+    spielen nur noch die Befehle ab.
+    profiler: bekommt nach jedem Abschnitt lap("layout_<stufe>"), so dass
+    Umbruch, Auto-Fit, SVG-Laden und Würfelsuche getrennt erscheinen.
+    """
+    card_w = design.card_w
+    card_h = design.card_h
+    has_concentration = False
+    ops = []
+    op = ops.append
+
+    def lap(stage):
+        op(("lap", stage))
+        profiler.lap(f"layout_{stage}")
+
+    # Hintergrund und Rahmen
+    op(("chrome", design.frame_color(spell)))
+    lap("background")
+    lap("frame")
+
+    # Area of Effect als Icon
+    aoe_distance, aoe_shape = parse_area_of_effect(spell)
+    el = design.area_of_effect
+    if el and aoe_shape:
+        icon_path = os.path.join(assets_dir, "aoe", f"{aoe_shape}.svg")  # z.B. aoe/line.svg
+        tx = el.dx
+        ty = el.dy
+        font_size = el.font_size
+        icon_size = font_size + 2
+        text_size = font_size - 2
+        spacing = 1 * mm
+
+        # Text zuerst rendern
+        op(("font", el.font_name, text_size))
+        op(("fill", el.color))
+        op(("string", tx, ty - text_size + 1, aoe_distance))
+        text_width = stringWidth(aoe_distance, el.font_name, text_size)
+
+        # Icon oder Text-Fallback
+        icon_x = tx + text_width + spacing
+        icon_y = ty - text_size  # Default-Y-Wert
+
+        drawing = svg_assets.fit(icon_path, size=icon_size)
+        if drawing:
+            icon_draw_height = drawing.height * drawing.transform[3]
+            # Vertikale Korrektur: Icon soll mittig zur Textzeile erscheinen
+            icon_y = ty - text_size + (text_size - icon_draw_height) / 2
+            op(("icon", icon_path, tx + text_width + spacing, icon_y, "size", icon_size))
+        elif svg_assets.is_missing(icon_path):
+            op(("report", "aoe_icon_missing", icon_path, None))
+            op(("string", icon_x, icon_y, f"[{aoe_shape}]"))
+        else:
+            op(("report", "aoe_icon_error", icon_path, None))
+            op(("string", icon_x, icon_y, f"[{aoe_shape}]"))
+    lap("aoe")
+
+    # Beschriftungen
+    text_elements = card_text_fields(spell)
+    for key, el in design.text_elements:
+        text = text_elements[key]
+        if "concentration" in text.lower():
+            has_concentration = True
+
+        if el:
+            tx = el.dx
+            ty = el.dy
+            if layouts.fits_line(text, el.style, el.max_width):
+                # einzeilig: Grundlinie wie beim Paragraph eine Schriftgröße unter ty
+                op(("font", el.style.fontName, el.style.fontSize))
+                op(("fill", el.style.textColor))
+                op(("string", tx, ty - el.style.fontSize, text))
+                op(("count", "text_fields", "fast"))
+                continue
+            op(("count", "text_fields", "paragraph"))
+            layout = layouts.layout(text, el.style, el.max_width)
+            op(("layout", tx, ty - layout.height, layout, el.style))
+    lap("text")
+
+    # Desc
+    desc = spell.get("description", "")
+    el = design.description
+    if el and el.auto_fit:
+        # ganzer Text, Schriftgröße so groß wie möglich, ohne die Box zu verlassen
+        size, layout, fits = fit_font_size(
+            layouts, desc, design.description_style, el.max_width-10,
+            el.box_height, el.min_font_size, el.font_size - 1
+        )
+        op(("layout", el.dx, el.dy - el.font_size - layout.height, layout, design.description_style(size)))
+        if size < el.font_size - 1:
+            op(("count", "autofit", "shrunk"))
+        if not fits:
+            op(("count", "autofit", "overflow"))
+    elif el:
+        max_length = 800
+        if (len(desc) > max_length):
+            op(("report", "description_truncated", None, f"{len(desc)} Zeichen"))
+            desc = desc[:(max_length - 3)] + "..."
+        # Höhe bei voller Breite, gezeichnet wird (wie bisher) 10pt schmaler umbrochen
+        h = layouts.layout(desc, el.style, el.max_width).height
+        layout = layouts.layout(desc, el.style, el.max_width-10)
+        op(("layout", el.dx, el.dy - el.font_size - h, layout, el.style))
+    lap("description")
+
+    # Schadenswürfel extrahieren
+    dmg_dicex = extract_damage_dice_from_description(desc)
+    if len(dmg_dicex)>0:
+        el = design.damage_dice
+        tx = el.dx
+        ty = el.dy
+        font_size = el.font_size
+        icon_size = font_size + 2
+        spacing = 1 * mm
+        font_size = font_size - 1
+        correctionY = 10  # 21
+
+        op(("font", el.font_name, font_size))
+        op(("fill", el.color))
+        op(("string", tx, ty - correctionY, "Damage:"))
+
+        # Position nach dem "Damage:" Label
+        label_width = stringWidth("Damage:", el.font_name, font_size)
+        ix = tx + label_width + spacing  # tx + 45
+        iy = ty - 1  # kleine Justierung, SVG beginnt oft höher ty - font_size + 1
+
+        for i in range(len(dmg_dicex)):
+            # Schadenswürfel + Icon
+            dmg_info = dmg_dicex[i]
+            parts = dmg_info.split()
+            iyX = iy - i * 10 - correctionY
+            tyX = ty - i * 10 - correctionY
+            if len(parts) >= 2:
+                dice, dmg_type = parts[0], parts[1].lower()
+                # SVG-Icon
+                icon_path = os.path.join(assets_dir, "dmg", f"dmg_{dmg_type}.svg")
+                icon_width = 20
+                drawing = svg_assets.fit(icon_path, size=icon_size)
+                if drawing:
+                    icon_width = drawing.width * drawing.transform[0]
+                    op(("icon", icon_path, ix, iyX, "size", icon_size))
+                elif not svg_assets.is_missing(icon_path):
+                    op(("report", "damage_icon_unreadable", icon_path, None))
+                    # Fallback: Kürzel als Text
+                    icon_width = stringWidth(f"[{dmg_type.upper()}]", el.font_name, font_size)
+                    h = layouts.layout(desc, design.description.style, icon_width).height if design.description else 0
+                    op(("string", ix, tyX - h, f"[{dmg_type.lower()}]"))
+                else:
+                    op(("report", "damage_icon_missing", icon_path, None))
+                    if dmg_type.lower() == "when":
+                        op(("string", ix, tyX, "[incr.w.lvl.]"))
+                        icon_width = stringWidth("[incr.w.lvl.]", el.font_name, font_size)
+                    else:
+                        op(("string", ix, tyX, f"[{dmg_type.lower()}]"))
+                        icon_width = stringWidth(f"[{dmg_type.upper()}]", el.font_name, font_size)
+                # Schadenswürfel-Zahl
+                op(("string", ix + icon_width + spacing, tyX, dice))
+            else:
+                op(("report", "damage_malformed", dmg_info, None))
+    else:
+        op(("report", "no_damage", None, None))
+    lap("damage")
+
+    #Konzentration Icons
+    el = design.concentration_icon
+    if el and has_concentration:
+        icon_path = "src/img/concentration.svg"
+        ix = el.dx
+        iy = el.dy -21
+        iw = el.width
+        ih = el.height
+        drawing = svg_assets.fit(icon_path, box=(iw, ih))
+        if drawing:
+            op(("icon", icon_path, ix, iy - ih, "box", (iw, ih)))
+        elif svg_assets.is_missing(icon_path):
+            op(("report", "concentration_icon_missing", icon_path, None))
+        else:
+            op(("report", "concentration_icon_unreadable", icon_path, None))
+    lap("concentration")
+
+    #Schul-Symbol andrucken
+    school_name = spell.get("school", "").lower()
+    el = design.school_icon
+    if el and school_name:
+        icon_path = design.school_icon_path(school_name)
+        if icon_path:
+            op(("image", icon_path, el.dx, el.dy + 15, el.width, el.height))
+        else:
+            op(("report", "school_icon_missing", f"src/img/school/{school_name}.png", None))
+    else:
+        op(("report", "no_school", None, None))
+    lap("school_icon")
+
+    return CardDisplayList(spell.get("name", "Unbenannt"), card_w, card_h, ops)
+
+
+class DisplayListCache:
+    """LRU-Cache für CardDisplayLists, Schlüssel (Design, Zauber, Assets).
+
+    Design und Zauber gehen über ihren JSON-Inhalt in den Schlüssel ein;
+    ein neu kompiliertes, aber gleiches Design (z.B. in der Vorschau) trifft
+    also dieselben Einträge wie der Export im selben Prozess. Dazu kommen
+    die Asset-Versionen (Pfad, Größe, mtime) und der Ordner des RasterCache:
+    ein umbenanntes oder neues Icon bzw. ein anderer output_dir ergibt neue
+    Display-Listen statt veralteter Icon-Befehle und Bildpfade.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(spell, design, assets_dir, versions):
+        raster = design.raster_cache
+        return (
+            design.fingerprint, json.dumps(spell, sort_keys=True, default=str), assets_dir,
+            json.dumps(versions), (raster.cache_dir, raster.jpeg_quality) if raster else None,
+        )
+
+    def get(self, spell, design, layouts, svg_assets, assets_dir="src/img", profiler=NULL_PROFILER, versions=None):
+        """Display-Liste aus dem Cache oder neu mit layout_card berechnet (profiler nur dann).
+
+        versions: asset_versions(design.config, assets_dir), einmal pro Export
+        berechnet; ohne Angabe wird der Asset-Ordner bei jedem Aufruf gelesen.
+        """
+        return self.lookup(spell, design, layouts, svg_assets, assets_dir, profiler, versions)[1]
+
+    def lookup(self, spell, design, layouts, svg_assets, assets_dir="src/img", profiler=NULL_PROFILER, versions=None):
+        """(Treffer, Display-Liste) wie get(); für Sitzungen, die selbst mitzählen."""
+        if versions is None:
+            versions = asset_versions(design.config, assets_dir)
+        key = self.key(spell, design, assets_dir, versions)
+        with self._lock:
+            display_list = self._entries.get(key)
+            if display_list is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, display_list
+            self.misses += 1
+        display_list = layout_card(spell, design, layouts, svg_assets, assets_dir, profiler)
+        with self._lock:
+            self._entries[key] = display_list
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return False, display_list
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def session(self):
+        return DisplayListSession(self)
+
+
+class DisplayListSession:
+    """Sicht auf einen DisplayListCache für genau einen Export (zählt nur dessen Zugriffe)."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, spell, design, layouts, svg_assets, assets_dir="src/img", profiler=NULL_PROFILER, versions=None):
+        hit, display_list = self.cache.lookup(spell, design, layouts, svg_assets, assets_dir, profiler, versions)
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return display_list
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Standard-Cache für den ganzen Prozess (Export und Designer-Vorschau)
+display_list_cache = DisplayListCache()
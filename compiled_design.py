@@ -0,0 +1,160 @@
+import json
+import os
+from reportlab.lib.colors import HexColor
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from card_renderer_utils import SCHOOL_COLORS, CLASS_COLORS
+from font_registry import is_subset_font, resolve_font
+
+BLACK = HexColor("#000000")
+
+# Textfelder in Zeichenreihenfolge
+TEXT_ELEMENT_KEYS = ("spell_name", "spell_level", "casting_time", "duration", "range", "components")
+
+
+class DesignElement:
+    """Ein Design-Element mit vorberechneten Punkt-Koordinaten relativ zur Karte."""
+
+    def __init__(self, conf, card_w, card_h, font_name=None):
+        self.conf = conf
+        # "font": eingebaute Schrift oder .ttf/.otf (font_registry), sonst die des Designs
+        self.font_name = resolve_font(conf.get("font"), font_name)
+        # x von links, y von oben in Prozent -> Punkte ab linker unterer Kartenecke
+        self.dx = (conf.get("x", 0) / 100) * card_w
+        self.dy = ((100 - conf.get("y", 0)) / 100) * card_h
+        self.font_size = conf.get("font_size", 10)
+        self.color = HexColor(conf.get("color", "#000000"))
+        self.max_width = (conf["max_width"] / 100) * card_w if "max_width" in conf else card_w - 10
+        self.width = (conf.get("width", 10) / 100) * card_w
+        # wie bisher relativ zur Kartenbreite
+        self.height = (conf.get("height", 10) / 100) * card_w
+        self.style = None
+
+
+class CompiledDesign:
+    """Einmal aus einem Design-JSON aufbereitetes Design für render_card_pdf.
+
+    Koordinaten, Breiten, ParagraphStyles und Farbtabellen werden hier einmal
+    berechnet, damit pro Karte nur noch zauberabhängige Arbeit anfällt.
+    """
+
+    def __init__(self, config, font_name, card_w=63 * mm, card_h=88 * mm, raster_cache=None):
+        self.config = config
+        # "font" auf oberster Ebene ersetzt die Standardschrift für alle Elemente
+        self.font_name = font_name = resolve_font(config.get("font"), font_name)
+        self.card_w = card_w
+        self.card_h = card_h
+        # Rasterbilder auf Druckauflösung herunterrechnen (RasterCache oder None)
+        self.raster_cache = raster_cache
+        self.raster_dpi = raster_cache.dpi if raster_cache else None
+        # gleiches Design -> gleicher Schlüssel, auch über neu kompilierte Designs hinweg (card_layout)
+        self.fingerprint = json.dumps([config, font_name, card_w, card_h, self.raster_dpi], sort_keys=True, default=str)
+
+        # Hintergrund
+        bg_path = config.get("background_image", {}).get("path")
+        self.background_path = bg_path if bg_path and os.path.exists(bg_path) else None
+        if self.background_path and raster_cache:
+            self.background_path = raster_cache.prepare(self.background_path, card_w, card_h)
+
+        # Rahmen
+        frame = config.get("frame", {})
+        self.frame_mode = frame.get("mode", "single")
+        self.frame_thickness = frame.get("thickness", 1)
+        self.frame_roundness = frame.get("roundness", 0)
+        self.frame_single_color = HexColor(frame.get("color", "#000000"))
+        table = {"school": SCHOOL_COLORS, "class": CLASS_COLORS}.get(self.frame_mode, {})
+        self.frame_colors = {name: HexColor(value) for name, value in table.items()}
+
+        # Textfelder
+        self.text_elements = []
+        for key in TEXT_ELEMENT_KEYS:
+            element = self._element(key)
+            if element:
+                element.style = ParagraphStyle(
+                    name="Normal",
+                    fontName=element.font_name,
+                    fontSize=element.font_size - 1,
+                    textColor=element.color
+                )
+            self.text_elements.append((key, element))
+
+        self.description = self._element("description")
+        if self.description:
+            self.description.style = ParagraphStyle(
+                name="Normal",
+                fontName=self.description.font_name,
+                fontSize=self.description.font_size - 1,
+                leading=self.description.font_size * 1.1,
+                textColor=self.description.color
+            )
+            # Auto-Fit: Schriftgröße pro Karte so wählen, dass der Text in die Box passt
+            conf = self.description.conf
+            self.description.auto_fit = bool(conf.get("auto_fit", False))
+            self.description.min_font_size = conf.get("min_font_size", 5)
+            top = self.description.dy - self.description.font_size
+            # Boxhöhe in Prozent der Kartenhöhe, sonst bis 5pt über der Unterkante
+            if "max_height" in conf:
+                self.description.box_height = (conf["max_height"] / 100) * card_h
+            else:
+                self.description.box_height = top - 5
+            self._description_styles = {}
+
+        self.area_of_effect = self._element("area_of_effect")
+        self.damage_dice = DesignElement(config.get("damage_dice", {}), card_w, card_h, font_name)
+        self.concentration_icon = self._element("concentration_icon")
+        self.school_icon = self._element("school_icon")
+        self._school_icon_paths = {}
+        # eingebettete Schriften: Karten lassen sich nicht als Fragment in ein anderes PDF übernehmen
+        elements = [el for _, el in self.text_elements] + [self.description, self.area_of_effect, self.damage_dice]
+        self.subset_fonts = sorted({el.font_name for el in elements if el and is_subset_font(el.font_name)})
+
+    def _element(self, key):
+        conf = self.config.get(key)
+        return DesignElement(conf, self.card_w, self.card_h, self.font_name) if conf else None
+
+    def frame_color(self, spell):
+        """Rahmenfarbe je nach Modus (single, class, school)."""
+        if self.frame_mode == "single" or not spell:
+            return self.frame_single_color
+        if self.frame_mode == "class":
+            cls = (spell.get("classes") or [None])[0]
+            return self.frame_colors.get(cls.lower(), BLACK) if cls else BLACK
+        if self.frame_mode == "school":
+            return self.frame_colors.get(spell.get("school", "").lower(), BLACK)
+        return BLACK
+
+    def description_style(self, size):
+        """ParagraphStyle der Beschreibung für Schriftgröße size (Auto-Fit).
+
+        Zeilenabstand wie beim festen Stil (1.1 x Designgröße), bei der
+        größten Stufe ist das Ergebnis also identisch.
+        """
+        style = self._description_styles.get(size)
+        if style is None:
+            style = ParagraphStyle(
+                name="Normal",
+                fontName=self.description.font_name,
+                fontSize=size,
+                leading=(size + 1) * 1.1,
+                textColor=self.description.color
+            )
+            self._description_styles[size] = style
+        return style
+
+    def school_icon_path(self, school_name):
+        """Pfad zum Schul-Icon oder None; existiert-Prüfung einmal pro Schule."""
+        if school_name not in self._school_icon_paths:
+            path = f"src/img/school/{school_name}.png"
+            if not os.path.exists(path):
+                path = None
+            elif self.raster_cache and self.school_icon:
+                path = self.raster_cache.prepare(path, self.school_icon.width, self.school_icon.height, fit=True)
+            self._school_icon_paths[school_name] = path
+        return self._school_icon_paths[school_name]
+
+
+def ensure_compiled(config, font_name):
+    """Nimmt ein Design-Dict oder CompiledDesign und gibt ein CompiledDesign zurück."""
+    if isinstance(config, CompiledDesign):
+        return config
+    return CompiledDesign(config, font_name)
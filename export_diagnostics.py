@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+
+# Ereignisart -> (Stufe, Meldung); "info" sind erwartete Fälle ohne Handlungsbedarf
+MESSAGES = {
+    "aoe_icon_missing": ("warning", "AOE-Icon nicht gefunden"),
+    "aoe_icon_error": ("warning", "Fehler beim Laden von AOE-Icon"),
+    "damage_icon_missing": ("warning", "SVG-Pfad fehlt"),
+    "damage_icon_unreadable": ("warning", "SVG konnte nicht geladen werden"),
+    "damage_malformed": ("warning", "Damage_element hat keine 2 Teile"),
+    "concentration_icon_missing": ("warning", "Konzentrations-Icon nicht gefunden"),
+    "concentration_icon_unreadable": ("warning", "SVG konnte nicht geladen werden"),
+    "icon_unavailable": ("warning", "Icon beim Zeichnen nicht verfügbar"),
+    "school_icon_missing": ("warning", "Schul-Icon nicht gefunden"),
+    "school_icon_error": ("warning", "Fehler beim Zeichnen des Schul-Icons"),
+    "description_truncated": ("info", "Beschreibung gekürzt"),
+    "no_damage": ("info", "Keine Schadenswürfel"),
+    "no_school": ("info", "keine Schule"),
+}
+
+# so viele Kartennamen werden pro Ereignis als Beispiel behalten
+EXAMPLE_CARDS = 3
+
+
+class ExportDiagnostics:
+    """Sammelt Hinweise aus dem Export, gezählt und dedupliziert nach (Art, Asset).
+
+    Statt pro Karte zu printen, gibt summary() am Ende eine Zeile pro
+    Problem aus. verbose=True schreibt zusätzlich jedes Ereignis sofort;
+    ohne verbose kostet ein Ereignis nur das Hochzählen.
+    """
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self._events = {}  # (Art, Asset) -> [Anzahl, Beispielkarten]
+        self._collectors = []
+
+    def report(self, kind, asset=None, card=None, detail=None):
+        """Ein Ereignis melden; asset ist z.B. der fehlende Pfad, card der Kartenname."""
+        entry = self._events.get((kind, asset))
+        if entry is None:
+            entry = self._events[(kind, asset)] = [0, []]
+        entry[0] += 1
+        if card is not None and len(entry[1]) < EXAMPLE_CARDS and card not in entry[1]:
+            entry[1].append(card)
+        for events in self._collectors:
+            events.append((kind, asset))
+        if self.verbose:
+            message = MESSAGES.get(kind, ("warning", kind))[1]
+            parts = [p for p in (card, message, asset, detail) if p]
+            print(" - ".join(str(p) for p in parts))
+
+    @contextmanager
+    def collect(self):
+        """Liefert eine Liste, in der alle Ereignisse im with-Block landen (für den Fragment-Cache)."""
+        events = []
+        self._collectors.append(events)
+        try:
+            yield events
+        finally:
+            self._collectors.remove(events)
+
+    def raw(self):
+        return [[kind, asset, count, cards] for (kind, asset), (count, cards) in self._events.items()]
+
+    def merge(self, raw):
+        for kind, asset, count, cards in raw:
+            entry = self._events.setdefault((kind, asset), [0, []])
+            entry[0] += count
+            for card in cards:
+                if len(entry[1]) < EXAMPLE_CARDS and card not in entry[1]:
+                    entry[1].append(card)
+
+    def summary(self):
+        """Liste der Ereignisse (Warnungen zuerst, dann nach Häufigkeit)."""
+        items = []
+        for (kind, asset), (count, cards) in self._events.items():
+            level, message = MESSAGES.get(kind, ("warning", kind))
+            items.append({
+                "kind": kind,
+                "level": level,
+                "message": message,
+                "asset": asset,
+                "count": count,
+                "cards": list(cards),
+            })
+        items.sort(key=lambda item: (item["level"] != "warning", -item["count"], item["kind"], str(item["asset"])))
+        return items
+
+    def print_summary(self):
+        items = self.summary()
+        warnings = [item for item in items if item["level"] == "warning"]
+        if warnings:
+            print(f"Hinweise ({sum(item['count'] for item in warnings)} Meldungen):")
+        for item in warnings:
+            where = f": {item['asset']}" if item["asset"] else ""
+            examples = f" (z.B. {', '.join(item['cards'])})" if item["cards"] else ""
+            print(f"  {item['count']}x {item['message']}{where}{examples}")
+        info = [f"{item['message']}: {item['count']}" for item in items if item["level"] == "info"]
+        if info:
+            print("Info: " + ", ".join(info))
+        return items
@@ -0,0 +1,205 @@
+"""Master-Deck: mehrere Sammlungen in einem PDF, mit Trennblatt pro Sammlung.
+
+Jede eindeutige Karte (Zauber + Design) wird nur einmal als Form gerendert
+und überall dort gestempelt, wo der Zauber vorkommt.
+
+Aufruf aus dem Projektordner:
+    python export_master_deck.py --design src/design_config.json collections/*.json
+"""
+import argparse
+import json
+import os
+import sys
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from compiled_design import CompiledDesign
+from export_diagnostics import ExportDiagnostics
+from export_progress import ExportProgress
+from export_spellcards_pdf import (
+    CARDS_PER_COL, CARDS_PER_ROW, FONT_NAME, RASTER_CACHE_DIR, CardForms, ChromeForms, IconForms, RenderContext,
+    discard_outputs, front_card_position, image_dedupe, iter_pages, load_backside_for_option, mm_to_points,
+    output_settings, partial_output_path, print_stats, publish_outputs, render_backside_pages, render_card_pdf,
+    volume_output_path,
+)
+from raster_cache import RasterCache
+from asset_cache import svg_cache
+
+# Trennblatt: Spalten der Zauberliste und Schriftgrößen
+DIVIDER_COLUMNS = 2
+DIVIDER_TITLE_SIZE = 28
+DIVIDER_LIST_SIZE = 9
+
+
+def load_collections(collections):
+    """[(Titel, Zauber)] aus Pfaden zu Sammlungs-JSONs oder schon geladenen (Titel, Zauber)-Paaren."""
+    sections = []
+    for entry in collections:
+        if isinstance(entry, (tuple, list)) and len(entry) == 2 and not isinstance(entry[0], dict):
+            title, spells = entry
+        else:
+            with open(entry, "r", encoding="utf-8") as f:
+                spells = json.load(f)
+            title = os.path.splitext(os.path.basename(entry))[0]
+        sections.append((title, list(spells)))
+    return sections
+
+
+def render_divider_page(c, title, spells, bookmark):
+    """Trennblatt einer Sammlung: Titel, Kartenzahl und Zauberliste; plus Lesezeichen im PDF."""
+    page_w, page_h = c._pagesize
+    margin = mm_to_points(20)
+    c.bookmarkPage(bookmark)
+    c.addOutlineEntry(title, bookmark, level=0)
+
+    c.setFillColorRGB(0, 0, 0)
+    c.setFont("Times-Bold", DIVIDER_TITLE_SIZE)
+    c.drawCentredString(page_w / 2, page_h - margin - DIVIDER_TITLE_SIZE, title)
+    c.setFont(FONT_NAME, 12)
+    c.drawCentredString(page_w / 2, page_h - margin - DIVIDER_TITLE_SIZE - 24, f"{len(spells)} Karten")
+
+    # Zauberliste spaltenweise; was nicht passt, wird mit "..." abgekürzt
+    leading = DIVIDER_LIST_SIZE * 1.3
+    top = page_h - margin - DIVIDER_TITLE_SIZE - 60
+    rows = int((top - margin) // leading)
+    column_w = (page_w - 2 * margin) / DIVIDER_COLUMNS
+    c.setFont(FONT_NAME, DIVIDER_LIST_SIZE)
+    names = [spell.get("name", "Unbenannt") for spell in spells]
+    if len(names) > rows * DIVIDER_COLUMNS:
+        names = names[:rows * DIVIDER_COLUMNS - 1] + ["..."]
+    for i, name in enumerate(names):
+        col, row = divmod(i, rows)
+        c.drawString(margin + col * column_w, top - row * leading, name)
+    c.showPage()
+
+
+def export_master_deck(collections, design_config, output_dir="output", base_name="MasterDeck", backside_option="none", backside_path=None, print_dpi=300, output_profile=None, verbose=False, progress=None, cancel=None):
+    """Exportiert mehrere Sammlungen als ein PDF und gibt einen Report (dict) zurück.
+
+    collections: Pfade zu Sammlungs-JSONs (Titel = Dateiname) oder
+    (Titel, Zauber)-Paare. Jede Sammlung beginnt mit einem Trennblatt und
+    bekommt ein Lesezeichen. Karten, die mehrfach vorkommen, liegen nur
+    einmal als Form XObject im PDF (CardForms) und werden sonst nur noch
+    referenziert; Einzelstücke werden direkt gezeichnet, eine Form lohnt sich
+    für sie nicht. Der Report nennt cards (alle Plätze), unique_cards
+    (gerendert) und shared_cards (davon als Form).
+    Rückseiten, Ausgabeprofil, progress/cancel und die .part-Datei wie bei
+    export_spellcards_pdf (seriell, ohne Bände und Fragment-Cache).
+    """
+    sections = load_collections(collections)
+    os.makedirs(output_dir, exist_ok=True)
+    settings = output_settings(output_profile, print_dpi)
+    raster = RasterCache(os.path.join(output_dir, RASTER_CACHE_DIR), settings["print_dpi"], settings["jpeg_quality"]) if settings["print_dpi"] else None
+
+    cards_per_page = CARDS_PER_ROW * CARDS_PER_COL
+    card_pages = sum((len(spells) + cards_per_page - 1) // cards_per_page for _, spells in sections)
+    tracker = ExportProgress(
+        progress,
+        cards_total=sum(len(spells) for _, spells in sections),
+        pages_total=card_pages + len(sections),
+        cancel_token=cancel,
+    )
+    tracker.check()
+    print(f"Exportiere Master-Deck: {len(sections)} Sammlungen, {tracker.cards_total} Karten...")
+
+    design = CompiledDesign(design_config, FONT_NAME, raster_cache=raster)
+    ctx = RenderContext(
+        svg_assets=svg_cache.session(),
+        icon_forms=IconForms(),
+        chrome_forms=ChromeForms(),
+        diagnostics=ExportDiagnostics(verbose),
+        raster=raster,
+    )
+    card_forms = CardForms()
+    # wie oft jede Karte im ganzen Deck vorkommt
+    occurrences = {}
+    for _, spells in sections:
+        for spell in spells:
+            name = card_forms.form_name(spell, design)
+            occurrences[name] = occurrences.get(name, 0) + 1
+    inline_cards = 0
+    backside_image = None
+    if backside_option != "none":
+        backside_image = load_backside_for_option(backside_option, backside_path, raster, settings["jpeg_quality"])
+
+    output_path = volume_output_path(output_dir, base_name)
+    report_sections = []
+    try:
+        c = canvas.Canvas(partial_output_path(output_path), pagesize=A4, pageCompression=settings["page_compression"])
+        page_height = c._pagesize[1]
+        for number, (title, spells) in enumerate(sections, 1):
+            render_divider_page(c, title, spells, f"section{number}")
+            tracker.advance(pages=1)
+            rendered_before = card_forms.rendered + inline_cards
+            for page_spells in iter_pages(spells):
+                for idx, spell in enumerate(page_spells):
+                    x, y = front_card_position(idx, page_height)
+                    if occurrences[card_forms.form_name(spell, design)] > 1:
+                        card_forms.draw(c, spell, design, ctx, x, y)
+                    else:
+                        render_card_pdf(c, x, y, spell, design, ctx=ctx)
+                        inline_cards += 1
+                c.showPage()
+                tracker.advance(len(page_spells), 1)
+            report_sections.append({
+                "name": title,
+                "cards": len(spells),
+                "new_cards": card_forms.rendered + inline_cards - rendered_before,
+            })
+
+        if backside_option != "none":
+            tracker.set_phase("backsides")
+            render_backside_pages(c, card_pages, backside_image)
+        tracker.set_phase("save")
+        c.save()
+        tracker.check()
+    except BaseException:
+        discard_outputs([output_path])
+        raise
+    publish_outputs([output_path])
+    tracker.finish()
+
+    cards = card_forms.placed + inline_cards
+    unique_cards = card_forms.rendered + inline_cards
+    print(f"{cards} Karten, davon {unique_cards} eindeutig gerendert ({card_forms.rendered} mehrfach genutzt)")
+    stats = ctx.stats()
+    stats["image_dedupe"] = image_dedupe.stats(c)
+    stats["file_size"] = os.path.getsize(output_path)
+    print_stats(stats)
+
+    return {
+        "output_path": output_path,
+        "sections": report_sections,
+        "cards": cards,
+        "unique_cards": unique_cards,
+        "shared_cards": card_forms.rendered,
+        "pages": tracker.pages_done,
+        "output_profile": output_profile,
+        **stats,
+        "diagnostics": ctx.diagnostics.print_summary(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("collections", nargs="+", help="Sammlungs-JSONs, eine pro Abschnitt")
+    parser.add_argument("--design", default="src/design_config.json")
+    parser.add_argument("--output", default="output")
+    parser.add_argument("--name", default="MasterDeck", help="Dateiname DNDZauber_<name>.pdf")
+    parser.add_argument("--backside", default="none", choices=["none", "preset", "custom"])
+    parser.add_argument("--backside-path")
+    parser.add_argument("--profile", choices=["screen", "print", "archive"], help="Ausgabeprofil")
+    args = parser.parse_args(argv)
+
+    with open(args.design, "r", encoding="utf-8") as f:
+        design_config = json.load(f)
+    export_master_deck(
+        args.collections, design_config, args.output, args.name,
+        backside_option=args.backside, backside_path=args.backside_path, output_profile=args.profile,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+
+
+class ExportCancelled(Exception):
+    """Der Export wurde über ein CancelToken abgebrochen; es wurde keine Datei geschrieben."""
+
+
+class CancelToken:
+    """Abbruchsignal für einen laufenden Export (threadsicher, z.B. aus der UI)."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ExportCancelled("Export abgebrochen")
+
+
+class ExportProgress:
+    """Fortschritt eines Exports: Karten/Seiten, Phase und geschätzte Restzeit.
+
+    callback(info) bekommt ein dict mit phase ("fronts", "backsides",
+    "merge", "save", "done"), cards_done, cards_total, pages_done,
+    pages_total, elapsed, cards_per_second und eta (Sekunden oder None,
+    solange die Gesamtzahl unbekannt ist).
+    """
+
+    def __init__(self, callback=None, cards_total=None, pages_total=None, cancel_token=None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.cards_total = cards_total
+        self.pages_total = pages_total
+        self.cards_done = 0
+        self.pages_done = 0
+        self.phase = "fronts"
+        self._start = time.perf_counter()
+
+    def check(self):
+        """Wirft ExportCancelled, wenn abgebrochen wurde."""
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def set_phase(self, phase):
+        self.check()
+        self.phase = phase
+        self._emit()
+
+    def advance(self, cards=0, pages=0):
+        self.cards_done += cards
+        self.pages_done += pages
+        self._emit()
+        self.check()
+
+    def finish(self):
+        """Meldet "done"; danach wird nicht mehr abgebrochen."""
+        self.phase = "done"
+        self._emit()
+
+    def info(self):
+        elapsed = time.perf_counter() - self._start
+        rate = self.cards_done / elapsed if elapsed > 0 and self.cards_done else 0.0
+        eta = None
+        if self.cards_total is not None and rate:
+            eta = max(0.0, (self.cards_total - self.cards_done) / rate)
+        return {
+            "phase": self.phase,
+            "cards_done": self.cards_done,
+            "cards_total": self.cards_total,
+            "pages_done": self.pages_done,
+            "pages_total": self.pages_total,
+            "elapsed": elapsed,
+            "cards_per_second": rate,
+            "eta": eta,
+        }
+
+    def _emit(self):
+        if self.callback is not None:
+            self.callback(self.info())
+
+
+class ExportJob:
+    """Führt einen Export in einem Hintergrund-Thread aus.
+
+    target wird im Thread mit progress= und cancel= (CancelToken) aufgerufen,
+    passt also zu export_spellcards_pdf und export_master_deck. Fortschritt,
+    Ergebnis und Fehler landen in einer Queue; die UI holt sie mit poll() ab
+    (in Tk per after()), damit Widgets nur im Hauptthread angefasst werden.
+    status ("queued", "running", "done", "cancelled", "error"), progress
+    (letztes ExportProgress-dict), report und error lassen sich zusätzlich
+    direkt lesen, z.B. für eine Liste mehrerer Jobs (ExportQueue).
+    """
+
+    def __init__(self, target, **kwargs):
+        self.target = target
+        self.kwargs = kwargs
+        self.cancel_token = CancelToken()
+        self.status = "queued"
+        self.progress = None
+        self.report = None
+        self.error = None
+        self._events = queue.Queue()
+
+    def start(self):
+        """Startet run() in einem eigenen Thread."""
+        threading.Thread(target=self.run, name="export", daemon=True).start()
+        return self
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+    @property
+    def running(self):
+        return self.status in ("queued", "running")
+
+    def _progress(self, info):
+        self.progress = info
+        self._events.put(("progress", info))
+
+    def run(self):
+        """Führt den Export im aufrufenden Thread aus (start() oder ein Pool)."""
+        try:
+            # vor dem Start abgebrochen (z.B. noch in der Warteschlange)
+            self.cancel_token.raise_if_cancelled()
+            self.status = "running"
+            self.report = self.target(progress=self._progress, cancel=self.cancel_token, **self.kwargs)
+            self.status = "done"
+            self._events.put(("done", self.report))
+        except ExportCancelled:
+            self.status = "cancelled"
+            self._events.put(("cancelled", None))
+        except Exception as e:
+            self.error = e
+            self.status = "error"
+            self._events.put(("error", e))
+
+    def poll(self):
+        """(letzter Fortschritt oder None, Ende oder None) seit dem letzten Aufruf.
+
+        Ende ist ("done", Report), ("cancelled", None) oder ("error", Exception).
+        Zwischenstände werden zusammengefasst, die UI zeichnet nur den neuesten.
+        """
+        progress = finished = None
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                return progress, finished
+            if kind == "progress":
+                progress = payload
+            else:
+                finished = (kind, payload)
@@ -0,0 +1,151 @@
+"""Warteschlange für mehrere PDF-Exporte (Sammlungen x Designs).
+
+Die Jobs laufen in höchstens max_workers Threads desselben Prozesses und
+teilen sich damit die warmen Caches (SVG-Icons, Textumbrüche,
+Display-Listen, Schriften, aufbereitete Bilder in output/.raster_cache).
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+
+from export_progress import ExportJob
+from export_spellcards_pdf import export_spellcards_pdf, volume_output_path
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class ExportQueue:
+    """Begrenzter Pool für Export-Jobs; gleiche Jobs werden zusammengefasst.
+
+    submit() legt einen ExportJob für Sammlung + Design an. Läuft oder wartet
+    schon ein Job für dieselben Dateien mit gleichem Inhalt und gleicher
+    Rückseite, wird dieser zurückgegeben statt ein zweites Mal zu
+    exportieren. max_workers lässt sich jederzeit ändern und gilt für die
+    nächsten Starts.
+    """
+
+    def __init__(self, max_workers=2, output_dir="output", export=export_spellcards_pdf):
+        self.max_workers = max(1, max_workers)
+        self.output_dir = output_dir
+        self.export = export
+        self.jobs = []
+        self._pending = deque()
+        self._active = 0
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_key(collection_path, design_path, spells, design_config, backside_option, backside_path):
+        """Pfade (gleiche Ausgabedatei) plus Inhalt (inzwischen geänderte Dateien sind ein neuer Job)."""
+        payload = json.dumps(
+            [os.path.abspath(collection_path), os.path.abspath(design_path), spells, design_config, backside_option, backside_path],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, collection_path, design_path, backside_option="none", backside_path=None):
+        """(job, neu) für eine Sammlung mit einem Design; Dateien werden jetzt gelesen.
+
+        Ausgabe: output_dir/DNDZauber_<Sammlung>_<Design>.pdf; heißt schon ein
+        Job mit anderen Dateien so (gleicher Name, anderer Ordner), wird
+        _2, _3, ... angehängt, statt dessen PDF zu überschreiben.
+        """
+        spells = _load_json(collection_path)
+        design_config = _load_json(design_path)
+        key = self.job_key(collection_path, design_path, spells, design_config, backside_option, backside_path)
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is not None and job.running:
+                return job, False
+            sources = (os.path.abspath(collection_path), os.path.abspath(design_path))
+            base_name = self._base_name(f"{_name(collection_path)}_{_name(design_path)}", sources)
+            job = ExportJob(
+                self.export,
+                spells=spells,
+                design_config=design_config,
+                output_dir=self.output_dir,
+                backside_option=backside_option,
+                backside_path=backside_path,
+                base_name=base_name,
+            )
+            job.collection = _name(collection_path)
+            job.design = _name(design_path)
+            job.base_name = base_name
+            job.sources = sources
+            job.output_path = volume_output_path(self.output_dir, base_name)
+            self._by_key[key] = job
+            self.jobs.append(job)
+            self._pending.append(job)
+        self._dispatch()
+        return job, True
+
+    def _base_name(self, base_name, sources):
+        """base_name, bei Kollision mit einem Job für andere Dateien mit _2, _3, ... ergänzt."""
+        taken = {job.base_name: job.sources for job in self.jobs}
+        candidate = base_name
+        n = 1
+        while candidate in taken and taken[candidate] != sources:
+            n += 1
+            candidate = f"{base_name}_{n}"
+        return candidate
+
+    def submit_all(self, collection_paths, design_paths, backside_option="none", backside_path=None):
+        """Jede Sammlung mit jedem Design; gibt [(job, neu)] zurück."""
+        return [
+            self.submit(collection_path, design_path, backside_option, backside_path)
+            for collection_path in collection_paths
+            for design_path in design_paths
+        ]
+
+    def set_max_workers(self, max_workers):
+        self.max_workers = max(1, max_workers)
+        self._dispatch()
+
+    def _dispatch(self):
+        with self._lock:
+            while self._pending and self._active < self.max_workers:
+                job = self._pending.popleft()
+                self._active += 1
+                threading.Thread(target=self._run, args=(job,), name="export-queue", daemon=True).start()
+
+    def _run(self, job):
+        try:
+            job.run()
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._dispatch()
+
+    def cancel(self, job):
+        """Bricht einen Job ab; wartende Jobs starten dann gar nicht erst."""
+        job.cancel()
+        with self._lock:
+            waiting = job in self._pending
+            if waiting:
+                self._pending.remove(job)
+        if waiting:
+            # endet sofort als "cancelled", ohne einen Platz im Pool zu belegen
+            job.run()
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            if job.running:
+                self.cancel(job)
+
+    def clear_finished(self):
+        """Entfernt fertige, abgebrochene und fehlgeschlagene Jobs aus der Liste."""
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.running]
+
+    @property
+    def busy(self):
+        return any(job.running for job in self.jobs)
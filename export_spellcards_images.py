@@ -0,0 +1,182 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from compiled_design import CompiledDesign
+from export_diagnostics import ExportDiagnostics
+from export_progress import ExportProgress
+from export_spellcards_pdf import (
+    CARD_HEIGHT_MM, CARD_WIDTH_MM, FONT_NAME, RASTER_CACHE_DIR, RenderContext, merge_stats, render_card_pdf,
+)
+from pillow_canvas import PillowCanvas
+from raster_cache import RasterCache
+
+# Bildformat -> (Dateiendung, Optionen für Image.save); Stufen nach Zeit/Größe pro Karte
+# gewählt (PNG 3 ist kleiner und schneller als der Standard 6, WebP 2 halb so teuer wie 4)
+IMAGE_FORMATS = {
+    "png": (".png", {"format": "PNG", "compress_level": 3}),
+    "webp": (".webp", {"format": "WEBP", "quality": 90, "method": 2}),
+}
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# Karten pro Auftrag an einen Worker (klein genug für gleichmäßigen Fortschritt)
+CARDS_PER_JOB = 16
+
+
+def card_file_name(index, spell, extension):
+    """z.B. 0007_Fireball.png; die Nummer hält die Reihenfolge der Sammlung."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", spell.get("name", "")).strip("_") or "Karte"
+    return f"{index + 1:04d}_{slug}{extension}"
+
+
+def render_card_image(spell, design, ctx, dpi=300, supersample=2):
+    """Rendert eine Karte mit render_card_pdf auf ein Pillow-Bild (RGB)."""
+    c = PillowCanvas(design.card_w, design.card_h, dpi=dpi, supersample=supersample)
+    render_card_pdf(c, 0, 0, spell, design, ctx=ctx)
+    return c.image()
+
+
+# pro Prozess: Design-JSON + Auflösung -> CompiledDesign (Hintergrund schon skaliert)
+_designs = {}
+
+
+def _compiled_design(design_config, options):
+    key = (json.dumps(design_config, sort_keys=True), options["dpi"] * options["supersample"], options["raster_dir"])
+    design = _designs.get(key)
+    if design is None:
+        raster = RasterCache(options["raster_dir"], key[1]) if options["raster_dir"] else None
+        design = _designs[key] = CompiledDesign(design_config, FONT_NAME, raster_cache=raster)
+    return design
+
+
+def _render_image_shard(job):
+    """Worker: rendert einen Block Karten als Dateien nach options["directory"]."""
+    start, spells, design_config, options = job
+    design = _compiled_design(design_config, options)
+    ctx = RenderContext(diagnostics=ExportDiagnostics(options.get("verbose", False)))
+    extension, save_options = IMAGE_FORMATS[options["image_format"]]
+    entries = []
+    for index, spell in enumerate(spells, start):
+        image = render_card_image(spell, design, ctx, options["dpi"], options["supersample"])
+        name = card_file_name(index, spell, extension)
+        image.save(os.path.join(options["directory"], name), dpi=(options["dpi"], options["dpi"]), **save_options)
+        entries.append({
+            "index": index,
+            "name": spell.get("name", "Unbenannt"),
+            "file": name,
+            "width": image.width,
+            "height": image.height,
+        })
+    return entries, ctx.stats(), ctx.diagnostics.raw()
+
+
+def export_spellcards_images(spells, design_config, output_dir="output", base_name="MyCollection", dpi=300, image_format="png", workers=1, verbose=False, progress=None, cancel=None, supersample=2):
+    """Exportiert jede Karte als eigenes Bild (PNG/WebP) plus manifest.json, z.B. für virtuelle Spieltische.
+
+    Gezeichnet wird mit render_card_pdf und demselben Design wie im PDF, nur
+    auf ein Pillow-Bild (pillow_canvas). Ergebnis ist der Ordner
+    output_dir/DNDZauber_<base_name>_<format>/ mit einer Datei pro Karte.
+    dpi: Auflösung der Bilder (63 x 88 mm, bei 300 dpi 744 x 1039 Pixel).
+    supersample: intern in dieser Vielfachen Auflösung zeichnen und
+    herunterrechnen (Kantenglättung); 1 ist am schnellsten.
+    workers: > 1 rendert in einem Prozess-Pool, die Reihenfolge bleibt gleich.
+    progress/cancel: wie bei export_spellcards_pdf (ExportProgress, CancelToken);
+    die Bilder entstehen in einem .part-Ordner, der erst am Ende umbenannt wird.
+    Der Report nennt u.a. seconds und cards_per_second.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unbekanntes Bildformat: {image_format} (erlaubt: {', '.join(IMAGE_FORMATS)})")
+    spells = list(spells)
+    start_time = time.perf_counter()
+    tracker = ExportProgress(progress, cards_total=len(spells), cancel_token=cancel)
+    tracker.check()
+
+    directory = os.path.join(output_dir, f"DNDZauber_{base_name}_{image_format}")
+    part_directory = f"{directory}.{os.getpid()}.{threading.get_ident()}.part"
+    shutil.rmtree(part_directory, ignore_errors=True)
+    os.makedirs(part_directory)
+    options = {
+        "directory": part_directory,
+        "dpi": dpi,
+        "supersample": supersample,
+        "image_format": image_format,
+        "raster_dir": os.path.join(output_dir, RASTER_CACHE_DIR),
+        "verbose": verbose,
+    }
+    jobs = [
+        (start, spells[start:start + CARDS_PER_JOB], design_config, options)
+        for start in range(0, len(spells), CARDS_PER_JOB)
+    ]
+    print(f"Exportiere {len(spells)} Karten als {image_format.upper()} ({dpi} dpi)...")
+
+    results = []
+    try:
+        if workers and workers > 1 and len(jobs) > 1:
+            print(f"Paralleler Export: {len(jobs)} Blöcke auf {workers} Prozesse")
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_render_image_shard, job): job for job in jobs}
+                pending = set(futures)
+                try:
+                    while pending:
+                        done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            results.append(future.result())
+                            tracker.advance(len(futures[future][1]))
+                        tracker.check()
+                except BaseException:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+        else:
+            for job in jobs:
+                results.append(_render_image_shard(job))
+                tracker.advance(len(job[1]))
+
+        tracker.set_phase("save")
+        entries = sorted((entry for part, _, _ in results for entry in part), key=lambda entry: entry["index"])
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "collection": base_name,
+            "image_format": image_format,
+            "dpi": dpi,
+            "card_size_mm": [CARD_WIDTH_MM, CARD_HEIGHT_MM],
+            "cards": entries,
+        }
+        with open(os.path.join(part_directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        tracker.check()
+    except BaseException:
+        # kein halber Bilder-Ordner: .part-Ordner wieder entfernen
+        shutil.rmtree(part_directory, ignore_errors=True)
+        raise
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(part_directory, directory)
+    tracker.finish()
+
+    seconds = time.perf_counter() - start_time
+    rate = len(entries) / seconds if seconds > 0 else 0.0
+    diagnostics = ExportDiagnostics()
+    for _, _, raw in results:
+        diagnostics.merge(raw)
+    stats = merge_stats(part_stats for _, part_stats, _ in results)
+    print(f"Bilder gespeichert unter: {directory}")
+    print(f"{len(entries)} Karten in {seconds:.1f} s ({rate:.1f} Karten/s)")
+
+    return {
+        "output_path": directory,
+        "manifest_path": os.path.join(directory, MANIFEST_NAME),
+        "cards": len(entries),
+        "image_format": image_format,
+        "dpi": dpi,
+        "seconds": seconds,
+        "cards_per_second": rate,
+        "workers": workers,
+        **stats,
+        "diagnostics": diagnostics.print_summary(),
+    }
@@ -1,17 +1,27 @@
-from reportlab.lib.styles import ParagraphStyle
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib.colors import Color
 from reportlab.lib.colors import HexColor
-from svglib.svglib import svg2rlg
 from reportlab.graphics import renderPDF
-from reportlab.platypus import Paragraph
-from card_renderer_utils import SCHOOL_COLORS,CLASS_COLORS
-import textwrap
+from asset_cache import SvgAssetCache, svg_cache
+from compiled_design import CompiledDesign, ensure_compiled
+from text_layout import draw_text_layout, layout_cache, persistent_layout_cache
+from reportlab.lib.utils import ImageReader
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from card_fragment_cache import CardFragmentCache, asset_versions, record_card_resource
+from render_profiler import NULL_PROFILER, RenderProfiler
+from export_diagnostics import ExportDiagnostics
+from raster_cache import ImageDedupe, RasterCache
+from export_progress import ExportProgress
+from card_layout import display_list_cache
+import hashlib
+import io
+import itertools
+import weakref
 import json
 import os
-import re
+import threading
 from PIL import Image
 
 # Maße
@@ -51,372 +61,913 @@ def hex_to_rgb(hex_color):
     return tuple(int(hex_color[i:i+2], 16)/255 for i in (0, 2, 4))
 
 
-def render_card_pdf(c, x0, y0, spell, config, assets_dir="src/img"):
-    card_w = 63 * mm
-    card_h = 88 * mm
-    has_concentration = False
-
-    #print("== Karte:", spell.get("name", "Unbenannt"), "==")
-
-    # Hilfsfunktionen (wie in Vorschau)
-    def px(conf): return x0 + (conf.get("x", 0) / 100) * card_w
-    def py(conf):
-        corrected_y = ((100- conf.get("y", 0)) / 100)
-        #print("Y-Pos: ", conf.get("y"), corrected_y)
-        return y0 + ((100- conf.get("y", 0)) / 100) * card_h
-    def fw(conf, key): return (conf.get(key, 10) / 100) * card_w
-    def fs(conf): return conf.get("font_size", 10)
-    def fc(conf): return HexColor(conf.get("color", "#000000"))
-
-    # Farben basierend auf Mode
-    def fc_dynamic(conf, spell):
-        mode = conf.get("mode", "single")
-        #print(f"[fc] Mode: {mode}, Color: {conf.get('color','None')}, Spell: {conf.get('name')}")
-        if mode == "single" or not spell:
-            return HexColor(conf.get("color", "#000000"))
-        if mode == "class":
-            cls = (spell.get("classes") or [None])[0]
-            c1 = CLASS_COLORS.get(cls.lower())
-            #print("Class Color: ",HexColor(c1))
-            return HexColor(CLASS_COLORS.get(cls.lower(), "#000000")) #if cls else HexColor("#000000")
-        if mode == "school":
-            school = spell.get("school", "").lower()
-            c1 = SCHOOL_COLORS.get(school.lower())
-            #print("School Color: ", HexColor(c1))
-            return HexColor(SCHOOL_COLORS.get(school, "#000000"))
-        return HexColor("#000000")
-
-    # Hintergrund
-    bg_conf = config.get("background_image", {})
-    bg_path = bg_conf.get("path")
-    if bg_path and os.path.exists(bg_path):
+def icon_form_name(path, scale):
+    """Stabiler Form-Name für ein Icon; gleich in jedem Dokument und Prozess."""
+    digest = hashlib.md5(f"{path}|{scale:.6f}".encode("utf-8")).hexdigest()[:12]
+    return f"DnDIcon_{digest}"
+
+class IconForms:
+    """Legt jedes Icon (Pfad + Skalierung) einmal pro PDF als Form XObject an.
+
+    Die Karten referenzieren die Form danach nur noch per doForm, statt die
+    kompletten Vektorpfade in jeden Seiteninhalt zu schreiben.
+    """
+
+    def __init__(self):
+        # pro Canvas: Menge der bereits angelegten Form-Namen
+        self._forms = weakref.WeakKeyDictionary()
+
+    def ensure(self, c, name, drawing):
+        """Legt die Form name aus drawing an, falls es sie im Dokument noch nicht gibt."""
+        forms = self._forms.setdefault(c, set())
+        if name not in forms:
+            if not c.hasForm(name):
+                x1, y1, x2, y2 = drawing.getBounds()
+                w = drawing.width * drawing.transform[0]
+                h = drawing.height * drawing.transform[3]
+                c.beginForm(name, min(x1, 0) - 1, min(y1, 0) - 1, max(x2, w) + 1, max(y2, h) + 1)
+                renderPDF.draw(drawing, c, 0, 0)
+                c.endForm()
+            forms.add(name)
+        return name
+
+    def draw(self, c, drawing, x, y, path):
+        scale = drawing.transform[0]
+        name = self.ensure(c, icon_form_name(path, scale), drawing)
+        record_card_resource(c, "icons", (name, path, scale))
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+
+    def count(self):
+        return sum(len(forms) for forms in self._forms.values())
+
+
+class ChromeForms:
+    """Hintergrund und Rahmen als Form XObject, eine pro Design und Rahmenfarbe.
+
+    Bei Rahmen nach Schule oder Klasse gibt es nur wenige Farben; jede Karte
+    stempelt dann nur noch die passende Form statt Bild und Rahmen neu zu zeichnen.
+    """
+
+    def __init__(self):
+        self._forms = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def form_name(design, color):
+        key = "|".join(str(v) for v in (
+            design.background_path, design.card_w, design.card_h,
+            design.frame_thickness, design.frame_roundness, color.hexval(),
+        ))
+        return "DnDChrome_" + hashlib.md5(key.encode("utf-8")).hexdigest()[:12]
+
+    def ensure(self, c, design, color):
+        """Legt die Form für color an, falls nötig, und gibt ihren Namen zurück."""
+        name = self.form_name(design, color)
+        forms = self._forms.setdefault(c, set())
+        if name not in forms:
+            if not c.hasForm(name):
+                # Rahmenlinie ragt um die halbe Strichstärke über die Karte
+                pad = design.frame_thickness / 2 + 1
+                c.beginForm(name, -pad, -pad, design.card_w + pad, design.card_h + pad)
+                draw_card_chrome(c, 0, 0, design, color)
+                c.endForm()
+            forms.add(name)
+        return name
+
+    def draw(self, c, design, color, x, y):
+        name = self.ensure(c, design, color)
+        record_card_resource(c, "chrome", color.hexval())
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+
+    def count(self):
+        return sum(len(forms) for forms in self._forms.values())
+
+
+class CardForms:
+    """Ganze Karten als Form XObject, eine pro Zauber und Design (Master-Deck).
+
+    Kommt derselbe Zauber in mehreren Sammlungen vor, wird er nur einmal
+    gerendert und danach an jeder Stelle per doForm gestempelt; Renderzeit
+    und Dateigröße wachsen mit den eindeutigen Karten, nicht mit allen.
+    """
+
+    def __init__(self):
+        self._forms = weakref.WeakKeyDictionary()
+        self.rendered = 0
+        self.placed = 0
+
+    @staticmethod
+    def form_name(spell, design):
+        key = design.fingerprint + json.dumps(spell, sort_keys=True, default=str)
+        return "DnDCard_" + hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+
+    def ensure(self, c, spell, design, ctx):
+        """Rendert die Karte als Form, falls es sie im Dokument noch nicht gibt."""
+        name = self.form_name(spell, design)
+        forms = self._forms.setdefault(c, set())
+        if name not in forms:
+            if not c.hasForm(name):
+                # Formen lassen sich nicht verschachteln: Rahmen und Icons vorher anlegen
+                display_list = ctx.display_lists.get(spell, design, ctx.layouts, ctx.svg_assets, versions=ctx.versions(design))
+                for op in display_list.ops:
+                    if op[0] == "chrome" and ctx.chrome_forms is not None:
+                        ctx.chrome_forms.ensure(c, design, op[1])
+                    elif op[0] == "icon" and ctx.icon_forms is not None:
+                        _, path, _, _, mode, measure = op
+                        drawing = ctx.svg_assets.fit(path, **{mode: measure})
+                        if drawing:
+                            ctx.icon_forms.ensure(c, icon_form_name(path, drawing.transform[0]), drawing)
+                # übergelaufener Text wird wie auf der Seite nicht abgeschnitten
+                pad = max(design.card_w, design.card_h)
+                c.beginForm(name, -pad, -pad, design.card_w + pad, design.card_h + pad)
+                render_card_pdf(c, 0, 0, spell, design, ctx=ctx)
+                c.endForm()
+                self.rendered += 1
+            forms.add(name)
+        return name
+
+    def draw(self, c, spell, design, ctx, x, y):
+        name = self.ensure(c, spell, design, ctx)
+        self.placed += 1
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+
+
+def draw_card_chrome(c, x0, y0, design, color):
+    """Hintergrund (Bild oder weiß) und Rahmen einer Karte."""
+    if design.background_path:
         try:
-            c.drawImage(bg_path, x0, y0, width=card_w, height=card_h)
+            draw_card_image(c, design.background_path, x0, y0, width=design.card_w, height=design.card_h)
         except:
             pass
     else:
         c.setFillColor(HexColor("#ffffff"))
-        c.rect(x0, y0, card_w, card_h, fill=1)
-
-    # Rahmen
-    frame = config.get("frame", {})
-    color = fc_dynamic(frame, spell)
-    thickness = frame.get("thickness", 1)
-    #print("Rahmenfarbe (vor fc_dynamic):", frame.get("color"))
-    #print("Rahmenmode:", frame.get("mode"))
-    #print("Bestimmte Farbe (fc_dynamic):", fc_dynamic(frame, spell))
-    #print("Dicke des Rhmens: ", thickness)
+        c.rect(x0, y0, design.card_w, design.card_h, fill=1, stroke=0)
     c.setStrokeColor(color)
-    c.setLineWidth(thickness)
-    c.roundRect(x0, y0, card_w, card_h, frame.get("roundness", 0), fill=0)
-    c.setLineWidth(0) #zurücksetzen für andere icons
-
-    # Beschriftungen
-    # Komponenten aus Booleans ermitteln
-    comps = spell.get("components", "")
-    if isinstance(comps, dict):
-        flags = []
-        if comps.get("verbal"): flags.append("V")
-        if comps.get("somatic"): flags.append("S")
-        if comps.get("material"): flags.append("M")
-        comps = ", ".join(flags)
-    elif isinstance(comps, str):
-        # fallback falls doch ein String drin steht
-        comps = comps.strip()
-    else:
-        comps = ""
-
-    # Save-DC als Kürzel
-    save_dc = spell.get("save_dc", "")
-    if isinstance(save_dc, str):
-        save_dc = {
-            "dexterity": "DEX", "constitution": "CON", "strength": "STR",
-            "intelligence": "INT", "wisdom": "WIS", "charisma": "CHA"
-        }.get(save_dc.lower(), save_dc)
-
-    # Area of Effect als Icon
-    aoe_raw = spell.get("AreaOfEffect", "")
-    aoe_distance = ""
-    aoe_shape = ""
-    if aoe_raw:
-        parts = aoe_raw.lower().split("ft.")
-        if len(parts) >= 2:
-            aoe_distance = parts[0].strip() + " ft."
-            aoe_shape = parts[1].strip()
-    conf = config.get("area_of_effect", {})
-    if conf and aoe_shape:
-        icon_path = os.path.join(assets_dir, "aoe", f"{aoe_shape}.svg")  # z.B. aoe/line.svg
-        tx = px(conf)
-        ty = py(conf)
-        font_size = fs(conf)
-        icon_size = font_size + 2
-        text_size = font_size - 2
-        spacing = 1 * mm
-
-        # Text zuerst rendern
-        c.setFont(FONT_NAME, text_size)
-        c.setFillColor(fc(conf))
-        c.drawString(tx, ty - text_size + 1, aoe_distance)
-        text_width = c.stringWidth(aoe_distance, FONT_NAME, text_size)
-
-        # Icon oder Text-Fallback
-        icon_x = tx + text_width + spacing
-        icon_y = ty - text_size  # Default-Y-Wert
-
-        if os.path.exists(icon_path):
-            drawing = svg2rlg(icon_path)
-            if drawing:
-                scale = icon_size / max(drawing.width, drawing.height)
-                drawing.scale(scale, scale)
-                icon_draw_height = drawing.height * scale
-                # Vertikale Korrektur: Icon soll mittig zur Textzeile erscheinen
-                icon_y = ty - text_size + (text_size - icon_draw_height) / 2
-                renderPDF.draw(drawing, c, tx + text_width + spacing, icon_y)
-            else:
-                print(f"Fehler beim Laden von: {icon_path}")
-                c.drawString(icon_x, icon_y, f"[{aoe_shape}]")
-        else:
-            print(f"AOE-Icon nicht gefunden: {icon_path}")
-            c.drawString(icon_x, icon_y, f"[{aoe_shape}]")
+    c.setLineWidth(design.frame_thickness)
+    c.roundRect(x0, y0, design.card_w, design.card_h, design.frame_roundness, fill=0)
 
 
-    text_elements = {
-        "spell_name": spell.get("name", "Unbenannt"),
-        "spell_level": f"Level {spell.get('level', '')}".capitalize(),
-        "casting_time": spell.get("casting_time", ""),
-        "duration": spell.get("duration", ""),
-        "range": f"Range: {spell.get('range', '')}",
-        "components": f"Components: {comps}"
-    }
-
-    for key, text in text_elements.items():
-        conf = config.get(key)
-        if "concentration" in text.lower():
-            has_concentration = True
-
-        if conf:
-            tx = px(conf)
-            ty = py(conf)
-            max_width = fw(conf, "max_width") if "max_width" in conf else card_w - 10
-            style = ParagraphStyle(
-                name="Normal",
-                fontName=FONT_NAME,
-                fontSize=fs(conf)-1,
-                textColor=fc(conf)
-            )
-            para = Paragraph(text, style)
-            w, h = para.wrap(max_width, 100)
-            para.wrapOn(c, max_width, 100)
-            #print(f"y-Pos final ({key}): {ty- h}= {ty} - {h}")
-            para.drawOn(c, tx, ty - h)
-
-    # Desc
-    desc = spell.get("description", "")
-    desc_conf = config.get("description")
-    if desc_conf:
-        max_length = 800
-        if (len(desc) > max_length):
-            desc = desc[:(max_length - 3)] + "..."
-        tx = px(desc_conf)
-        ty = py(desc_conf)
-        max_width = fw(desc_conf, "max_width") if "max_width" in desc_conf else card_w - 10
-        style = ParagraphStyle(
-            name="Normal",
-            fontName=FONT_NAME,
-            fontSize=fs(desc_conf) - 1,
-            leading=fs(desc_conf) * 1.1,
-            textColor=fc(desc_conf)
-        )
-        para = Paragraph(desc, style)
-        w, h = para.wrap(max_width, 100)
-        para.wrapOn(c, max_width-10, 100)
-        para.drawOn(c, tx, ty - fs(desc_conf) - h)
-
-
-    # Schadenswürfel extrahieren
-    dmg_dicex = extract_damage_dice_from_description(desc)
-    #print("Desc: ", desc)
-    #print("extract: ",len(dmg_dicex))
-    if len(dmg_dicex)>0:
-        conf = config.get("damage_dice", {})
-        tx = px(conf)
-        ty = py(conf)
-        font_size = fs(conf)
-        icon_size = font_size + 2
-        spacing = 1 * mm
-        font_size = font_size - 1
-        correctionY = 10  # 21
-
-        c.setFont(FONT_NAME, font_size)
-        c.setFillColor(fc(conf))
-        c.drawString(tx, ty - correctionY, "Damage:")
-
-        # Position nach dem "Damage:" Label
-        label_width = c.stringWidth("Damage:", FONT_NAME, font_size)
-        ix = tx + label_width + spacing  # tx + 45
-        iy = ty - 1  # kleine Justierung, SVG beginnt oft höher ty - font_size + 1
-
-        for i in range(len(dmg_dicex)):
-            #print("Schadenswürfel: ", dmg_dicex[i])
-            # Schadenswürfel + Icon
-            dmg_info = dmg_dicex[i]
-            parts = dmg_info.split()
-            iyX = iy - i * 10 - correctionY
-            tyX = ty - i * 10 - correctionY
-            if len(parts) >= 2:
-                #print("Parts von damage_dice korrekt gefunden?", len(parts), parts[0], parts[1])
-                dice, dmg_type = parts[0], parts[1].lower()
-                # SVG-Icon
-                icon_path = os.path.join(assets_dir, "dmg", f"dmg_{dmg_type}.svg")
-                icon_width = 20
-                if os.path.exists(icon_path):
-                    #print(f"SVG gefunden: {icon_path}")
-                    drawing = svg2rlg(icon_path)
-                    if drawing:
-                        scale = icon_size / max(drawing.width, drawing.height)
-                        #print(f"SVG Size: {drawing.width}x{drawing.height}")
-                        #print("Debug: svg-Scale: ", scale)
-                        #print(f"Icon {dmg_type} → Pos: ({tx}, {ty}) / Path: {icon_path}")
-                        drawing.scale(scale, scale)
-                        #print("y-pos-correction: ", iy, iyX)
-                        icon_width = drawing.width * scale
-                        #print("finale y-Pos icon: ", iyX)
-                        renderPDF.draw(drawing, c, ix, iyX)
-                    else:
-                        print("SVG konnte nicht geladen werden.")
-                        # Fallback: Kürzel als Text
-                        icon_width = c.stringWidth(f"[{dmg_type.upper()}]", FONT_NAME, font_size)
-                        w, h = para.wrap(icon_width, 100)
-                        #print("finale y-Pos Text, h: ", iyX, h)
-                        c.drawString(ix, tyX - h, f"[{dmg_type.lower()}]")
-                else:
-                    print("SVG-Pfad fehlt:", icon_path)
-                    if dmg_type.lower() == "when":
-                        c.drawString(ix, tyX, "[incr.w.lvl.]")
-                        icon_width = c.stringWidth("[incr.w.lvl.]", FONT_NAME, font_size)
-                    else:
-                        c.drawString(ix, tyX, f"[{dmg_type.lower()}]")
-                        icon_width = c.stringWidth(f"[{dmg_type.upper()}]", FONT_NAME, font_size)
-                # Schadenswürfel-Zahl
-                c.drawString(ix + icon_width + spacing, tyX, dice)
-            else:
-                print("Damage_element hat keine 2 Teile.")
+def draw_icon(c, drawing, x, y, icon_forms=None, path=None):
+    """Zeichnet ein (skaliertes) SVG-Drawing, wenn möglich als Form XObject."""
+    if icon_forms is None or path is None:
+        renderPDF.draw(drawing, c, x, y)
     else:
-        print("Keine Schadenswürfel")
-
-    #Konzentration Icons
-    conf = config.get("concentration_icon")
-    if conf and has_concentration:
-        icon_path = "src/img/concentration.svg"
-        ix = px(conf)
-        iy = py(conf) -21
-        iw = fw(conf, "width")
-        ih = fw(conf, "height")
-        if os.path.exists(icon_path):
-            drawing = svg2rlg(icon_path)
-            if drawing:
-                scale = min(iw / drawing.width, ih / drawing.height)
-                drawing.scale(scale, scale)
-                #print(f"CON-icon: {ix},{iy} scale: {scale}, h:{ih}, w:{iw}")
-                renderPDF.draw(drawing, c, ix, iy -ih)
+        icon_forms.draw(c, drawing, x, y, path)
+
+
+# gleiche Bildbytes unter verschiedenen Pfaden nur einmal pro PDF einbetten
+image_dedupe = ImageDedupe()
+
+def draw_card_image(c, path, x, y, mask=None, **kwargs):
+    """drawImage für Kartenbilder; merkt sich das Bild für den Fragment-Cache."""
+    path = image_dedupe.resolve(c, path, mask)
+    c.drawImage(path, x, y, mask=mask, **kwargs)
+    record_card_resource(c, "images", (path, mask))
+
+
+class RenderContext:
+    """Zustand, den alle Karten eines Exports teilen (Caches, Formen, ...).
+
+    Ohne Angaben: prozessweite SVG-/Layout-Caches, Icons direkt gezeichnet.
+    """
+
+    def __init__(self, svg_assets=None, icon_forms=None, layouts=None, fragments=None, profiler=None, diagnostics=None, chrome_forms=None, raster=None, display_lists=None):
+        self.svg_assets = svg_assets or svg_cache.session()
+        # Sitzungen: Treffer/Fehlversuche zählen nur für diesen Export
+        self.display_lists = (display_lists or display_list_cache).session()
+        self.icon_forms = icon_forms
+        self.chrome_forms = chrome_forms
+        self.raster = raster
+        self.layouts = (layouts or layout_cache).session()
+        self.fragments = fragments
+        self.profiler = profiler or NULL_PROFILER
+        self.diagnostics = diagnostics or ExportDiagnostics()
+        # Auto-Fit: verkleinerte Beschreibungen und solche, die selbst klein nicht passen
+        self.autofit = {"shrunk": 0, "overflow": 0}
+        # Textfelder: direkt per drawString oder mit Umbruch als Paragraph
+        self.text_fields = {"fast": 0, "paragraph": 0}
+        self._versions = {}
+
+    def versions(self, design, assets_dir="src/img"):
+        """Asset-Versionen für den DisplayListCache, einmal pro Export gelesen."""
+        key = (design.fingerprint, assets_dir)
+        if key not in self._versions:
+            self._versions[key] = asset_versions(design.config, assets_dir)
+        return self._versions[key]
+
+    def stats(self):
+        """Zähler dieses Exports (für Report und zum Zusammenführen paralleler Blöcke)."""
+        return {
+            "svg_cache": self.svg_assets.stats(),
+            "icon_forms": self.icon_forms.count() if self.icon_forms else 0,
+            "chrome_forms": self.chrome_forms.count() if self.chrome_forms else 0,
+            "layout_cache": self.layouts.stats(),
+            "fragments": self.fragments.stats() if self.fragments else None,
+            "raster_cache": self.raster.stats() if self.raster else None,
+            "autofit": dict(self.autofit),
+            "text_fields": dict(self.text_fields),
+            "display_lists": self.display_lists.stats(),
+        }
+
+
+def merge_stats(parts):
+    """Summiert die stats() mehrerer RenderContexts (verschachtelte dicts mit Zahlen)."""
+    merged = {}
+    for stats in parts:
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                target = merged.get(key) or {}
+                for name, count in value.items():
+                    target[name] = target.get(name, 0) + count
+                merged[key] = target
+            elif value is not None:
+                merged[key] = merged.get(key, 0) + value
             else:
-                print("SVG konnte nicht geladen werden:", icon_path)
-        else:
-            print("Konzentrations-Icon nicht gefunden:", icon_path)
-
-    #Schul-Symbol andrucken
-    school_name = spell.get("school", "").lower()
-    conf = config.get("school_icon")
-    if conf and school_name:
-        icon_path = f"src/img/school/{school_name}.png"
-        ix = px(conf)
-        iy = py(conf)
-        iyX = iy + 15
-        iw = fw(conf, "width")
-        ih = fw(conf, "height")
-        if os.path.exists(icon_path):
+                merged.setdefault(key, None)
+    return merged
+
+
+def render_card_pdf(c, x0, y0, spell, config, assets_dir="src/img", ctx=None):
+    """Rendert eine Karte; config ist ein CompiledDesign oder ein Design-Dict.
+
+    Das Layout kommt als Display-Liste aus card_layout (gecacht), hier wird
+    es nur noch auf den ReportLab-Canvas übertragen.
+    """
+    design = ensure_compiled(config, FONT_NAME)
+    ctx = ctx or RenderContext()
+    profiler = ctx.profiler
+    card_name = spell.get("name", "Unbenannt")
+    profiler.start_card(card_name)
+    display_list = ctx.display_lists.get(spell, design, ctx.layouts, ctx.svg_assets, assets_dir, profiler, ctx.versions(design, assets_dir))
+    # nur Cache-Zugriff; ein neues Layout steht schon in den Stufen layout_*
+    profiler.lap("layout")
+    draw_display_list(c, x0, y0, display_list, design, ctx)
+    profiler.end_card()
+
+
+def draw_display_list(c, x0, y0, display_list, design, ctx):
+    """ReportLab-Backend für card_layout: spielt die Befehle einer Karte bei x0, y0 ab."""
+    svg_assets = ctx.svg_assets
+    icon_forms = ctx.icon_forms
+    profiler = ctx.profiler
+    diagnostics = ctx.diagnostics
+    card_name = display_list.name
+    for op in display_list.ops:
+        kind = op[0]
+        if kind == "string":
+            c.drawString(x0 + op[1], y0 + op[2], op[3])
+        elif kind == "font":
+            c.setFont(op[1], op[2])
+        elif kind == "fill":
+            c.setFillColor(op[1])
+        elif kind == "layout":
+            draw_text_layout(c, x0 + op[1], y0 + op[2], op[3], op[4])
+        elif kind == "lap":
+            profiler.lap(op[1])
+        elif kind == "count":
+            getattr(ctx, op[1])[op[2]] += 1
+        elif kind == "icon":
+            _, path, x, y, mode, measure = op
+            drawing = svg_assets.fit(path, **{mode: measure})
+            if not drawing:
+                # seit dem Layout umbenannt oder unlesbar geworden
+                diagnostics.report("icon_unavailable", path, card_name)
+                continue
+            draw_icon(c, drawing, x0 + x, y0 + y, icon_forms, path)
+        elif kind == "image":
+            _, path, x, y, w, h = op
             try:
-                c.drawImage(icon_path, ix, iyX, width=iw, height=ih, preserveAspectRatio=True, mask='auto')
+                draw_card_image(c, path, x0 + x, y0 + y, width=w, height=h, preserveAspectRatio=True, mask='auto')
             except Exception as e:
-                print(f"Fehler beim Zeichnen von {icon_path}: {e}")
-        else:
-            print("Schul-Icon nicht gefunden:", icon_path)
-    else:
-        print("keine Schule?")
-
-
-def render_backside_image(c, x, y, path):
+                diagnostics.report("school_icon_error", path, card_name, detail=str(e))
+        elif kind == "report":
+            diagnostics.report(op[1], op[2], card_name, detail=op[3])
+        elif kind == "chrome":
+            frame_color = op[1]
+            if ctx.chrome_forms is not None:
+                ctx.chrome_forms.draw(c, design, frame_color, x0, y0)
+                # Zustand wie nach dem direkten Zeichnen, die Icons erben ihn
+                if not design.background_path:
+                    c.setFillColor(HexColor("#ffffff"))
+                c.setStrokeColor(frame_color)
+            else:
+                draw_card_chrome(c, x0, y0, design, frame_color)
+            c.setLineWidth(0) #zurücksetzen für andere icons
+
+
+BACKSIDE_FORM_NAME = "DnDBacksideSheet"
+FRAGMENT_CACHE_DIR = ".card_cache"
+RASTER_CACHE_DIR = ".raster_cache"
+
+# Ausgabeprofile: Seitenkompression, Zielauflösung der Rasterbilder, JPEG-Qualität
+# (gilt für alle JPEGs, die der Export selbst erzeugt, auch die Rückseite)
+OUTPUT_PROFILES = {
+    "screen": {"page_compression": 1, "print_dpi": 150, "jpeg_quality": 75},
+    "print": {"page_compression": 1, "print_dpi": 300, "jpeg_quality": 90},
+    # Originalbilder; Seiteninhalte unkomprimiert, also ohne Werkzeuge lesbar
+    "archive": {"page_compression": 0, "print_dpi": None, "jpeg_quality": 95},
+}
+
+def output_settings(output_profile=None, print_dpi=300):
+    """Einstellungen eines Ausgabeprofils; ohne Profil zählt print_dpi."""
+    if output_profile is None:
+        return {"page_compression": None, "print_dpi": print_dpi, "jpeg_quality": 90}
+    if output_profile not in OUTPUT_PROFILES:
+        raise ValueError(f"Unbekanntes Ausgabeprofil: {output_profile} (erlaubt: {', '.join(OUTPUT_PROFILES)})")
+    return dict(OUTPUT_PROFILES[output_profile])
+
+def load_backside_image(path, raster=None, jpeg_quality=90):
+    """Dekodiert und skaliert das Rückseitenbild einmal; bleibt als ImageReader im Speicher.
+
+    Mit raster (RasterCache) wird das skalierte Bild auf der Platte gecacht
+    (mit dessen JPEG-Qualität), sonst mit jpeg_quality neu kodiert.
+    """
     w = mm_to_points(CARD_WIDTH_MM)
     h = mm_to_points(CARD_HEIGHT_MM)
     try:
-        img = Image.open(path)
-        img = img.resize((int(w), int(h)))
-        temp_path = "_temp_backside.jpg"
-        img.save(temp_path)
-        c.drawImage(temp_path, x, y, width=w, height=h)
-        os.remove(temp_path)
+        if raster is not None:
+            # wie bisher ein Pixel pro Punkt; die Rückseite liegt nur einmal im PDF
+            return ImageReader(raster.prepare(path, w, h, dpi=72, opaque=True))
+        with Image.open(path) as img:
+            img = img.convert("RGB").resize((int(w), int(h)))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=jpeg_quality)
+        buffer.seek(0)
+        return ImageReader(buffer)
     except Exception as e:
         print("Fehler beim Laden der Rückseite:", e)
+        return None
 
-def export_spellcards_pdf(spells, design_config, output_dir="output", backside_option="none", backside_path=None, base_name="MyCollection"):
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, f"DNDZauber_{base_name}.pdf")
-
-    c = canvas.Canvas(output_path, pagesize=A4)
-    page_width, page_height = A4
-
+def render_backside_image(c, x, y, image):
+    """Zeichnet eine Rückseite; image ist ein ImageReader aus load_backside_image."""
+    w = mm_to_points(CARD_WIDTH_MM)
+    h = mm_to_points(CARD_HEIGHT_MM)
+    c.drawImage(image, x, y, width=w, height=h)
+
+def define_backside_sheet(c, image, name=BACKSIDE_FORM_NAME):
+    """Legt einen kompletten Rückseiten-Bogen einmal als Form an (für doForm)."""
+    page_height = c._pagesize[1]
+    c.beginForm(name)
+    for idx in range(CARDS_PER_ROW * CARDS_PER_COL):
+        col = idx % CARDS_PER_ROW
+        row = idx // CARDS_PER_ROW
+
+        x = mm_to_points(MARGIN_MM + col * (CARD_WIDTH_MM + SPACING_MM))
+        y = page_height - mm_to_points(MARGIN_MM + (row + 1) * CARD_HEIGHT_MM + row * SPACING_MM)
+
+        render_backside_image(c, x, y, image)
+        #draw_cut_marks(c, x, y, mm_to_points(CARD_WIDTH_MM), mm_to_points(CARD_HEIGHT_MM))
+    c.endForm()
+    return name
+
+def resolve_backside_path(backside_option, backside_path):
+    if backside_option == "custom" and backside_path:
+        return backside_path
+    if backside_option == "preset":
+        return "src/img/backdrop_1.png"
+    return None
+
+def front_card_position(idx, page_height):
+    """Position (x, y) des idx-ten Kartenplatzes einer Vorderseiten-Seite."""
+    col = idx % CARDS_PER_ROW
+    row = idx // CARDS_PER_ROW
+
+    #x = mm_to_points(MARGIN_MM + col * (CARD_WIDTH_MM + SPACING_MM))
+    # Gesamtbreite des Kartenrasters berechnen
+    total_width = CARDS_PER_ROW * CARD_WIDTH_MM + (CARDS_PER_ROW - 1) * SPACING_MM
+    offset_x = (A4[0] - mm_to_points(total_width)) / 2  # zentrieren
+
+    x = offset_x + mm_to_points(col * (CARD_WIDTH_MM + SPACING_MM))
+
+    y = page_height - mm_to_points(MARGIN_MM + (row + 1) * CARD_HEIGHT_MM + row * SPACING_MM)
+    return x, y
+
+def iter_pages(spells):
+    """Bündelt ein beliebiges Iterable (auch Generator) seitenweise, ohne len() zu brauchen."""
     cards_per_page = CARDS_PER_ROW * CARDS_PER_COL
-    total_pages = (len(spells) + cards_per_page - 1) // cards_per_page
-
-    print(f"Exportiere {len(spells)} Karten auf {total_pages} Seite(n)...")
-
-    for page_idx in range(total_pages):
-        for idx in range(cards_per_page):
-            global_idx = page_idx * cards_per_page + idx
-            if global_idx >= len(spells):
-                break
-            spell = spells[global_idx]
-
-            col = idx % CARDS_PER_ROW
-            row = idx // CARDS_PER_ROW
-
-            #x = mm_to_points(MARGIN_MM + col * (CARD_WIDTH_MM + SPACING_MM))
-            # Gesamtbreite des Kartenrasters berechnen
-            total_width = CARDS_PER_ROW * CARD_WIDTH_MM + (CARDS_PER_ROW - 1) * SPACING_MM
-            offset_x = (A4[0] - mm_to_points(total_width)) / 2  # zentrieren
-
-            x = offset_x + mm_to_points(col * (CARD_WIDTH_MM + SPACING_MM))
-
-            y = page_height - mm_to_points(MARGIN_MM + (row + 1) * CARD_HEIGHT_MM + row * SPACING_MM)
-
-            #render_dummy_card(c, x, y, spell) # dummy
-            render_card_pdf(c, x, y, spell, design_config)
-            #draw_cut_marks(c, x, y, mm_to_points(CARD_WIDTH_MM), mm_to_points(CARD_HEIGHT_MM))
-
+    it = iter(spells)
+    while True:
+        page = list(itertools.islice(it, cards_per_page))
+        if not page:
+            return
+        yield page
+
+def split_pages(spells):
+    """Teilt die Zauber in Seiten zu je CARDS_PER_ROW * CARDS_PER_COL Karten."""
+    return list(iter_pages(spells))
+
+def render_card_cached(c, x, y, spell, design, ctx):
+    """Wie render_card_pdf, nutzt aber ein gespeichertes Fragment, wenn sich nichts geändert hat."""
+    fragments = ctx.fragments
+    key = fragments.key(spell, design.config, [design.font_name, design.raster_dpi])
+    fragment = fragments.load(key)
+    if fragment is not None:
+        def ensure_icon(c, name, path, scale):
+            drawing = ctx.svg_assets.scaled(path, scale)
+            return drawing is not None and ctx.icon_forms.ensure(c, name, drawing)
+
+        def ensure_chrome(c, color):
+            return ctx.chrome_forms.ensure(c, design, HexColor(color))
+
+        card_name = spell.get("name", "Unbenannt")
+        ctx.profiler.start_card(card_name)
+        replayed = fragments.replay(c, fragment, x, y, ensure_icon, ensure_chrome if ctx.chrome_forms else None, image_dedupe.resolve)
+        ctx.profiler.lap("fragment_replay")
+        ctx.profiler.end_card()
+        if replayed:
+            # Hinweise der Karte wie beim ersten Rendern melden
+            for kind, asset in fragment.get("diagnostics", []):
+                ctx.diagnostics.report(kind, asset, card_name)
+            return
+
+    with ctx.diagnostics.collect() as events:
+        fragment = fragments.capture(
+            c, x, y,
+            lambda: render_card_pdf(c, 0, 0, spell, design, ctx=ctx)
+        )
+    fragment["diagnostics"] = events
+    fragments.store(key, fragment)
+
+def render_front_page(c, page_spells, design, ctx):
+    page_height = c._pagesize[1]
+    design = ensure_compiled(design, FONT_NAME)
+    for idx, spell in enumerate(page_spells):
+        x, y = front_card_position(idx, page_height)
+        #render_dummy_card(c, x, y, spell) # dummy
+        if ctx.fragments is not None and not design.subset_fonts:
+            render_card_cached(c, x, y, spell, design, ctx)
+        else:
+            render_card_pdf(c, x, y, spell, design, ctx=ctx)
+        #draw_cut_marks(c, x, y, mm_to_points(CARD_WIDTH_MM), mm_to_points(CARD_HEIGHT_MM))
+    c.showPage()
+
+def load_backside_for_option(backside_option, backside_path, raster=None, jpeg_quality=90):
+    path = resolve_backside_path(backside_option, backside_path)
+    return load_backside_image(path, raster, jpeg_quality) if path else None
+
+def render_backside_pages(c, page_count, image):
+    """Rendert page_count Rückseiten; der Bogen wird einmal pro PDF als Form angelegt.
+
+    image: ImageReader aus load_backside_image; None ergibt leere Seiten.
+    """
+    sheet = None
+    if image is not None:
+        sheet = define_backside_sheet(c, image)
+    for page_idx in range(page_count):
+        if sheet:
+            c.doForm(sheet)
         c.showPage()
 
-    # Rückseiten rendern, falls gewünscht
-    if backside_option != "none":
-        for page_idx in range(total_pages):
-            for idx in range(cards_per_page):
-                col = idx % CARDS_PER_ROW
-                row = idx // CARDS_PER_ROW
-
-                x = mm_to_points(MARGIN_MM + col * (CARD_WIDTH_MM + SPACING_MM))
-                y = page_height - mm_to_points(MARGIN_MM + (row + 1) * CARD_HEIGHT_MM + row * SPACING_MM)
+def _render_front_shard(job):
+    """Worker für den parallelen Export: rendert einen Seitenbereich in ein PDF (bytes)."""
+    pages, design_config, options = job
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=options["output"]["page_compression"])
+    fragment_dir = options.get("fragment_dir")
+    layout_cache_path = options.get("layout_cache_path")
+    settings = options["output"]
+    raster = RasterCache(options["raster_dir"], settings["print_dpi"], settings["jpeg_quality"]) if settings["print_dpi"] else None
+    svg_entries = options.get("svg_cache_entries")
+    ctx = RenderContext(
+        svg_assets=(SvgAssetCache(svg_entries) if svg_entries else svg_cache).session(),
+        icon_forms=IconForms(),
+        chrome_forms=ChromeForms(),
+        layouts=persistent_layout_cache(layout_cache_path) if layout_cache_path else layout_cache,
+        fragments=CardFragmentCache(fragment_dir, options.get("versions")) if fragment_dir else None,
+        profiler=RenderProfiler() if options.get("profile") else None,
+        diagnostics=ExportDiagnostics(options.get("verbose", False)),
+        raster=raster,
+    )
+    design = CompiledDesign(design_config, FONT_NAME, raster_cache=raster)
+    for page_spells in pages:
+        render_front_page(c, page_spells, design, ctx)
+    with ctx.profiler.stage("save"):
+        c.save()
+    stats = ctx.stats()
+    stats["image_dedupe"] = image_dedupe.stats(c)
+    raw = {"profile": ctx.profiler.raw(), "diagnostics": ctx.diagnostics.raw()}
+    if layout_cache_path:
+        # speichern kann nur der Hauptprozess (eine Datei für alle Worker)
+        raw["layouts"] = ctx.layouts.cache.take_new_entries()
+    return buffer.getvalue(), stats, raw
+
+def _split_shards(pages, shard_count):
+    """Teilt die Seiten in shard_count zusammenhängende, etwa gleich große Blöcke."""
+    shard_count = max(1, min(shard_count, len(pages)))
+    size, rest = divmod(len(pages), shard_count)
+    shards, start = [], 0
+    for i in range(shard_count):
+        end = start + size + (1 if i < rest else 0)
+        shards.append(pages[start:end])
+        start = end
+    return shards
+
+def volume_output_path(output_dir, base_name, part=None):
+    suffix = f"_part{part}" if part else ""
+    return os.path.join(output_dir, f"DNDZauber_{base_name}{suffix}.pdf")
+
+def partial_output_path(path):
+    """Temporärer Pfad neben path; erst der fertige Export wird umbenannt.
+
+    Mit Thread-Kennung, weil die Export-Warteschlange mehrere Exporte im
+    selben Prozess laufen lässt.
+    """
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+
+def publish_outputs(paths):
+    """Benennt die fertigen .part-Dateien in ihre Zielnamen um."""
+    for path in paths:
+        os.replace(partial_output_path(path), path)
+        print(f"PDF erfolgreich gespeichert unter: {path}")
+
+def discard_outputs(paths):
+    """Löscht die .part-Dateien eines abgebrochenen Exports."""
+    for path in paths:
+        try:
+            os.remove(partial_output_path(path))
+        except OSError:
+            pass
 
-                if backside_option == "custom" and backside_path:
-                    render_backside_image(c, x, y, backside_path)
-                elif backside_option == "preset":
-                    render_backside_image(c, x, y, f"src/img/backdrop_1.png")
+def export_spellcards_pdf(spells, design_config, output_dir="output", backside_option="none", backside_path=None, base_name="MyCollection", asset_cache=None, workers=1, pages_per_volume=None, incremental=False, layout_cache_path=None, profile=False, profile_path=None, verbose=False, print_dpi=300, output_profile=None, progress=None, cancel=None):
+    """Exportiert die Karten als PDF und gibt einen kleinen Report (dict) zurück.
+
+    spells: Liste oder beliebiges Iterable/Generator; gerendert wird Seite für Seite.
+    asset_cache: SvgAssetCache für die Icons; Standard ist der prozessweite
+    Cache, ein eigenes SvgAssetCache() begrenzt ihn auf diesen Export. Bei
+    workers > 1 bekommt jeder Block einen eigenen Cache gleicher Größe.
+    workers: > 1 rendert die Vorderseiten in einem Prozess-Pool (braucht pypdf
+    zum Zusammenfügen); die Seitenreihenfolge ist dieselbe wie seriell.
+    Zusammen mit pages_per_volume wird seriell exportiert (mit Meldung): das
+    Zusammenfügen hält das ganze PDF im Speicher, was Bände gerade vermeiden.
+    pages_per_volume: beginnt alle N Vorderseiten eine neue Datei
+    (DNDZauber_<name>_partK.pdf). ReportLab hält eine Datei bis zum Speichern
+    im Speicher, mit Bänden bleibt der Speicherbedarf also konstant.
+    incremental: gerenderte Karten in output_dir/.card_cache ablegen und bei
+    unverändertem Zauber, Design und Assets wiederverwenden. Designs mit
+    TTF-Schriften (font_registry) werden immer neu gerendert, weil die
+    Textcodes einer Teilmenge nur in ihrem PDF gelten.
+    layout_cache_path: JSON-Datei, in der die Textumbrüche zwischen Exporten
+    gespeichert werden (ohne Angabe nur prozessweit im Speicher); bei workers > 1
+    sammelt der Hauptprozess die neuen Umbrüche der Worker und speichert sie.
+    profile: Zeit pro Render-Stufe und Karte messen; der Report bekommt dann
+    einen Eintrag "profile" (Stufen, Perzentile, langsamste Karten), mit
+    profile_path wird er zusätzlich als JSON geschrieben.
+    verbose: jeden Hinweis (fehlende Icons usw.) sofort ausgeben; sonst
+    werden sie gezählt und am Ende einmal zusammengefasst ("diagnostics").
+    print_dpi: Hintergrund und Schul-Icons einmal auf diese Auflösung für
+    ihre Box herunterrechnen (Cache in output_dir/.raster_cache); None bettet
+    die Originale ein.
+    output_profile: "screen", "print" oder "archive" (siehe OUTPUT_PROFILES);
+    setzt Seitenkompression, Auflösung und JPEG-Qualität und ersetzt print_dpi.
+    Gleiche Bilder werden in jedem Fall nur einmal pro PDF eingebettet; der
+    Report nennt Dateigröße ("file_size") und die Ersparnis ("image_dedupe").
+    progress: Callback, der nach jeder Seite (parallel: nach jedem Block) und
+    bei jedem Phasenwechsel ein dict bekommt (siehe ExportProgress: Phase,
+    Karten/Seiten fertig, Karten pro Sekunde, geschätzte Restzeit).
+    cancel: CancelToken; nach cancel() bricht der Export nach der laufenden
+    Seite mit ExportCancelled ab. Die PDFs entstehen als .part-Dateien und
+    werden erst am Ende umbenannt, ein Abbruch hinterlässt also keine
+    halbfertige Datei in output_dir.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    fragment_dir = os.path.join(output_dir, FRAGMENT_CACHE_DIR) if incremental else None
+    versions = asset_versions(design_config) if incremental else None
+    profiler = RenderProfiler() if profile or profile_path else None
+    settings = output_settings(output_profile, print_dpi)
+    raster_dir = os.path.join(output_dir, RASTER_CACHE_DIR)
+    raster = RasterCache(raster_dir, settings["print_dpi"], settings["jpeg_quality"]) if settings["print_dpi"] else None
 
-                #draw_cut_marks(c, x, y, mm_to_points(CARD_WIDTH_MM), mm_to_points(CARD_HEIGHT_MM))
+    cards_per_page = CARDS_PER_ROW * CARDS_PER_COL
+    tracker = ExportProgress(progress, cancel_token=cancel)
+    tracker.check()
+
+    if workers and workers > 1 and pages_per_volume:
+        print(f"Bände (pages_per_volume={pages_per_volume}) werden seriell exportiert, workers={workers} wird ignoriert.")
+    if workers and workers > 1 and not pages_per_volume:
+        pages = split_pages(spells)
+        tracker.cards_total = sum(len(p) for p in pages)
+        tracker.pages_total = len(pages)
+        print(f"Exportiere {sum(len(p) for p in pages)} Karten auf {len(pages)} Seite(n)...")
+        if len(pages) > 1:
+            try:
+                shard_options = {
+                    "fragment_dir": fragment_dir,
+                    "versions": versions,
+                    "layout_cache_path": layout_cache_path,
+                    "profile": profiler is not None,
+                    "verbose": verbose,
+                    "raster_dir": raster_dir,
+                    "output": settings,
+                    # Caches lassen sich nicht zwischen Prozessen teilen, nur ihre Größe
+                    "svg_cache_entries": asset_cache.max_entries if asset_cache else None,
+                }
+                report = _export_parallel(pages, design_config, volume_output_path(output_dir, base_name), backside_option, backside_path, workers, shard_options, profiler, raster, tracker)
+                report["cards"] = sum(len(p) for p in pages)
+                report["output_profile"] = output_profile
+                if profiler:
+                    report["profile"] = finish_profile(profiler, profile_path)
+                return report
+            except ImportError:
+                print("pypdf nicht installiert - paralleler Export nicht möglich, exportiere seriell.")
+        spells = itertools.chain.from_iterable(pages)
+    elif hasattr(spells, "__len__"):
+        tracker.cards_total = len(spells)
+        tracker.pages_total = (len(spells) + cards_per_page - 1) // cards_per_page
+        print(f"Exportiere {len(spells)} Karten auf {(len(spells) + cards_per_page - 1) // cards_per_page} Seite(n)...")
+    else:
+        print("Exportiere Karten (Streaming)...")
+
+    design = CompiledDesign(design_config, FONT_NAME, raster_cache=raster)
+    ctx = RenderContext(
+        svg_assets=(asset_cache or svg_cache).session(),
+        icon_forms=IconForms(),
+        chrome_forms=ChromeForms(),
+        layouts=persistent_layout_cache(layout_cache_path) if layout_cache_path else layout_cache,
+        fragments=CardFragmentCache(fragment_dir, versions) if incremental else None,
+        profiler=profiler,
+        diagnostics=ExportDiagnostics(verbose),
+        raster=raster,
+    )
+    backside_image = None
+    if backside_option != "none":
+        backside_image = load_backside_for_option(backside_option, backside_path, raster, settings["jpeg_quality"])
+
+    output_paths = []
+    c = None
+    cards = total_pages = volume_pages = 0
+    dedupe = {"duplicates": 0, "saved_bytes": 0}
+
+    def finish_volume():
+        # Rückseiten rendern, falls gewünscht
+        if backside_option != "none":
+            tracker.set_phase("backsides")
+            with ctx.profiler.stage("backside"):
+                render_backside_pages(c, volume_pages, backside_image)
+        tracker.set_phase("save")
+        with ctx.profiler.stage("save"):
+            c.save()
+        for key, value in image_dedupe.stats(c).items():
+            dedupe[key] += value
+
+    def new_canvas(path):
+        return canvas.Canvas(partial_output_path(path), pagesize=A4, pageCompression=settings["page_compression"])
 
-            c.showPage()
+    try:
+        for page_spells in iter_pages(spells):
+            if c is None:
+                part = len(output_paths) + 1 if pages_per_volume else None
+                output_paths.append(volume_output_path(output_dir, base_name, part))
+                c = new_canvas(output_paths[-1])
+                tracker.set_phase("fronts")
+
+            render_front_page(c, page_spells, design, ctx)
+            cards += len(page_spells)
+            total_pages += 1
+            volume_pages += 1
+            tracker.advance(len(page_spells), 1)
+
+            if pages_per_volume and volume_pages >= pages_per_volume:
+                finish_volume()
+                c = None
+                volume_pages = 0
+
+        if not output_paths:
+            # leere Sammlung: wie bisher ein (leeres) PDF schreiben
+            output_paths.append(volume_output_path(output_dir, base_name))
+            c = new_canvas(output_paths[-1])
+        if c is not None:
+            finish_volume()
+        tracker.check()
+    except BaseException:
+        # auch bei Abbruch oder Fehler keine halbfertigen Dateien liegen lassen
+        discard_outputs(output_paths)
+        raise
+    publish_outputs(output_paths)
+    tracker.finish()
+
+    print(f"{cards} Karten auf {total_pages} Seite(n) in {len(output_paths)} Datei(en)")
+    if layout_cache_path:
+        ctx.layouts.cache.save()
+    if ctx.fragments is not None:
+        ctx.fragments.prune()
+    stats = ctx.stats()
+    stats["image_dedupe"] = dedupe
+    stats["file_size"] = sum(os.path.getsize(path) for path in output_paths)
+    print_stats(stats)
+
+    report = {
+        "output_path": output_paths[0],
+        "output_paths": output_paths,
+        "cards": cards,
+        "pages": total_pages,
+        "output_profile": output_profile,
+        **stats,
+        "diagnostics": ctx.diagnostics.print_summary(),
+    }
+    if profiler:
+        report["profile"] = finish_profile(profiler, profile_path)
+    return report
+
+
+def finish_profile(profiler, profile_path=None):
+    """Report des Profilers ausgeben, ggf. als JSON schreiben und zurückgeben."""
+    report = profiler.report()
+    cards = report["cards"]
+    if cards["count"]:
+        print(f"Profil: {cards['count']} Karten, p50 {cards['p50_ms']:.2f} ms, p90 {cards['p90_ms']:.2f} ms, max {cards['max_ms']:.2f} ms")
+    top = sorted(report["stages"].items(), key=lambda item: item[1]["total_ms"], reverse=True)[:3]
+    if top:
+        print("Teuerste Stufen: " + ", ".join(f"{name} {info['total_ms']:.0f} ms" for name, info in top))
+    if profile_path:
+        profiler.write(profile_path)
+        print(f"Profil gespeichert unter: {profile_path}")
+    return report
+
+
+def print_stats(stats):
+    """Gibt die Cache-Zähler eines Exports aus."""
+    svg = stats["svg_cache"]
+    print(f"SVG-Cache: {svg['hits']} Treffer, {svg['misses']} Fehlversuche, {stats['icon_forms']} Icon-Formen")
+    layouts = stats["layout_cache"]
+    print(f"Layout-Cache: {layouts['hits']} Treffer, {layouts['misses']} Umbrüche berechnet")
+    display = stats["display_lists"]
+    print(f"Display-Listen: {display['hits']} wiederverwendet, {display['misses']} Karten neu gesetzt")
+    fields = stats["text_fields"]
+    total = fields["fast"] + fields["paragraph"]
+    if total:
+        print(f"Textfelder: {fields['fast']} von {total} einzeilig gezeichnet ({100 * fields['fast'] / total:.0f}%)")
+    if stats["autofit"]["shrunk"] or stats["autofit"]["overflow"]:
+        autofit = stats["autofit"]
+        print(f"Auto-Fit: {autofit['shrunk']} Beschreibungen verkleinert, {autofit['overflow']} passen nicht")
+    if stats["raster_cache"]:
+        raster = stats["raster_cache"]
+        print(f"Bild-Cache: {raster['resampled']} neu skaliert, {raster['reused']} wiederverwendet, {raster['unchanged']} schon klein genug")
+    if stats["fragments"]:
+        fragments = stats["fragments"]
+        evicted = f", {fragments['evicted']} alte verdrängt" if fragments.get("evicted") else ""
+        print(f"Karten-Cache: {fragments['reused']} wiederverwendet, {fragments['rendered']} neu gerendert{evicted}")
+    if "file_size" in stats:
+        dedupe = stats["image_dedupe"]
+        print(f"Dateigröße: {stats['file_size'] / 1024:.0f} KB, doppelte Bilder: {dedupe['duplicates']} ({dedupe['saved_bytes'] / 1024:.0f} KB gespart)")
+
+def _export_parallel(pages, design_config, output_path, backside_option, backside_path, workers, shard_options, profiler=None, raster=None, tracker=None):
+    """Rendert Seitenblöcke in einem Prozess-Pool und fügt sie der Reihe nach zusammen.
+
+    shard_options: fragment_dir, versions, layout_cache_path, profile, svg_cache_entries usw. (für die Worker).
+    tracker: ExportProgress; Fortschritt wird pro fertigem Block gemeldet.
+    Ein Abbruch kehrt sofort zurück: wartende Blöcke starten nicht mehr,
+    laufende rechnen im Hintergrund zu Ende und werden verworfen.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    # etwas mehr Blöcke als Worker, damit ungleich teure Seiten sich ausgleichen
+    shards = _split_shards(pages, workers * 2)
+    print(f"Paralleler Export: {len(shards)} Blöcke auf {workers} Prozesse")
+
+    profiler = profiler or NULL_PROFILER
+    tracker = tracker or ExportProgress()
+    parts = [None] * len(shards)
+    # ohne "with": dessen __exit__ würde beim Abbruch auf die laufenden Blöcke warten
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(_render_front_shard, (shard, design_config, shard_options)): i for i, shard in enumerate(shards)}
+        pending = set(futures)
+        while pending:
+            # kurzes Timeout, damit ein Abbruch nicht auf den nächsten Block wartet
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures[future]
+                parts[i] = future.result()
+                tracker.advance(sum(len(p) for p in shards[i]), len(shards[i]))
+            tracker.check()
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    tracker.set_phase("merge")
+    writer = PdfWriter()
+    with profiler.stage("merge"):
+        for data, _, _ in parts:
+            writer.append(PdfReader(io.BytesIO(data)))
+    stats = merge_stats(part_stats for _, part_stats, _ in parts)
+    diagnostics = ExportDiagnostics()
+    for _, _, raw in parts:
+        diagnostics.merge(raw["diagnostics"])
+        if profiler.enabled:
+            profiler.merge(raw["profile"])
+    layout_cache_path = shard_options.get("layout_cache_path")
+    if layout_cache_path:
+        layouts = persistent_layout_cache(layout_cache_path)
+        for _, _, raw in parts:
+            layouts.merge_entries(raw["layouts"])
+        layouts.save()
+    fragment_dir = shard_options.get("fragment_dir")
+    if fragment_dir:
+        # erst nach allen Blöcken, sonst verdrängt ein Worker, was ein anderer gleich braucht
+        stats = merge_stats([stats, {"fragments": {"evicted": CardFragmentCache(fragment_dir).prune()}}])
 
-    c.save()
-    print(f"PDF erfolgreich gespeichert unter: {output_path}")
+    if backside_option != "none":
+        tracker.set_phase("backsides")
+        with profiler.stage("backside"):
+            buffer = io.BytesIO()
+            c = canvas.Canvas(buffer, pagesize=A4, pageCompression=shard_options["output"]["page_compression"])
+            render_backside_pages(c, len(pages), load_backside_for_option(backside_option, backside_path, raster, shard_options["output"]["jpeg_quality"]))
+            c.save()
+            writer.append(PdfReader(buffer))
+    if raster:
+        # Rückseite wurde hier im Hauptprozess aufbereitet
+        stats = merge_stats([stats, {"raster_cache": raster.stats()}])
+
+    with profiler.stage("dedupe"):
+        stats = merge_stats([stats, {"image_dedupe": _dedupe_merged(writer)}])
+
+    tracker.set_phase("save")
+    try:
+        with profiler.stage("save"):
+            with open(partial_output_path(output_path), "wb") as f:
+                writer.write(f)
+        tracker.check()
+    except BaseException:
+        discard_outputs([output_path])
+        raise
+    stats["file_size"] = os.path.getsize(partial_output_path(output_path))
+    publish_outputs([output_path])
+    tracker.finish()
+    print_stats(stats)
+
+    return {
+        "output_path": output_path,
+        "output_paths": [output_path],
+        "pages": len(pages),
+        **stats,
+        "diagnostics": diagnostics.print_summary(),
+        "workers": workers,
+        "shards": len(shards),
+    }
 
-def extract_damage_dice_from_description(desc):
-    matches = re.findall(r"\b(\d+d\d+\s+\w+)\b", desc.lower())
-    return matches if matches else []
+def _dedupe_merged(writer):
+    """Fasst gleiche Objekte der Blöcke zusammen (Bilder, Icon- und Rahmen-Formen).
+
+    Jeder Block ist ein eigenes PDF und bettet seine Bilder selbst ein; gezählt
+    werden die Bild-Streams, die dadurch nur einmal im Ergebnis landen.
+    Formen verweisen auf das Font-Verzeichnis ihres Blocks, sind also erst
+    gleich, wenn diese Verzeichnisse zusammengefasst sind; deshalb wird
+    wiederholt, bis sich nichts mehr ändert.
+    """
+    from pypdf.generic import StreamObject
+
+    # writer._objects und obj._data sind pypdf-intern, deshalb ist pypdf in requirements.txt auf 6.x festgelegt
+    seen = set()
+    duplicates = saved = 0
+    for obj in writer._objects:
+        if isinstance(obj, StreamObject) and obj.get("/Subtype") == "/Image":
+            digest = obj.hash_bin()
+            if digest in seen:
+                duplicates += 1
+                saved += len(obj._data)
+            else:
+                seen.add(digest)
+    # erst gleiche Fonts zusammenfassen, damit die Verzeichnisse vergleichbar sind
+    writer.compress_identical_objects()
+    _unify_font_resources(writer)
+    while True:
+        count = sum(obj is not None for obj in writer._objects)
+        writer.compress_identical_objects()
+        if sum(obj is not None for obj in writer._objects) == count:
+            break
+    return {"duplicates": duplicates, "saved_bytes": saved}
+
+def _unify_font_resources(writer):
+    """Gibt allen Font-Verzeichnissen (/Resources /Font) der Blöcke denselben Inhalt.
+
+    ReportLab schreibt pro PDF ein Verzeichnis mit allen Fonts des Dokuments;
+    ein Block, der eine Schrift mehr benutzt, hat also ein anderes. Solange
+    kein Name (/F1, ...) in zwei Blöcken auf verschiedene Fonts zeigt, wird
+    jedes Verzeichnis auf die Vereinigung gesetzt, wie beim seriellen Export.
+    """
+    from pypdf.generic import DictionaryObject, NameObject
+
+    directories = []
+    for obj in writer._objects:
+        if isinstance(obj, DictionaryObject):
+            resources = obj.get("/Resources")
+            fonts = resources.get_object().get("/Font") if resources is not None else None
+            if fonts is not None:
+                directories.append(fonts.get_object())
+    union = {}
+    for fonts in directories:
+        for name, ref in fonts.items():
+            if union.setdefault(name, ref) != ref:
+                return
+    for fonts in directories:
+        for name, ref in union.items():
+            fonts[NameObject(name)] = ref
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+
+# eigene Schriften der Designs ("font": "MeineSchrift.ttf" sucht zuerst hier)
+FONT_DIR = "src/fonts"
+FONT_EXTENSIONS = (".ttf", ".otf")
+
+
+class GlyphAdvances(dict):
+    """Zeichen -> Vorschub in 1/1000 Geviert; unbekannte Zeichen bekommen die Standardbreite."""
+
+    def __init__(self, char_widths, default_width):
+        super().__init__((chr(code), width) for code, width in char_widths.items())
+        self.default_width = default_width
+
+    def __missing__(self, ch):
+        return self.default_width
+
+
+class MeasuredTTFont(TTFont):
+    """TTFont mit vorberechneter Breitentabelle.
+
+    stringWidth (auch beim Paragraph-Umbruch) ist damit eine Summe über
+    Tabellenzugriffe. splitString nimmt für Text, dessen Zeichen im PDF
+    schon einen Code im ersten Subset haben, den direkten Weg statt
+    ReportLabs Schleife pro Zeichen. Eingebettet wird wie bei TTFont nur
+    die benutzte Teilmenge der Glyphen.
+    """
+
+    def __init__(self, name, filename):
+        super().__init__(name, filename)
+        self.advances = GlyphAdvances(self.face.charWidths, self.face.defaultWidth)
+
+    def stringWidth(self, text, size, encoding="utf8"):
+        if not isinstance(text, str):
+            text = text.decode(encoding or "utf8")
+        return sum(map(self.advances.__getitem__, text)) * 0.001 * size
+
+    def splitString(self, text, doc, encoding="utf-8"):
+        state = self.state.get(doc)
+        if state is not None and isinstance(text, str):
+            try:
+                # KeyError: neues Zeichen, ValueError: Code außerhalb von Subset 0
+                return [(0, bytes(map(state.assignments.__getitem__, map(ord, text))))]
+            except (KeyError, ValueError):
+                pass
+        return super().splitString(text, doc, encoding)
+
+
+_lock = threading.Lock()
+_registered = {}  # Pfad -> Fontname
+_failed = set()
+
+
+def font_file(spec):
+    """Pfad zu einer Schriftdatei: wie angegeben, sonst in FONT_DIR (None = ReportLabs Suchpfad)."""
+    if os.path.exists(spec):
+        return spec
+    candidate = os.path.join(FONT_DIR, spec)
+    if os.path.exists(candidate):
+        return candidate
+    return None
+
+
+def register_font(path):
+    """Registriert eine TTF einmal pro Prozess und gibt ihren Fontnamen zurück.
+
+    Der Name ist der Dateiname ohne Endung; gibt es ihn schon für eine
+    andere Datei, kommt ein kurzer Hash dazu.
+    """
+    with _lock:
+        name = _registered.get(path)
+        if name is not None:
+            return name
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in pdfmetrics.getRegisteredFontNames() or name in _registered.values():
+            name += "_" + hashlib.md5(path.encode("utf-8")).hexdigest()[:6]
+        pdfmetrics.registerFont(MeasuredTTFont(name, path))
+        _registered[path] = name
+        return name
+
+
+def is_subset_font(font_name):
+    """True für eingebettete (TTF-)Schriften: deren Textcodes gelten nur im jeweiligen PDF."""
+    return isinstance(pdfmetrics.getFont(font_name), TTFont)
+
+
+def resolve_font(spec, default):
+    """Fontname für die Angabe "font" eines Designs (oder default).
+
+    spec: Name einer eingebauten/registrierten Schrift (z.B. "Helvetica-Bold")
+    oder Pfad zu einer .ttf/.otf. Fehlt die Datei oder lässt sie sich nicht
+    laden, wird (mit einer Meldung pro Datei) default benutzt.
+    """
+    if not spec:
+        return default
+    if not spec.lower().endswith(FONT_EXTENSIONS):
+        if spec in pdfmetrics.standardFonts or spec in pdfmetrics.getRegisteredFontNames():
+            return spec
+        if spec not in _failed:
+            _failed.add(spec)
+            print(f"Schrift unbekannt: {spec} - nutze {default}")
+        return default
+    path = font_file(spec) or spec
+    try:
+        return register_font(path)
+    except (TTFError, OSError) as e:
+        if spec not in _failed:
+            _failed.add(spec)
+            print(f"Schrift konnte nicht geladen werden: {spec} ({e}) - nutze {default}")
+        return default
@@ -0,0 +1,601 @@
+import math
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+from reportlab.lib.colors import Color, toColor
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase._fontdata import findT1File
+
+# so viele Segmente höchstens pro Bézierkurve
+MAX_CURVE_SEGMENTS = 48
+
+# Kappa für Kreise/Rundungen aus Bézierkurven (wie ReportLab)
+KAPPA = 0.5522847498
+
+
+class PillowCanvas:
+    """Der Teil der ReportLab-Canvas-API, den render_card_pdf benutzt, auf einem Pillow-Bild.
+
+    Koordinaten in Punkten, Ursprung links unten wie im PDF. Gezeichnet wird
+    in supersample-facher Auflösung und in image() herunterskaliert, damit
+    Kanten und Icons geglättet sind. Unterstützt: Zustand und Transformation,
+    Farben mit Alpha, Pfade (gefüllt/gestrichen), Rechtecke, Kreise, Linien,
+    Text (auch Paragraph-Zeilen) und drawImage. Form XObjects gibt es nicht,
+    Icons und Rahmen werden also direkt gezeichnet (RenderContext ohne Formen).
+    """
+
+    bottomup = 1
+
+    def __init__(self, width, height, dpi=300, supersample=2, background="#ffffff"):
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.supersample = supersample
+        self._scale = dpi / 72 * supersample
+        size = (max(1, round(width * self._scale)), max(1, round(height * self._scale)))
+        # background=None: durchsichtiges RGBA-Bild (z.B. Icons für die Designer-Vorschau)
+        if background is None:
+            self._image = Image.new("RGBA", size, (0, 0, 0, 0))
+        else:
+            self._image = Image.new("RGB", size, background)
+        self._draw = ImageDraw.Draw(self._image, "RGBA")
+        self._pagesize = (width, height)
+        self._fontname = "Times-Roman"
+        self._fontsize = 12
+        self._leading = 14.4
+        # (a, b, c, d, e, f) von Benutzer- auf Gerätekoordinaten (Pixel, y nach unten)
+        self._ctm = (self._scale, 0, 0, -self._scale, 0, size[1])
+        self._fill = (0, 0, 0, 255)
+        self._stroke = (0, 0, 0, 255)
+        self._line_width = 1
+        self._stack = []
+
+    # --- Zustand ---------------------------------------------------------
+
+    def saveState(self):
+        self._stack.append((self._ctm, self._fill, self._stroke, self._line_width,
+                            self._fontname, self._fontsize, self._leading))
+
+    def restoreState(self):
+        (self._ctm, self._fill, self._stroke, self._line_width,
+         self._fontname, self._fontsize, self._leading) = self._stack.pop()
+
+    def transform(self, a, b, c, d, e, f):
+        A, B, C, D, E, F = self._ctm
+        self._ctm = (
+            a * A + b * C, a * B + b * D,
+            c * A + d * C, c * B + d * D,
+            e * A + f * C + E, e * B + f * D + F,
+        )
+
+    def translate(self, dx, dy):
+        self.transform(1, 0, 0, 1, dx, dy)
+
+    def scale(self, x, y):
+        self.transform(x, 0, 0, y, 0, 0)
+
+    def _point(self, x, y):
+        a, b, c, d, e, f = self._ctm
+        return (a * x + c * y + e, b * x + d * y + f)
+
+    def _unit(self):
+        """Länge eines Punkts in Pixeln (mittlere Skalierung der Transformation)."""
+        a, b, c, d, _, _ = self._ctm
+        return math.sqrt(abs(a * d - b * c))
+
+    @staticmethod
+    def _rgba(value, alpha=None):
+        color = value if isinstance(value, Color) else toColor(value)
+        r, g, b = color.rgb()
+        if alpha is None:
+            alpha = getattr(color, "alpha", 1)
+        return (round(r * 255), round(g * 255), round(b * 255), round(alpha * 255))
+
+    def setFillColor(self, aColor, alpha=None):
+        self._fill = self._rgba(aColor, alpha)
+
+    def setStrokeColor(self, aColor, alpha=None):
+        self._stroke = self._rgba(aColor, alpha)
+
+    def setFillColorRGB(self, r, g, b, alpha=None):
+        self.setFillColor((r, g, b), alpha)
+
+    def setStrokeColorRGB(self, r, g, b, alpha=None):
+        self.setStrokeColor((r, g, b), alpha)
+
+    def setFillAlpha(self, alpha):
+        self._fill = self._fill[:3] + (round(alpha * 255),)
+
+    def setStrokeAlpha(self, alpha):
+        self._stroke = self._stroke[:3] + (round(alpha * 255),)
+
+    def setLineWidth(self, width):
+        self._line_width = width
+
+    def setLineCap(self, mode):
+        pass
+
+    def setLineJoin(self, mode):
+        pass
+
+    def setDash(self, array=[], phase=0):
+        pass
+
+    def setFillOverprint(self, value):
+        pass
+
+    def setStrokeOverprint(self, value):
+        pass
+
+    def setOverprintMask(self, value):
+        pass
+
+    def setFont(self, psfontname, size, leading=None):
+        self._fontname = psfontname
+        self._fontsize = size
+        self._leading = leading if leading is not None else size * 1.2
+
+    def stringWidth(self, text, fontName=None, fontSize=None):
+        return pdfmetrics.stringWidth(text, fontName or self._fontname, fontSize or self._fontsize)
+
+    def showPage(self):
+        pass
+
+    def hasForm(self, name):
+        return False
+
+    # --- Pfade -----------------------------------------------------------
+
+    def beginPath(self):
+        return PillowPath()
+
+    def drawPath(self, path, stroke=1, fill=0, fillMode=None):
+        flattened = path.subpaths(self._unit())
+        subpaths = [[self._point(x, y) for x, y in points] for points, _ in flattened]
+        closed = [is_closed for _, is_closed in flattened]
+        if fill:
+            self._fill_polygons(subpaths, even_odd=fillMode == 0)
+        if stroke:
+            self._stroke_lines(subpaths, closed)
+
+    def clipPath(self, path, stroke=1, fill=0, fillMode=None):
+        # Clipping wird nicht nachgebildet; die Icons zeichnen ohnehin nur in ihrer Box
+        self.drawPath(path, stroke, fill, fillMode)
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        path = self.beginPath()
+        path.rect(x, y, width, height)
+        self.drawPath(path, stroke, fill)
+
+    def roundRect(self, x, y, width, height, radius, stroke=1, fill=0):
+        path = self.beginPath()
+        path.roundRect(x, y, width, height, radius)
+        self.drawPath(path, stroke, fill)
+
+    def circle(self, x_cen, y_cen, r, stroke=1, fill=0):
+        self.ellipse(x_cen - r, y_cen - r, x_cen + r, y_cen + r, stroke, fill)
+
+    def ellipse(self, x1, y1, x2, y2, stroke=1, fill=0):
+        path = self.beginPath()
+        path.ellipse(min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1))
+        self.drawPath(path, stroke, fill)
+
+    def line(self, x1, y1, x2, y2):
+        path = self.beginPath()
+        path.moveTo(x1, y1)
+        path.lineTo(x2, y2)
+        self.drawPath(path, stroke=1, fill=0)
+
+    def _fill_polygons(self, subpaths, even_odd=False):
+        subpaths = [points for points in subpaths if len(points) >= 3]
+        if not subpaths or not self._fill[3]:
+            return
+        if len(subpaths) == 1:
+            box = axis_aligned_box(subpaths[0])
+            if box and self._fill[3] == 255:
+                # deckendes Rechteck (z.B. Kartenhintergrund): direkt füllen statt überblenden
+                self._image.paste(self._fill[:3], box)
+            else:
+                self._draw.polygon(subpaths[0], fill=self._fill)
+            return
+        # mehrere Teilpfade: Löcher über eine Maske in der Bounding Box
+        xs = [x for points in subpaths for x, _ in points]
+        ys = [y for points in subpaths for _, y in points]
+        x0, y0 = max(0, math.floor(min(xs))), max(0, math.floor(min(ys)))
+        x1 = min(self._image.width, math.ceil(max(xs)) + 1)
+        y1 = min(self._image.height, math.ceil(max(ys)) + 1)
+        if x1 <= x0 or y1 <= y0:
+            return
+        size = (x1 - x0, y1 - y0)
+        shifted = [[(x - x0, y - y0) for x, y in points] for points in subpaths]
+        mask = Image.new("1", size, 0)
+        if even_odd:
+            for points in shifted:
+                part = Image.new("1", size, 0)
+                ImageDraw.Draw(part).polygon(points, fill=1)
+                mask = ImageChops.logical_xor(mask, part)
+        else:
+            # Nonzero genähert: Teilpfade nach Fläche, Gegenrichtung zur größten stanzt aus
+            shifted.sort(key=lambda points: abs(signed_area(points)), reverse=True)
+            outer = signed_area(shifted[0]) >= 0
+            draw = ImageDraw.Draw(mask)
+            for points in shifted:
+                draw.polygon(points, fill=1 if (signed_area(points) >= 0) == outer else 0)
+        mask = mask.convert("L")
+        if self._fill[3] < 255:
+            mask = mask.point(lambda v: v * self._fill[3] // 255)
+        self._image.paste(Image.new("RGB", size, self._fill[:3]), (x0, y0), mask)
+
+    def _stroke_lines(self, subpaths, closed):
+        if not self._stroke[3]:
+            return
+        # Strichstärke 0 ist im PDF die dünnste darstellbare Linie
+        width = max(1, round(self._line_width * self._unit()))
+        for points, is_closed in zip(subpaths, closed):
+            if len(points) < 2:
+                continue
+            if is_closed:
+                points = points + [points[0], points[1]]
+            self._draw.line(points, fill=self._stroke, width=width, joint="curve" if width > 2 else None)
+
+    # --- Text ------------------------------------------------------------
+
+    def drawString(self, x, y, text, mode=None, **kwargs):
+        self._text_run(x, y, text, self._fontname, self._fontsize, 0, self._fill)
+
+    def drawRightString(self, x, y, text, **kwargs):
+        self.drawString(x - self.stringWidth(text), y, text)
+
+    def drawCentredString(self, x, y, text, **kwargs):
+        self.drawString(x - self.stringWidth(text) / 2, y, text)
+
+    def beginText(self, x=0, y=0, direction=None):
+        return PillowTextObject(self, x, y)
+
+    def drawText(self, textobject):
+        for x, y, text, fontname, fontsize, word_space, fill in textobject.runs:
+            self._text_run(x, y, text, fontname, fontsize, word_space, fill)
+
+    def _text_run(self, x, y, text, fontname, fontsize, word_space, fill):
+        if not text or not fill[3]:
+            return
+        pixel_size = fontsize * self._unit()
+        # Glyphen einzeln aus dem Cache, Vorschub nach den ReportLab-Metriken wie im PDF
+        for ch in text:
+            if ch != " ":
+                mask, left, top = glyph(fontname, pixel_size, ch)
+                if mask is not None:
+                    px, py = self._point(x, y)
+                    if fill[3] < 255:
+                        mask = mask.point(lambda v: v * fill[3] // 255)
+                    self._image.paste(fill[:3], (round(px) + left, round(py) + top), mask)
+            x += glyph_width(fontname, ch) * fontsize
+            if ch == " ":
+                # Wortabstand wie Tw im PDF: jedes Leerzeichen wird breiter
+                x += word_space
+
+    # --- Bilder ----------------------------------------------------------
+
+    def drawImage(self, image, x, y, width=None, height=None, mask=None,
+                  preserveAspectRatio=False, anchor="c", **kwargs):
+        key, source = open_image(image)
+        if width is None:
+            width = source.width
+        if height is None:
+            height = source.height
+        if preserveAspectRatio:
+            scale = min(width / source.width, height / source.height)
+            w, h = source.width * scale, source.height * scale
+            # wie ReportLab: Restfläche nach anchor verteilen (Standard mittig)
+            if "w" in anchor:
+                dx = 0
+            elif "e" in anchor:
+                dx = width - w
+            else:
+                dx = (width - w) / 2
+            if "s" in anchor:
+                dy = 0
+            elif "n" in anchor:
+                dy = height - h
+            else:
+                dy = (height - h) / 2
+            x, y, width, height = x + dx, y + dy, w, h
+        (px0, py0), (px1, py1) = self._point(x, y + height), self._point(x + width, y)
+        left, top = round(min(px0, px1)), round(min(py0, py1))
+        size = (max(1, round(abs(px1 - px0))), max(1, round(abs(py1 - py0))))
+        use_alpha = mask is not None and "A" in source.getbands()
+        scaled = scaled_image(key, source, size) if key else source.resize(size, Image.LANCZOS)
+        if use_alpha:
+            self._image.paste(scaled.convert("RGB"), (left, top), scaled.getchannel("A"))
+        else:
+            self._image.paste(scaled.convert("RGB"), (left, top))
+        return size
+
+    drawInlineImage = drawImage
+
+    # --- Ergebnis --------------------------------------------------------
+
+    def image(self):
+        """Fertiges Bild in der Zielauflösung."""
+        if self.supersample == 1:
+            return self._image
+        # ganzzahliger Faktor: Box-Filter über supersample x supersample Pixel
+        return self._image.reduce(self.supersample)
+
+
+class PillowTextObject:
+    """Textobjekt für draw_text_layout und Paragraph (Zeilen, Wortabstand)."""
+
+    def __init__(self, canvas, x=0, y=0):
+        self._canvas = canvas
+        self._fontname = canvas._fontname
+        self._fontsize = canvas._fontsize
+        self._leading = canvas._leading
+        self._fill = canvas._fill
+        self._word_space = 0
+        self.direction = None
+        self.preformatted = False
+        self.runs = []
+        self.setTextOrigin(x, y)
+
+    def setTextOrigin(self, x, y):
+        self._x0 = self._x = x
+        self._y0 = self._y = y
+
+    def moveCursor(self, dx, dy):
+        self._x0 += dx
+        self._y0 -= dy
+        self._x, self._y = self._x0, self._y0
+
+    def setXPos(self, dx):
+        self.moveCursor(dx, 0)
+
+    def getX(self):
+        return self._x
+
+    def getY(self):
+        return self._y
+
+    def setFont(self, psfontname, size, leading=None):
+        self._fontname = psfontname
+        self._fontsize = size
+        if leading is not None:
+            self._leading = leading
+
+    def _setFont(self, psfontname, size):
+        self.setFont(psfontname, size)
+
+    def setLeading(self, leading):
+        self._leading = leading
+
+    def setFillColor(self, aColor, alpha=None):
+        self._fill = PillowCanvas._rgba(aColor, alpha)
+
+    def setWordSpace(self, wordSpace):
+        self._word_space = wordSpace
+
+    def setCharSpace(self, charSpace):
+        pass
+
+    def _textOut(self, text, TStar=0):
+        self.runs.append((self._x, self._y, text, self._fontname, self._fontsize, self._word_space, self._fill))
+        if TStar:
+            self._y0 -= self._leading
+            self._x, self._y = self._x0, self._y0
+        else:
+            self._x += pdfmetrics.stringWidth(text, self._fontname, self._fontsize) + self._word_space * text.count(" ")
+
+    def textOut(self, text):
+        self._textOut(text)
+
+    def textLine(self, text=""):
+        self._textOut(text, 1)
+
+
+class PillowPath:
+    """Pfad aus Linien und kubischen Béziers; subpaths() liefert Polygone."""
+
+    def __init__(self):
+        self._ops = []
+
+    def moveTo(self, x, y):
+        self._ops.append(("m", x, y))
+
+    def lineTo(self, x, y):
+        self._ops.append(("l", x, y))
+
+    def curveTo(self, x1, y1, x2, y2, x3, y3):
+        self._ops.append(("c", x1, y1, x2, y2, x3, y3))
+
+    def close(self):
+        self._ops.append(("h",))
+
+    def rect(self, x, y, width, height):
+        self.moveTo(x, y)
+        self.lineTo(x + width, y)
+        self.lineTo(x + width, y + height)
+        self.lineTo(x, y + height)
+        self.close()
+
+    def roundRect(self, x, y, width, height, radius):
+        radius = min(abs(radius), abs(width) / 2, abs(height) / 2)
+        if radius <= 0:
+            self.rect(x, y, width, height)
+            return
+        t = radius * KAPPA
+        x1, y1 = x + width, y + height
+        self.moveTo(x + radius, y)
+        self.lineTo(x1 - radius, y)
+        self.curveTo(x1 - radius + t, y, x1, y + radius - t, x1, y + radius)
+        self.lineTo(x1, y1 - radius)
+        self.curveTo(x1, y1 - radius + t, x1 - radius + t, y1, x1 - radius, y1)
+        self.lineTo(x + radius, y1)
+        self.curveTo(x + radius - t, y1, x, y1 - radius + t, x, y1 - radius)
+        self.lineTo(x, y + radius)
+        self.curveTo(x, y + radius - t, x + radius - t, y, x + radius, y)
+        self.close()
+
+    def ellipse(self, x, y, width, height):
+        rx, ry = width / 2, height / 2
+        cx, cy = x + rx, y + ry
+        tx, ty = rx * KAPPA, ry * KAPPA
+        self.moveTo(cx + rx, cy)
+        self.curveTo(cx + rx, cy + ty, cx + tx, cy + ry, cx, cy + ry)
+        self.curveTo(cx - tx, cy + ry, cx - rx, cy + ty, cx - rx, cy)
+        self.curveTo(cx - rx, cy - ty, cx - tx, cy - ry, cx, cy - ry)
+        self.curveTo(cx + tx, cy - ry, cx + rx, cy - ty, cx + rx, cy)
+        self.close()
+
+    def circle(self, x_cen, y_cen, r):
+        self.ellipse(x_cen - r, y_cen - r, 2 * r, 2 * r)
+
+    def subpaths(self, unit=1):
+        """Liste von (Punkte, geschlossen); unit = Pixel pro Punkt für die Kurvenauflösung."""
+        result = []
+        points = []
+        closed = False
+        for op in self._ops:
+            if op[0] == "m":
+                if points:
+                    result.append((points, closed))
+                points, closed = [(op[1], op[2])], False
+            elif op[0] == "l":
+                points.append((op[1], op[2]))
+            elif op[0] == "c":
+                if not points:
+                    points = [(op[1], op[2])]
+                x0, y0 = points[-1]
+                _, x1, y1, x2, y2, x3, y3 = op
+                length = (math.hypot(x1 - x0, y1 - y0) + math.hypot(x2 - x1, y2 - y1)
+                          + math.hypot(x3 - x2, y3 - y2)) * unit
+                n = max(2, min(MAX_CURVE_SEGMENTS, int(length / 4)))
+                for i in range(1, n + 1):
+                    t = i / n
+                    mt = 1 - t
+                    points.append((
+                        mt ** 3 * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t ** 3 * x3,
+                        mt ** 3 * y0 + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t ** 3 * y3,
+                    ))
+            elif op[0] == "h":
+                closed = True
+        if points:
+            result.append((points, closed))
+        return result
+
+
+def axis_aligned_box(points):
+    """(links, oben, rechts, unten) in Pixeln, wenn points ein achsenparalleles Rechteck ist."""
+    if len(points) not in (4, 5):
+        return None
+    xs = sorted({round(x) for x, _ in points})
+    ys = sorted({round(y) for _, y in points})
+    if len(xs) != 2 or len(ys) != 2:
+        return None
+    return (xs[0], ys[0], xs[1], ys[1])
+
+
+def signed_area(points):
+    area = 0.0
+    for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+        area += x0 * y1 - x1 * y0
+    return area / 2
+
+
+# Caches pro Prozess, LRU-begrenzt (der Designer lebt lange und zoomt in vielen Größen)
+_fonts = OrderedDict()
+MAX_FONTS = 64
+# Vorschau (Tk-Thread) und Bildexport (Hintergrund-Thread) zeichnen gleichzeitig
+_cache_lock = threading.Lock()
+
+
+def _lru_get(cache, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache, key, value, limit):
+    with _cache_lock:
+        cache[key] = value
+        while len(cache) > limit:
+            cache.popitem(last=False)
+    return value
+
+
+def pil_font(fontname, pixel_size):
+    """Pillow-Font zu einem ReportLab-Fontnamen (Standard-Type1 oder registrierte TTF)."""
+    key = (fontname, round(pixel_size * 4) / 4)
+    font = _lru_get(_fonts, key)
+    if font is None:
+        face = getattr(pdfmetrics.getFont(fontname), "face", None)
+        path = getattr(face, "filename", None) or findT1File(fontname)
+        # BASIC: kein Shaping nötig, deutlich schneller als Raqm
+        font = _lru_put(_fonts, key, ImageFont.truetype(path, key[1], layout_engine=ImageFont.Layout.BASIC), MAX_FONTS)
+    return font
+
+
+_glyphs = OrderedDict()
+MAX_GLYPHS = 8192
+# Breiten bei Größe 1: ein float pro Font und Zeichen, bleibt klein
+_widths = {}
+
+
+def glyph(fontname, pixel_size, ch):
+    """(Maske, dx, dy) eines Zeichens relativ zur Grundlinie; einmal pro Font, Größe und Zeichen."""
+    key = (fontname, round(pixel_size * 4) / 4, ch)
+    cached = _lru_get(_glyphs, key)
+    if cached is None:
+        font = pil_font(fontname, pixel_size)
+        left, top, right, bottom = font.getbbox(ch, anchor="ls")
+        if right <= left or bottom <= top:
+            cached = (None, 0, 0)
+        else:
+            mask = Image.new("L", (right - left, bottom - top), 0)
+            ImageDraw.Draw(mask).text((-left, -top), ch, font=font, fill=255, anchor="ls")
+            cached = (mask, left, top)
+        _lru_put(_glyphs, key, cached, MAX_GLYPHS)
+    return cached
+
+
+def glyph_width(fontname, ch):
+    """Breite eines Zeichens bei Schriftgröße 1 (ReportLab-Metriken)."""
+    key = (fontname, ch)
+    width = _widths.get(key)
+    if width is None:
+        width = _widths[key] = pdfmetrics.stringWidth(ch, fontname, 1000) / 1000
+    return width
+
+
+# Bilder pro Prozess: zuletzt benutzte Originale und Skalierungen
+_images = OrderedDict()
+MAX_SOURCE_IMAGES = 16
+_scaled = OrderedDict()
+MAX_SCALED_IMAGES = 64
+
+
+def open_image(image):
+    """Pfad, ImageReader oder PIL-Bild -> (Pfad oder None, PIL-Bild); Dateien werden gemerkt."""
+    if isinstance(image, Image.Image):
+        return None, image
+    if not isinstance(image, str):
+        pil = getattr(image, "_image", None)
+        if pil is not None:
+            return None, pil
+        image = image.fileName
+    source = _lru_get(_images, image)
+    if source is None:
+        with Image.open(image) as img:
+            img.load()
+            mode = "RGBA" if img.mode in ("RGBA", "LA", "PA", "P") or "transparency" in img.info else "RGB"
+            source = _lru_put(_images, image, img.convert(mode), MAX_SOURCE_IMAGES)
+    return image, source
+
+
+def scaled_image(path, source, size):
+    key = (path, size)
+    scaled = _lru_get(_scaled, key)
+    if scaled is None:
+        scaled = _lru_put(_scaled, key, source.resize(size, Image.LANCZOS), MAX_SCALED_IMAGES)
+    return scaled
@@ -0,0 +1,240 @@
+"""Prüft eine Sammlung gegen ein Design, ohne ein PDF zu erzeugen.
+
+Geprüft wird die Display-Liste aus card_layout.layout_card, also genau das,
+was render_card_pdf zeichnen würde: einzeilige Felder, die umbrechen,
+breiter als ihre Box sind oder über den Kartenrand ragen, Beschreibungen, die über die Box laufen oder
+gekürzt werden, und fehlende oder unlesbare Icons (aoe/*.svg, dmg/dmg_*.svg,
+school/*.png, concentration.svg). Die Schadenswürfel kommen dabei wie beim
+Export aus der gekürzten Beschreibung. Kalt (leere Caches) braucht das für
+src/spells.json (396 Karten) etwa 0,5-0,8 s plus Start des Interpreters.
+
+Aufruf aus dem Projektordner:
+    python preflight.py --design src/design_config.json src/spells.json
+"""
+import argparse
+import json
+import sys
+import time
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from asset_cache import svg_cache
+from compiled_design import CompiledDesign
+from export_diagnostics import MESSAGES, ExportDiagnostics
+from card_fragment_cache import asset_versions
+from card_layout import display_list_cache
+from export_spellcards_pdf import FONT_NAME
+from text_layout import layout_cache
+
+# Layout-Befunde: Art -> (Stufe, Meldung); fehlende Assets nutzen export_diagnostics.MESSAGES
+PREFLIGHT_MESSAGES = {
+    "text_wrapped": ("warning", "Text passt nicht in eine Zeile"),
+    "text_clipped": ("warning", "Text ist breiter als die Box"),
+    "description_overflow": ("warning", "Beschreibung läuft über die Box"),
+    "description_truncated": ("warning", "Beschreibung wird gekürzt"),
+    "description_shrunk": ("info", "Beschreibung verkleinert"),
+}
+
+# Feld zu den "report"-Befehlen der Display-Liste (nach Präfix der Art)
+REPORT_FIELDS = {
+    "aoe": "area_of_effect",
+    "damage": "damage_dice",
+    "concentration": "concentration_icon",
+    "school": "school_icon",
+    "description": "description",
+}
+
+
+class Preflight:
+    """Layoutprüfung für viele Karten gegen ein CompiledDesign.
+
+    Die Display-Listen kommen aus dem DisplayListCache (ein späterer Export
+    im selben Prozess nutzt sie weiter), Umbrüche aus dem TextLayoutCache;
+    check() liefert die Befunde einer Karte als Liste von dicts
+    (card, field, kind, level, message, detail).
+    """
+
+    def __init__(self, design, assets_dir="src/img", layouts=None, diagnostics=None, display_lists=None, svg_assets=None):
+        self.design = design
+        self.assets_dir = assets_dir
+        self.layouts = layouts or layout_cache
+        self.diagnostics = diagnostics or ExportDiagnostics()
+        self.display_lists = display_lists or display_list_cache
+        self.svg_assets = svg_assets or svg_cache.session()
+        self.versions = asset_versions(design.config, assets_dir)
+        # Textfelder an ihrem Stil erkennen (jedes Element hat einen eigenen)
+        self._fields = {id(el.style): (key, el) for key, el in design.text_elements if el}
+        # einzeilige Felder sind nur "string"-Befehle; layout_card zählt jedes Feld in dieser Reihenfolge
+        self._field_order = [(key, el) for key, el in design.text_elements if el]
+        self.layout_seconds = 0.0
+
+    def check(self, spell):
+        card = spell.get("name", "Unbenannt")
+        issues = []
+
+        def add(field, kind, asset=None, detail=None):
+            if kind in PREFLIGHT_MESSAGES:
+                level, message = PREFLIGHT_MESSAGES[kind]
+            else:
+                # fehlende Assets wie beim Export zählen
+                self.diagnostics.report(kind, asset, card)
+                level, message = MESSAGES.get(kind, ("warning", kind))
+            issues.append({
+                "card": card,
+                "field": field,
+                "kind": kind,
+                "level": level,
+                "message": message,
+                "asset": asset,
+                "detail": detail,
+            })
+
+        start = time.perf_counter()
+        display_list = self.display_lists.get(spell, self.design, self.layouts, self.svg_assets, self.assets_dir, versions=self.versions)
+        self.layout_seconds += time.perf_counter() - start
+
+        description = None
+        autofit = set()
+        fields = iter(self._field_order)
+        last_string = None
+        for op in display_list.ops:
+            kind = op[0]
+            if kind == "string":
+                last_string = op
+            elif kind == "count" and op[1] == "text_fields":
+                field = next(fields)
+                if op[2] == "fast":
+                    self._check_text_line(field, last_string[3], add)
+            elif kind == "layout":
+                field = self._fields.get(id(op[4]))
+                if field:
+                    self._check_text_field(field, op[3], add)
+                else:
+                    description = op
+            elif kind == "count" and op[1] == "autofit":
+                autofit.add(op[2])
+            elif kind == "report":
+                if MESSAGES.get(op[1], ("warning",))[0] == "warning" or op[1] in PREFLIGHT_MESSAGES:
+                    add(REPORT_FIELDS.get(op[1].split("_")[0]), op[1], op[2], op[3])
+        if description is not None:
+            self._check_description(description, autofit, add)
+        return issues
+
+    def _check_text_field(self, field, layout, add):
+        key, el = field
+        if layout.lines is not None:
+            # gestauchte Zeilen so breit, wie sie gezeichnet werden
+            word_spaces = layout.word_spaces or [0] * len(layout.lines)
+            widest = max((stringWidth(line, el.style.fontName, el.style.fontSize) + space * line.count(" ")
+                          for line, space in zip(layout.lines, word_spaces)), default=0)
+        else:
+            widest = layout.paragraph.minWidth()
+        if len(layout.lines or ()) > 1 or layout.lines is None:
+            add(key, "text_wrapped", detail=f"{layout.height:.1f} pt hoch")
+        self._check_clipped(key, el, widest, add)
+
+    def _check_text_line(self, field, text, add):
+        """Einzeiliges Feld (drawString): passt in die Box, kann aber über den Kartenrand ragen."""
+        key, el = field
+        self._check_clipped(key, el, stringWidth(text, el.style.fontName, el.style.fontSize), add)
+
+    def _check_clipped(self, key, el, widest, add):
+        # ein Wort breiter als die Box oder über den Kartenrand hinaus
+        overhang = el.dx + widest - self.design.card_w
+        if widest > el.max_width + 0.01:
+            add(key, "text_clipped", detail=f"{widest:.1f} von {el.max_width:.1f} pt")
+        elif overhang > 0:
+            add(key, "text_clipped", detail=f"{overhang:.1f} pt über den Kartenrand")
+
+    def _check_description(self, op, autofit, add):
+        """op: ("layout", x, y, layout, style) der Beschreibung; autofit: Zähler aus der Display-Liste."""
+        el = self.design.description
+        _, _, y, layout, style = op
+        if el.auto_fit:
+            if "overflow" in autofit:
+                add("description", "description_overflow",
+                    detail=f"+{layout.height - el.box_height:.1f} pt bei {style.fontSize} pt")
+            elif "shrunk" in autofit:
+                add("description", "description_shrunk", detail=f"{style.fontSize} pt")
+            return
+        # Position kommt aus der Höhe bei voller Breite, gezeichnet wird 10pt schmaler umbrochen
+        top_of_box = el.dy - el.font_size
+        h = top_of_box - y
+        below = max(h - el.box_height, -y)
+        above = y + layout.height - top_of_box
+        if below > 0:
+            add("description", "description_overflow", detail=f"+{below:.1f} pt unten")
+        if above > 0.01:
+            add("description", "description_overflow", detail=f"+{above:.1f} pt oben")
+
+
+def preflight_spells(spells, design_config, assets_dir="src/img", layouts=None):
+    """Prüft alle Karten und gibt einen Report (dict) zurück.
+
+    design_config: Design-Dict oder CompiledDesign. Der Report enthält
+    cards, issues (Befunde pro Karte und Feld), counts (pro Art),
+    layout_seconds (layout_card inkl. Icons) und seconds (gesamt).
+    """
+    start = time.perf_counter()
+    design = design_config if isinstance(design_config, CompiledDesign) else CompiledDesign(design_config, FONT_NAME)
+    preflight = Preflight(design, assets_dir, layouts)
+    issues = []
+    cards = 0
+    for spell in spells:
+        issues.extend(preflight.check(spell))
+        cards += 1
+    counts = {}
+    for issue in issues:
+        counts[issue["kind"]] = counts.get(issue["kind"], 0) + 1
+    return {
+        "cards": cards,
+        "issues": issues,
+        "counts": counts,
+        "assets": preflight.diagnostics.summary(),
+        "layout_seconds": preflight.layout_seconds,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def print_preflight(report):
+    """Layout-Befunde pro Karte, fehlende Assets zusammengefasst."""
+    layout_issues = [i for i in report["issues"] if i["kind"] in PREFLIGHT_MESSAGES and i["level"] == "warning"]
+    for issue in layout_issues:
+        detail = f" ({issue['detail']})" if issue["detail"] else ""
+        print(f"{issue['card']} - {issue['field']}: {issue['message']}{detail}")
+    for item in report["assets"]:
+        examples = f" (z.B. {', '.join(item['cards'])})" if item["cards"] else ""
+        print(f"{item['count']}x {item['message']}: {item['asset']}{examples}")
+    warnings = sum(1 for i in report["issues"] if i["level"] == "warning")
+    print(f"{report['cards']} Karten geprüft, {warnings} Warnungen "
+          f"(Layout {report['layout_seconds'] * 1000:.0f} ms, gesamt {report['seconds'] * 1000:.0f} ms)")
+    return warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("spells", nargs="*", default=["src/spells.json"], help="Zauber-JSON(s) oder Sammlungen")
+    parser.add_argument("--design", default="src/design_config.json")
+    parser.add_argument("--assets", default="src/img")
+    parser.add_argument("--json", dest="json_path", help="Report zusätzlich als JSON schreiben")
+    parser.add_argument("--strict", action="store_true", help="Exit-Code 1 bei Warnungen")
+    args = parser.parse_args(argv)
+
+    spells = []
+    for path in args.spells:
+        with open(path, "r", encoding="utf-8") as f:
+            spells.extend(json.load(f))
+    with open(args.design, "r", encoding="utf-8") as f:
+        design_config = json.load(f)
+
+    report = preflight_spells(spells, design_config, args.assets)
+    warnings = print_preflight(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Report gespeichert unter: {args.json_path}")
+    return 1 if args.strict and warnings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+import weakref
+from PIL import Image
+
+# bei Änderungen an der Aufbereitung hochzählen, damit alte Dateien nicht mehr passen
+RASTER_FORMAT = 1
+
+
+class RasterCache:
+    """Rechnet Rasterbilder einmal auf die Druckauflösung ihrer Zielbox herunter.
+
+    Der Schlüssel ist der Hash des Dateiinhalts plus Zielgröße, DPI und Modus;
+    das Ergebnis liegt in cache_dir und wird bei späteren Exporten direkt
+    benutzt, ohne das Original erneut zu dekodieren. Kleinere Bilder werden
+    nicht hochskaliert, sondern unverändert zurückgegeben.
+    """
+
+    def __init__(self, cache_dir, dpi=300, jpeg_quality=90):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self._hashes = {}  # (path, size, mtime) -> sha256 des Inhalts
+        self._results = {}  # Schlüssel -> Pfad, pro Prozess gemerkt
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.resampled = 0
+        self.unchanged = 0
+
+    def _content_hash(self, path):
+        return content_hash(path, self._hashes)
+
+    def prepare(self, path, box_w, box_h, fit=False, dpi=None, opaque=False):
+        """Pfad eines Bildes für eine Box von box_w x box_h Punkten.
+
+        fit: Seitenverhältnis behalten und in die Box einpassen (sonst wird
+        wie bei drawImage auf die Box gestreckt). opaque: immer als RGB-JPEG
+        ablegen (z.B. Rückseiten). Bei Fehlern wird path zurückgegeben.
+        """
+        dpi = dpi or self.dpi
+        target = (max(1, round(box_w / 72 * dpi)), max(1, round(box_h / 72 * dpi)))
+        try:
+            digest = self._content_hash(path)
+        except OSError:
+            return path
+        params = json.dumps([RASTER_FORMAT, digest, target, fit, opaque, self.jpeg_quality], separators=(",", ":"))
+        key = hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            if key in self._results:
+                self.reused += 1
+                return self._results[key]
+
+        result = self._prepare_file(path, key, target, fit, opaque)
+        with self._lock:
+            self._results[key] = result
+        return result
+
+    def _prepare_file(self, path, key, target, fit, opaque):
+        for ext in (".jpg", ".png"):
+            cached = os.path.join(self.cache_dir, key + ext)
+            if os.path.exists(cached):
+                with self._lock:
+                    self.reused += 1
+                return cached
+        try:
+            with Image.open(path) as img:
+                if img.width <= target[0] and img.height <= target[1] and not opaque:
+                    with self._lock:
+                        self.unchanged += 1
+                    return path
+                if fit:
+                    scale = min(target[0] / img.width, target[1] / img.height, 1)
+                    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+                else:
+                    size = (min(img.width, target[0]), min(img.height, target[1])) if not opaque else target
+                has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+                if opaque or not has_alpha:
+                    img = img.convert("RGB").resize(size, Image.LANCZOS)
+                    ext, options = ".jpg", {"format": "JPEG", "quality": self.jpeg_quality}
+                else:
+                    img = img.convert("RGBA").resize(size, Image.LANCZOS)
+                    ext, options = ".png", {"format": "PNG", "optimize": True}
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cached = os.path.join(self.cache_dir, key + ext)
+            # pid und Thread: parallele Exporte (Export-Warteschlange) bereiten dasselbe Bild auf
+            tmp_path = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, **options)
+            os.replace(tmp_path, cached)
+        except (OSError, ValueError) as e:
+            print("Bild konnte nicht aufbereitet werden:", path, e)
+            return path
+        with self._lock:
+            self.resampled += 1
+        return cached
+
+    def stats(self):
+        with self._lock:
+            return {"reused": self.reused, "resampled": self.resampled, "unchanged": self.unchanged}
+
+
+def content_hash(path, memo):
+    """sha256 des Dateiinhalts; memo merkt sich das Ergebnis pro (Pfad, Größe, mtime)."""
+    st = os.stat(path)
+    stat_key = (path, st.st_size, st.st_mtime_ns)
+    digest = memo.get(stat_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = memo[stat_key] = h.hexdigest()
+    return digest
+
+
+class ImageDedupe:
+    """Bildbytes pro Dokument nur einmal einbetten, egal über welchen Pfad.
+
+    ReportLab erkennt Bilder am Dateinamen; resolve() ersetzt deshalb jeden
+    Pfad durch den ersten Pfad mit gleichem Inhalt. Pro Canvas wird gezählt,
+    wie viele Bytes dadurch nicht doppelt eingebettet werden.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+        # pro Canvas: erster Pfad je Inhalts-Hash, gesehene (Pfad, Maske), Dubletten
+        self._documents = weakref.WeakKeyDictionary()
+
+    def resolve(self, c, path, mask=None):
+        try:
+            digest = content_hash(path, self._hashes)
+        except OSError:
+            return path
+        with self._lock:
+            doc = self._documents.get(c)
+            if doc is None:
+                doc = self._documents[c] = {"first": {}, "seen": set(), "duplicates": 0, "saved_bytes": 0}
+            canonical = doc["first"].setdefault(digest, path)
+            if canonical != path and (path, mask) not in doc["seen"]:
+                doc["duplicates"] += 1
+                doc["saved_bytes"] += os.path.getsize(path)
+            doc["seen"].add((path, mask))
+        return canonical
+
+    def stats(self, c):
+        doc = self._documents.get(c)
+        if doc is None:
+            return {"duplicates": 0, "saved_bytes": 0}
+        return {"duplicates": doc["duplicates"], "saved_bytes": doc["saved_bytes"]}
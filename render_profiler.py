@@ -0,0 +1,144 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Stufen von render_card_pdf in Zeichenreihenfolge. Bei einem neuen Layout
+# misst card_layout.layout_card jeden Abschnitt als "layout_<stufe>"; "layout"
+# ist dann nur noch der Zugriff auf den DisplayListCache, die Stufen ohne
+# Präfix das Abspielen auf dem Canvas.
+DRAW_STAGES = ("background", "frame", "aoe", "text", "description", "damage", "concentration", "school_icon")
+CARD_STAGES = tuple(f"layout_{stage}" for stage in DRAW_STAGES) + ("layout",) + DRAW_STAGES
+
+
+class RenderProfiler:
+    """Misst Zeit und Aufrufe pro Render-Stufe und pro Karte (opt-in).
+
+    render_card_pdf ruft start_card(), nach jeder Stufe lap(stufe) und am
+    Ende end_card(); lap() bucht die Zeit seit dem letzten Aufruf auf die
+    Stufe. Export-Schritte außerhalb der Karten (Rückseiten, Speichern)
+    werden mit stage() gemessen.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}  # Stufe -> [Aufrufe, Sekunden]
+        self.cards = []  # (Sekunden, Kartenname, {Stufe: Sekunden})
+        self._card = None
+        self._card_stages = None
+        self._start = self._last = None
+
+    def _add(self, stage, seconds):
+        entry = self.stages.setdefault(stage, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def start_card(self, name):
+        self._card = name
+        self._card_stages = {}
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        if self._last is None:
+            return
+        now = time.perf_counter()
+        seconds = now - self._last
+        self._last = now
+        self._card_stages[stage] = self._card_stages.get(stage, 0.0) + seconds
+        self._add(stage, seconds)
+
+    def end_card(self):
+        if self._start is None:
+            return
+        self.cards.append((time.perf_counter() - self._start, self._card, self._card_stages))
+        self._card = self._card_stages = None
+        self._start = self._last = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def raw(self):
+        """Rohdaten zum Zusammenführen (z.B. aus den Prozessen des parallelen Exports)."""
+        return {"stages": self.stages, "cards": self.cards}
+
+    def merge(self, raw):
+        for stage, (calls, seconds) in raw["stages"].items():
+            entry = self.stages.setdefault(stage, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        self.cards.extend(tuple(card) for card in raw["cards"])
+
+    def report(self, slowest=10):
+        """JSON-fähiger Report: Stufen, Perzentile pro Karte und die langsamsten Karten."""
+        totals = sorted(seconds for seconds, _, _ in self.cards)
+        stages = {}
+        for stage, (calls, seconds) in self.stages.items():
+            stages[stage] = {
+                "calls": calls,
+                "total_ms": round(seconds * 1000, 3),
+                "mean_ms": round(seconds * 1000 / calls, 4) if calls else 0.0,
+            }
+        cards = {"count": len(totals)}
+        if totals:
+            cards["mean_ms"] = round(sum(totals) * 1000 / len(totals), 4)
+            for name, q in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99)):
+                cards[f"{name}_ms"] = round(percentile(totals, q) * 1000, 4)
+            cards["max_ms"] = round(totals[-1] * 1000, 4)
+        worst = sorted(self.cards, key=lambda card: card[0], reverse=True)[:slowest]
+        return {
+            "stages": stages,
+            "cards": cards,
+            "slowest": [
+                {
+                    "name": name,
+                    "ms": round(seconds * 1000, 4),
+                    "stages": {stage: round(s * 1000, 4) for stage, s in card_stages.items()},
+                }
+                for seconds, name, card_stages in worst
+            ],
+        }
+
+    def write(self, path, slowest=10):
+        """Schreibt report() als JSON nach path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(slowest), f, indent=2, ensure_ascii=False)
+
+
+class NullProfiler:
+    """Standard ohne Messung: alle Aufrufe tun nichts."""
+
+    enabled = False
+
+    def start_card(self, name):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def end_card(self):
+        pass
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def raw(self):
+        return None
+
+
+def percentile(sorted_values, q):
+    """Perzentil nach Nearest-Rank auf einer sortierten Liste."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-q * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+NULL_PROFILER = NullProfiler()
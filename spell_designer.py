@@ -1,10 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, colorchooser, simpledialog, filedialog
-from card_renderer_utils import (
-    px, py, fw, fh, fs, hex_with_alpha, fc, draw_icons, draw_text_elements, draw_damage
-)
+from PIL import Image, ImageTk
+from reportlab.graphics import renderPDF
+from reportlab.pdfbase import pdfmetrics
+from asset_cache import svg_cache
+from card_layout import display_list_cache
+from compiled_design import ensure_compiled
+from export_spellcards_pdf import FONT_NAME
+from pillow_canvas import PillowCanvas
+from text_layout import layout_cache, layout_lines
 import json
 import os
+from collections import OrderedDict
 
 class SpellDesigner:
     def __init__(self, parent):
@@ -99,12 +106,14 @@ class SpellDesigner:
 
         card_width = 300
         spacing = 40
+        # einmal pro Neuzeichnen kompilieren, alle Vorschaukarten teilen es
+        design = ensure_compiled(self.config_data, FONT_NAME)
 
         for i, spell in enumerate(self.preview_spells):
             spell = normalize_spell_data(spell)
             card_canvas = tk.Canvas(self.canvas_inner, width=card_width + 20, height=500, bg="white")
             card_canvas.pack(side="left", padx=(0 if i == 0 else spacing), pady=10)
-            draw_card_preview(card_canvas, self.config_data, spell)
+            draw_card_preview(card_canvas, design, spell, card_width)
 
     def save_current_config(self):
         if not self.current_element:
@@ -234,56 +243,157 @@ class SpellDesigner:
 
 
 def draw_card_preview(canvas, config_data, spell_data, width_px=300):
+    """Vorschau einer Karte auf einem Tk-Canvas mit demselben Layout wie im PDF.
+
+    config_data: Design-Dict oder CompiledDesign. Das Layout kommt aus dem
+    prozessweiten card_layout-Cache, den auch der Export benutzt.
+    """
     canvas.delete("all")
+    design = ensure_compiled(config_data, FONT_NAME)
+    svg_assets = svg_cache.session()
+    display_list = display_list_cache.get(spell_data, design, layout_cache, svg_assets)
 
-    # Kartengröße (in Pixel)
-    w = width_px
-    h = int(w * 88 / 63)
     x0, y0 = 10, 10
-    x1, y1 = x0 + w, y0 + h
-
-    # Hintergrund
-    bg = config_data.get("background_image", {})
-    bg_alpha = bg.get("opacity", 100)
-    bg_color = "#dddddd"
-    canvas.create_rectangle(x0, y0, x1, y1, fill=hex_with_alpha(bg_color, bg_alpha), outline="")
-
-    # Rahmen
-    frame = config_data.get("frame", {})
-    color = fc(frame, spell_data)
-    thick = frame.get("thickness", 2)
-    roundness = frame.get("roundness", 0)
-    if roundness > 0:
-        draw_rounded_rect(canvas, x0, y0, x1, y1, roundness, color, thick)
-    else:
-        canvas.create_rectangle(x0, y0, x1, y1, outline=color, width=thick)
-
-    # Textfelder
-    draw_text_elements(canvas, config_data, spell_data, x0, y0, w, h)
-
-    # Schadenswürfel
-    draw_damage(canvas, config_data, spell_data, x0, y0, w, h)
-
-    # Icons
-    draw_icons(canvas, config_data, x0, y0, w, h)
+    scale = width_px / display_list.width
+    draw_display_list_tk(canvas, display_list, design, svg_assets, x0, y0, scale)
 
     # Kartenname unter der Karte anzeigen
     canvas.create_text(
-        (x0 + x1) // 2, y1 + 10,
+        x0 + width_px // 2, y0 + display_list.height * scale + 10,
         text=spell_data.get("name", "Unbenannt"),
         font=("Arial", 12, "bold")
     )
 
-def hex_with_alpha(hex_color, alpha_percent):
-    """Erzeugt eine RGBA-Farbe für Canvas (nur für Fake-Farben)"""
-    r = int(hex_color[1:3], 16)
-    g = int(hex_color[3:5], 16)
-    b = int(hex_color[5:7], 16)
-    # Simulierte Helligkeit
-    r = int(r + (255 - r) * (100 - alpha_percent) / 100)
-    g = int(g + (255 - g) * (100 - alpha_percent) / 100)
-    b = int(b + (255 - b) * (100 - alpha_percent) / 100)
-    return f"#{r:02x}{g:02x}{b:02x}"
+def draw_display_list_tk(canvas, display_list, design, svg_assets, x0, y0, scale):
+    """Tk-Backend für card_layout: Punkte (y nach oben) -> Canvas-Pixel (y nach unten).
+
+    scale: Pixel pro Punkt. Icons und Bilder werden mit Pillow gerastert;
+    die PhotoImages hängen am Canvas, sonst räumt Tk sie sofort wieder ab.
+    """
+    card_h = display_list.height
+    canvas.preview_images = []
+    font = (design.font_name, 10)
+    fill = "#000000"
+
+    def point(x, y):
+        return x0 + x * scale, y0 + (card_h - y) * scale
+
+    def place(image, x, y):
+        photo = ImageTk.PhotoImage(image, master=canvas)
+        canvas.preview_images.append(photo)
+        canvas.create_image(x, y, image=photo, anchor="nw")
+
+    for op in display_list.ops:
+        kind = op[0]
+        if kind == "string":
+            draw_string_tk(canvas, *point(op[1], op[2]), op[3], font, fill, scale)
+        elif kind == "font":
+            font = (op[1], op[2])
+        elif kind == "fill":
+            fill = tk_color(op[1])
+        elif kind == "layout":
+            _, x, y, layout, style = op
+            # Grundlinien wie draw_text_layout: erste bei Höhe minus Schriftgröße
+            baseline = y + layout.height - style.fontSize
+            color = tk_color(style.textColor)
+            for i, line in enumerate(layout_lines(layout)):
+                draw_string_tk(canvas, *point(x, baseline - i * style.leading), line,
+                               (style.fontName, style.fontSize), color, scale)
+        elif kind == "icon":
+            _, path, x, y, mode, measure = op
+            image = preview_icon(svg_assets, path, mode, measure, scale)
+            if image is not None:
+                place(image, *point(x, y + image.height / scale))
+        elif kind == "image":
+            _, path, x, y, w, h = op
+            try:
+                image = preview_image(path, w * scale, h * scale, keep_aspect=True)
+            except Exception:
+                continue
+            # wie preserveAspectRatio im PDF: mittig in der Box
+            px, py = point(x, y + h)
+            place(image, px + (w * scale - image.width) / 2, py + (h * scale - image.height) / 2)
+        elif kind == "chrome":
+            px0, py0 = point(0, card_h)
+            px1, py1 = point(display_list.width, 0)
+            if design.background_path:
+                try:
+                    place(preview_image(design.background_path, px1 - px0, py1 - py0), px0, py0)
+                except Exception:
+                    pass
+            else:
+                canvas.create_rectangle(px0, py0, px1, py1, fill="#ffffff", outline="")
+            color = tk_color(op[1])
+            thick = max(1, round(design.frame_thickness * scale))
+            roundness = design.frame_roundness * scale
+            if roundness > 0:
+                draw_rounded_rect(canvas, px0, py0, px1, py1, roundness, color, thick)
+            else:
+                canvas.create_rectangle(px0, py0, px1, py1, outline=color, width=thick)
+
+def draw_string_tk(canvas, x, y, text, font, color, scale):
+    """Eine Zeile ab Grundlinie x, y (Pixel); Tk setzt "sw" an die Unterlänge, also um sie tiefer."""
+    font_name, font_size = font
+    descent = -pdfmetrics.getFont(font_name).face.descent / 1000 * font_size * scale
+    canvas.create_text(x, y + descent, text=text, anchor="sw", fill=color, font=tk_font(font_name, font_size * scale))
+
+def tk_font(font_name, pixel_size):
+    """ReportLab-Fontname (z.B. Times-Bold) -> Tk-Font; negative Größe heißt Pixel.
+
+    Bei TTF-Schriften (font_registry) Familie und Stil aus der Datei; Tk
+    nimmt die Familie, sofern sie im System installiert ist.
+    """
+    face = pdfmetrics.getFont(font_name).face
+    if hasattr(face, "familyName"):
+        family, variant = face.familyName.decode("latin-1"), face.styleName.decode("latin-1")
+    else:
+        family, _, variant = font_name.partition("-")
+    font = [family, -max(1, round(pixel_size))]
+    if "Bold" in variant:
+        font.append("bold")
+    if "Italic" in variant or "Oblique" in variant:
+        font.append("italic")
+    return tuple(font)
+
+def tk_color(color):
+    """ReportLab-Farbe -> "#rrggbb"."""
+    return "#" + color.hexval()[2:]
+
+# gerasterte Icons/Bilder der Vorschau: (Pfad, Maß, Skalierung) -> PIL-Bild,
+# LRU-begrenzt, weil jede Zoomstufe neue Einträge erzeugt
+PREVIEW_RASTER_ENTRIES = 128
+_preview_rasters = OrderedDict()
+
+def _cached_raster(key, render):
+    if key in _preview_rasters:
+        _preview_rasters.move_to_end(key)
+        return _preview_rasters[key]
+    image = _preview_rasters[key] = render()
+    while len(_preview_rasters) > PREVIEW_RASTER_ENTRIES:
+        _preview_rasters.popitem(last=False)
+    return image
+
+def preview_icon(svg_assets, path, mode, measure, scale):
+    def render():
+        drawing = svg_assets.fit(path, **{mode: measure})
+        if not drawing:
+            return None
+        w = drawing.width * drawing.transform[0]
+        h = drawing.height * drawing.transform[3]
+        c = PillowCanvas(w, h, dpi=72 * scale, background=None)
+        renderPDF.draw(drawing, c, 0, 0)
+        return c.image()
+    return _cached_raster(("icon", path, mode, measure, round(scale, 3)), render)
+
+def preview_image(path, width, height, keep_aspect=False):
+    def render():
+        image = Image.open(path).convert("RGBA")
+        w, h = width, height
+        if keep_aspect:
+            ratio = min(w / image.width, h / image.height)
+            w, h = image.width * ratio, image.height * ratio
+        return image.resize((max(1, round(w)), max(1, round(h))), Image.LANCZOS)
+    return _cached_raster(("image", path, round(width), round(height), keep_aspect), render)
 
 def draw_rounded_rect(canvas, x0, y0, x1, y1, r, outline, width):
     canvas.create_arc(x0, y0, x0 + 2 * r, y0 + 2 * r, start=90, extent=90, style='arc', outline=outline,
@@ -1,6 +1,28 @@
-from tkinter import ttk, filedialog, StringVar
+from tkinter import ttk, filedialog, StringVar, IntVar, Listbox
+import copy
+import glob
 import os
 from export_spellcards_pdf import export_spellcards_pdf
+from export_master_deck import export_master_deck
+from export_progress import ExportJob
+from export_queue import ExportQueue
+
+# wie oft die UI den laufenden Export abfragt (ms)
+POLL_INTERVAL_MS = 100
+PHASE_LABELS = {
+    "fronts": "Vorderseiten",
+    "backsides": "Rückseiten",
+    "merge": "Zusammenfügen",
+    "save": "Speichern",
+    "done": "Fertig",
+}
+QUEUE_STATUS = {
+    "queued": "wartet",
+    "running": "läuft",
+    "done": "fertig",
+    "cancelled": "abgebrochen",
+    "error": "Fehler",
+}
 
 class SpellExporter:
     def __init__(self, parent, collection, designer_ref):
@@ -25,13 +47,152 @@ class SpellExporter:
             ttk.Radiobutton(self.frame, text=text, variable=self.backside_option, value=val).pack(anchor="w", padx=20)
 
         # PDF erzeugen
-        ttk.Button(self.frame, text="PDF erzeugen", command=self.export_pdf).pack(pady=15)
+        self.export_button = ttk.Button(self.frame, text="PDF erzeugen", command=self.export_pdf)
+        self.export_button.pack(pady=15)
+
+        # mehrere Sammlungen in ein PDF, gleiche Zauber nur einmal gerendert
+        self.master_button = ttk.Button(self.frame, text="Master-Deck aus Sammlungen", command=self.export_master_deck)
+        self.master_button.pack(pady=5)
+
+        # Fortschritt des laufenden Exports (läuft im Hintergrund, die UI bleibt bedienbar)
+        self.progress_bar = ttk.Progressbar(self.frame, mode="determinate", maximum=100, length=300)
+        self.progress_bar.pack(pady=(10, 2))
+        self.progress_label = ttk.Label(self.frame, text="")
+        self.progress_label.pack()
+        self.cancel_button = ttk.Button(self.frame, text="Abbrechen", command=self.cancel_export, state="disabled")
+        self.cancel_button.pack(pady=5)
 
         # Statusausgabe
         self.status_label = ttk.Label(self.frame, text="", foreground="gray")
         self.status_label.pack()
 
         self.custom_backside_path = None
+        self.job = None
+        self.build_queue_panel()
+        # Tab/Fenster geschlossen: laufenden Export abbrechen (keine .part-Reste)
+        self.frame.bind("<Destroy>", self.on_destroy)
+
+    def build_queue_panel(self):
+        """Warteschlange: mehrere Sammlungen x Designs nacheinander bzw. parallel exportieren."""
+        panel = ttk.LabelFrame(self.frame, text="Warteschlange")
+        panel.pack(fill="both", expand=True, padx=10, pady=10)
+        self.export_queue = ExportQueue(max_workers=2)
+        self.queue_collections = []
+
+        row = ttk.Frame(panel)
+        row.pack(fill="x", pady=2)
+        ttk.Button(row, text="Sammlungen wählen", command=self.choose_queue_collections).pack(side="left")
+        self.queue_collections_label = ttk.Label(row, text="keine Sammlungen gewählt", foreground="gray")
+        self.queue_collections_label.pack(side="left", padx=5)
+
+        ttk.Label(panel, text="Designs:").pack(anchor="w")
+        self.design_paths = ["src/design_config.json"] + sorted(glob.glob("designs/*.json"))
+        self.design_list = Listbox(panel, selectmode="multiple", height=min(6, len(self.design_paths)), exportselection=False)
+        for path in self.design_paths:
+            self.design_list.insert("end", path)
+        self.design_list.pack(fill="x")
+
+        row = ttk.Frame(panel)
+        row.pack(fill="x", pady=2)
+        ttk.Label(row, text="Parallele Jobs:").pack(side="left")
+        self.queue_workers = IntVar(value=self.export_queue.max_workers)
+        ttk.Spinbox(row, from_=1, to=os.cpu_count() or 4, width=4, textvariable=self.queue_workers,
+                    command=self.update_queue_workers).pack(side="left", padx=5)
+        ttk.Button(row, text="In Warteschlange", command=self.enqueue_exports).pack(side="left", padx=5)
+
+        columns = ("collection", "design", "status", "output")
+        self.queue_tree = ttk.Treeview(panel, columns=columns, show="headings", height=6)
+        for column, title, width in zip(columns, ("Sammlung", "Design", "Status", "Ausgabe"), (110, 110, 110, 220)):
+            self.queue_tree.heading(column, text=title)
+            self.queue_tree.column(column, width=width)
+        self.queue_tree.pack(fill="both", expand=True, pady=2)
+        self.queue_items = {}  # ExportJob -> Zeilen-ID
+
+        row = ttk.Frame(panel)
+        row.pack(fill="x", pady=2)
+        ttk.Button(row, text="Auswahl abbrechen", command=self.cancel_selected_jobs).pack(side="left")
+        ttk.Button(row, text="Alle abbrechen", command=self.export_queue.cancel_all).pack(side="left", padx=5)
+        ttk.Button(row, text="Fertige entfernen", command=self.clear_finished_jobs).pack(side="left")
+        self.queue_polling = False
+
+    def choose_queue_collections(self):
+        paths = filedialog.askopenfilenames(initialdir="collections", filetypes=[("JSON Dateien", "*.json")])
+        if paths:
+            self.queue_collections = list(paths)
+            names = ", ".join(os.path.splitext(os.path.basename(p))[0] for p in paths)
+            self.queue_collections_label.config(text=names, foreground="black")
+
+    def update_queue_workers(self):
+        try:
+            self.export_queue.set_max_workers(int(self.queue_workers.get()))
+        except (ValueError, TypeError):
+            pass
+
+    def enqueue_exports(self):
+        designs = [self.design_paths[i] for i in self.design_list.curselection()]
+        if not self.queue_collections or not designs:
+            self.status_label.config(text="Für die Warteschlange Sammlungen und mindestens ein Design wählen.")
+            return
+        if not self.choose_backside():
+            return
+        self.update_queue_workers()
+        try:
+            results = self.export_queue.submit_all(
+                self.queue_collections, designs, self.backside_option.get(), self.custom_backside_path
+            )
+        except (OSError, ValueError) as e:
+            self.status_label.config(text=f"Fehler beim Laden: {e}")
+            return
+        added = sum(1 for _, new in results if new)
+        merged = len(results) - added
+        if not added:
+            text = f"Alle {merged} Exporte laufen oder warten schon."
+        else:
+            text = f"{added} Exporte in der Warteschlange"
+            if merged:
+                text += f", {merged} gleiche Exporte zusammengefasst"
+        self.status_label.config(text=text)
+        self.refresh_queue()
+        if not self.queue_polling:
+            self.queue_polling = True
+            self.frame.after(POLL_INTERVAL_MS, self.poll_queue)
+
+    def poll_queue(self):
+        if not self.frame.winfo_exists():
+            return
+        self.refresh_queue()
+        if self.export_queue.busy:
+            self.frame.after(POLL_INTERVAL_MS, self.poll_queue)
+        else:
+            self.queue_polling = False
+
+    def refresh_queue(self):
+        """Zeilen der Tabelle an Status und Fortschritt der Jobs anpassen."""
+        for job in self.export_queue.jobs:
+            status = QUEUE_STATUS.get(job.status, job.status)
+            if job.status == "running" and job.progress and job.progress["cards_total"]:
+                status += f" {100 * job.progress['cards_done'] / job.progress['cards_total']:.0f}%"
+            elif job.status == "error":
+                status += f": {job.error}"
+            output = job.report["output_path"] if job.report else job.output_path
+            values = (job.collection, job.design, status, output)
+            item = self.queue_items.get(job)
+            if item is None:
+                self.queue_items[job] = self.queue_tree.insert("", "end", values=values)
+            else:
+                self.queue_tree.item(item, values=values)
+
+    def cancel_selected_jobs(self):
+        selected = set(self.queue_tree.selection())
+        for job, item in self.queue_items.items():
+            if item in selected and job.running:
+                self.export_queue.cancel(job)
+        self.refresh_queue()
+
+    def clear_finished_jobs(self):
+        self.export_queue.clear_finished()
+        for job in [job for job in self.queue_items if job not in self.export_queue.jobs]:
+            self.queue_tree.delete(self.queue_items.pop(job))
 
     def choose_collection(self):
         path = filedialog.askopenfilename(initialdir="collections", filetypes=[("JSON Dateien", "*.json")])
@@ -46,26 +207,135 @@ class SpellExporter:
             except Exception as e:
                 self.status_label.config(text=f"Fehler beim Laden der Sammlung: {e}")
 
-    def export_pdf(self):
-        # Falls Benutzer "custom" gewählt hat, Bild erfragen
+    def choose_backside(self):
+        """Fragt bei "custom" nach dem Rückseitenbild; False, wenn keins gewählt wurde."""
         if self.backside_option.get() == "custom":
             image_path = filedialog.askopenfilename(filetypes=[("Bilddateien", "*.png;*.jpg;*.jpeg")])
             if not image_path:
                 self.status_label.config(text="Export abgebrochen: Kein Bild gewählt.")
-                return
+                return False
             self.custom_backside_path = image_path
         else:
             self.custom_backside_path = None
+        return True
 
-        try:
-            export_spellcards_pdf(
-                spells=self.collection,
-                design_config=self.designer.config_data,
-                output_dir="output",
-                backside_option=self.backside_option.get(),
-                backside_path=self.custom_backside_path,
-                base_name=self.collection_name
-            )
-            self.status_label.config(text="Export abgeschlossen.")
-        except Exception as e:
-            self.status_label.config(text=f"Fehler beim Export: {e}")
\ No newline at end of file
+    def export_pdf(self):
+        # Falls Benutzer "custom" gewählt hat, Bild erfragen
+        if self.job or not self.choose_backside():
+            return
+
+        def finished(report):
+            self.status_label.config(text=f"Export abgeschlossen: {report['output_path']}")
+
+        # Kopien: Sammlung und Design können während des Exports weiter bearbeitet werden
+        self.start_export(
+            export_spellcards_pdf, finished,
+            spells=list(self.collection),
+            design_config=copy.deepcopy(self.designer.config_data),
+            output_dir="output",
+            backside_option=self.backside_option.get(),
+            backside_path=self.custom_backside_path,
+            base_name=self.collection_name,
+        )
+
+    def export_master_deck(self):
+        if self.job:
+            return
+        paths = filedialog.askopenfilenames(initialdir="collections", filetypes=[("JSON Dateien", "*.json")])
+        if not paths or not self.choose_backside():
+            return
+
+        def finished(report):
+            self.status_label.config(text=f"Master-Deck gespeichert: {report['cards']} Karten, {report['unique_cards']} eindeutig.")
+
+        self.start_export(
+            export_master_deck, finished,
+            collections=list(paths),
+            design_config=copy.deepcopy(self.designer.config_data),
+            output_dir="output",
+            backside_option=self.backside_option.get(),
+            backside_path=self.custom_backside_path,
+        )
+
+    def start_export(self, target, on_done, **kwargs):
+        """Startet target in einem ExportJob und fragt ihn per after() ab."""
+        self.export_button.config(state="disabled")
+        self.master_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar.config(mode="determinate", value=0)
+        self.progress_label.config(text="Export startet...")
+        self.status_label.config(text="")
+        self.job = ExportJob(target, **kwargs).start()
+        self.frame.after(POLL_INTERVAL_MS, self.poll_export, on_done)
+
+    def cancel_export(self):
+        if self.job:
+            self.job.cancel()
+            self.cancel_button.config(state="disabled")
+            self.progress_label.config(text="Breche ab...")
+
+    def on_destroy(self, event):
+        if event.widget is not self.frame:
+            return
+        if self.job:
+            self.job.cancel()
+        self.export_queue.cancel_all()
+
+    def poll_export(self, on_done):
+        if self.job is None or not self.frame.winfo_exists():
+            return
+        progress, finished = self.job.poll()
+        if progress:
+            self.show_progress(progress)
+        if finished is None:
+            self.frame.after(POLL_INTERVAL_MS, self.poll_export, on_done)
+            return
+
+        self.job = None
+        self.export_button.config(state="normal")
+        self.master_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        self.progress_bar.stop()
+        kind, payload = finished
+        if kind == "done":
+            self.progress_bar.config(mode="determinate", value=100)
+            self.progress_label.config(text="")
+            on_done(payload)
+        elif kind == "cancelled":
+            self.progress_bar.config(mode="determinate", value=0)
+            self.progress_label.config(text="")
+            self.status_label.config(text="Export abgebrochen, keine Datei geschrieben.")
+        else:
+            self.progress_bar.config(mode="determinate", value=0)
+            self.progress_label.config(text="")
+            self.status_label.config(text=f"Fehler beim Export: {payload}")
+
+    def show_progress(self, info):
+        """Balken und Text aus einem ExportProgress-dict."""
+        phase = PHASE_LABELS.get(info["phase"], info["phase"])
+        total = info["cards_total"]
+        if total:
+            if str(self.progress_bar.cget("mode")) != "determinate":
+                self.progress_bar.stop()
+                self.progress_bar.config(mode="determinate")
+            self.progress_bar.config(value=100 * info["cards_done"] / total)
+            text = f"{phase}: {info['cards_done']}/{total} Karten"
+        else:
+            # Gesamtzahl unbekannt (Streaming): Balken läuft ohne Ende
+            if str(self.progress_bar.cget("mode")) != "indeterminate":
+                self.progress_bar.config(mode="indeterminate")
+                self.progress_bar.start(POLL_INTERVAL_MS)
+            text = f"{phase}: {info['cards_done']} Karten"
+        if info["cards_per_second"]:
+            text += f", {info['cards_per_second']:.0f} Karten/s"
+        if info["eta"] is not None and info["phase"] == "fronts":
+            text += f", noch {format_duration(info['eta'])}"
+        self.progress_label.config(text=text)
+
+
+def format_duration(seconds):
+    """Restzeit als "12 s" oder "3:05 min"."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    return f"{seconds // 60}:{seconds % 60:02d} min"
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, filedialog
 import json
 import pathlib
+from virtual_spell_list import SpellListModel, VirtualSpellList, spell_key
 
 class SpellManager:
     def __init__(self, parent):
@@ -12,6 +13,9 @@ class SpellManager:
         self.all_spells = []
         self.filtered_spells = []
         self.collection = []
+        # Liste und Häkchen als Modell; Widgets gibt es nur für sichtbare Zeilen
+        self.model = SpellListModel()
+        self._filter_index = []
 
         # UI-Layout
         self.setup_ui()
@@ -50,6 +54,7 @@ class SpellManager:
             unique[key] = spell
 
         self.all_spells = sorted(unique.values(), key=lambda s: s.get("name", "").lower())
+        self.rebuild_filter_index()
         self.filtered_spells = self.all_spells
 
         self.set_status(f"{len(self.all_spells)} Zauber geladen.")
@@ -117,30 +122,13 @@ class SpellManager:
         list_detail_frame = ttk.Frame(self.root)
         list_detail_frame.grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
 
-        # Scrollbarer Bereich für Spell-Checkbox-Liste
-        spell_canvas = tk.Canvas(list_detail_frame, width=300, height=400)
-        scrollbar = ttk.Scrollbar(list_detail_frame, orient="vertical", command=spell_canvas.yview)
-        spell_canvas.configure(yscrollcommand=scrollbar.set)
-
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        spell_canvas.grid(row=0, column=0, sticky="nsew")
-
-        self.spell_list_container = ttk.Frame(spell_canvas)
-        self.spell_list_container.bind(
-            "<Configure>",
-            lambda e: spell_canvas.configure(scrollregion=spell_canvas.bbox("all"))
+        # Zauberliste: virtualisiert, recycelt ein paar Zeilen-Widgets beim Scrollen
+        self.spell_list = VirtualSpellList(
+            list_detail_frame, self.model,
+            on_toggle=self.toggle_collection,
+            on_select=self.show_spell_details,
         )
-
-        spell_canvas.create_window((0, 0), window=self.spell_list_container, anchor="nw")
-        self.spell_canvas = spell_canvas  # Merke Referenz
-
-        # Mousewheel aktivieren für gesamten Spellbereich
-        def _on_mousewheel(event):
-            spell_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-        # Scroll auch aktivieren, wenn Maus über innerem Bereich liegt
-        self.spell_list_container.bind("<Enter>", lambda e: spell_canvas.bind_all("<MouseWheel>", _on_mousewheel))
-        self.spell_list_container.bind("<Leave>", lambda e: spell_canvas.unbind_all("<MouseWheel>"))
+        self.spell_list.grid(row=0, column=0, columnspan=2, sticky="nsew")
 
         # Spell-Details rechts daneben (mit Suchfeld & Button)
         self.detail_frame = ttk.Frame(list_detail_frame)
@@ -188,26 +176,21 @@ class SpellManager:
         if not query:
             return
 
-        for name, (var, spell) in self.checkbox_vars.items():
-            if name.startswith(query):
-                self.show_spell_details(spell)
-                return
+        index = self.model.find_prefix(query)
+        if index is not None:
+            self.show_spell_details(self.model.rows[index])
+            self.spell_list.scroll_to(index)
 
     def toggle_current_spell(self):
         spell = self.current_detail_spell
         if not spell:
             return
 
-        key = (spell["name"].lower(), spell.get("source", "Core").lower())
-        #var = self.checkbox_vars.get(spell["name"].lower(), (None,))[0] # OLD
-        var = self.checkbox_vars.get(key, (None,))[0]
-        if not var:
-            return
-
         # Toggle Zustand
-        new_state = not var.get()
-        var.set(new_state)
-        self.toggle_collection(spell, var)
+        new_state = not self.model.is_checked(spell)
+        self.model.set_checked(spell, new_state)
+        self.toggle_collection(spell, new_state)
+        self.spell_list.render()
 
         # Button-Text aktualisieren
         self.toggle_button.config(text="Entfernen" if new_state else "Hinzufügen")
@@ -269,77 +252,39 @@ class SpellManager:
 
         selected_levels = self.selected_levels
 
-        def match(spell):
-            matches_class = any(cls in [c.lower() for c in spell.get("classes", [])] for cls in
-                                selected_classes) if selected_classes else True
-            matches_school = spell.get("school", "").lower() in selected_schools if selected_schools else True
-            spell_lvl = str(spell.get("level", "")).lower()
-            matches_level = spell_lvl in selected_levels if selected_levels else True
-            return matches_class and matches_school and matches_level
-
         # if selected list is empty → keine Filterung (zeigt alle)
-        self.filtered_spells = sorted(
-            [s for s in self.all_spells if match(s)],
-            key=lambda s: s.get("name", "").lower()
-        )
+        # all_spells ist nach Name sortiert, die Filter erhalten die Reihenfolge
+        rows = self._filter_index
+        if selected_classes:
+            classes = set(selected_classes)
+            rows = [row for row in rows if not classes.isdisjoint(row[1])]
+        if selected_schools:
+            schools = set(selected_schools)
+            rows = [row for row in rows if row[2] in schools]
+        if selected_levels:
+            rows = [row for row in rows if row[3] in selected_levels]
+        self.filtered_spells = [row[0] for row in rows]
         self.update_spell_list()
 
-    def update_spell_list(self):
-        for widget in self.spell_list_container.winfo_children():
-            widget.destroy()
-
-        self.checkbox_vars = {}
-        self.label_refs = {}
-
-        for spell in self.filtered_spells:
-            row = ttk.Frame(self.spell_list_container)
-            row.pack(fill="x", anchor="w", pady=1)
+    def rebuild_filter_index(self):
+        """(Zauber, Klassen, Schule, Level) in Kleinbuchstaben, einmal pro geladener Liste."""
+        self._filter_index = [
+            (spell,
+             frozenset(c.lower() for c in spell.get("classes", [])),
+             spell.get("school", "").lower(),
+             str(spell.get("level", "")).lower())
+            for spell in self.all_spells
+        ]
 
-            var = tk.BooleanVar(value=spell in self.collection)
-            cb = tk.Checkbutton(row, variable=var, command=lambda s=spell, v=var: self.toggle_collection(s, v))
-            cb.grid(row=0, column=0, sticky="w")
-
-            source = spell.get("source", "Core")
-            label_text = f"{spell.get('name', 'Unbenannt')} ({source})"
-
-            label = tk.Label(row, text=label_text, fg="blue", cursor="hand2", anchor="w")
-            label.grid(row=0, column=1, sticky="w", padx=(5, 0))
-            label.bind("<Button-1>", lambda e, s=spell: self.show_spell_details(s))
-            # allow same spells from different sources
-            key = (spell.get("name", "").lower(), spell.get("source", "Core").lower())
-            self.checkbox_vars[key] = (var, spell)
-            self.label_refs[key] = label
-
-    def scroll_to_widget(self, widget):
-        self.spell_canvas.update_idletasks()
-
-        canvas_height = self.spell_canvas.winfo_height()
-        container_height = self.spell_list_container.winfo_height()
-        widget_y = widget.winfo_y()
-        widget_height = widget.winfo_height()
-
-        # Ziel: widget mittig scrollen
-        center_y = widget_y + widget_height // 2 - canvas_height // 2
-
-        # relative Position (0..1) in der Scrollregion berechnen
-        rel_pos = center_y / max(container_height, 1)
-        rel_pos = max(0, min(1, rel_pos))  # clamp between 0 and 1
-
-        self.spell_canvas.yview_moveto(rel_pos)
+    def update_spell_list(self):
+        # nur das Modell tauschen; die sichtbaren Zeilen werden neu beschriftet
+        self.model.set_rows(self.filtered_spells)
+        self.spell_list.refresh()
 
     def show_spell_details(self, spell):
-        # 1. Visuelle Markierung zurücksetzen
-        for label in self.label_refs.values():
-            label.config(bg=None)
-
-        # 2. Selektiertes Spell-Label hervorheben
-        spell_key = spell["name"].lower()
-        if spell_key in self.label_refs:
-            selected_label = self.label_refs[spell_key]
-            selected_label.config(bg="#d0ebff")  # zartes Blau
-
-            # 3. Scroll dahin
-            #self.scroll_to_widget(selected_label)
+        # Selektiertes Spell-Label hervorheben
+        self.model.selected = spell_key(spell)
+        self.spell_list.render()
 
         self.spell_detail.config(state="normal")
         self.spell_detail.delete("1.0", tk.END)
@@ -374,14 +319,13 @@ class SpellManager:
 
         self.current_detail_spell = spell
         # Buttonstatus anpassen
-        var = self.checkbox_vars.get(spell["name"].lower(), (None,))[0]
-        if var and var.get():
+        if self.model.is_checked(spell):
             self.toggle_button.config(text="Entfernen")
         else:
             self.toggle_button.config(text="Hinzufügen")
 
-    def toggle_collection(self, spell, var):
-        if var.get():
+    def toggle_collection(self, spell, checked):
+        if checked:
             if spell not in self.collection:
                 self.collection.append(spell)
         else:
@@ -403,7 +347,10 @@ class SpellManager:
         if not filepath:
             return
         with open(filepath, "r", encoding="utf-8") as f:
-            self.collection = json.load(f)
+            # in place: der Export-Tab hält dieselbe Liste
+            self.collection[:] = json.load(f)
+        self.model.checked = {spell_key(spell) for spell in self.collection}
+        self.spell_list.render()
         self.set_status(f"{len(self.collection)} Zauber in Sammlung geladen.")
 
     def new_spell_dialog(self):
@@ -644,6 +591,8 @@ class SpellManager:
             self.save_custom_spells()
 
             self.all_spells.append(new_spell)
+            self.all_spells.sort(key=lambda s: s.get("name", "").lower())
+            self.rebuild_filter_index()
             self.filtered_spells = self.all_spells
             self.update_spell_list()
             self.update_dynamic_filters()
@@ -0,0 +1,317 @@
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph
+
+
+class TextLayout:
+    """Ergebnis eines Umbruchs: Zeilen und Höhe (wie Paragraph.wrap).
+
+    Für einfachen Text (ohne Markup) reichen die Zeilen zum Zeichnen;
+    word_spaces ist dann None oder pro Zeile der Wortabstand, mit dem
+    ReportLab überlange Zeilen staucht. Bei Markup wird der umbrochene
+    Paragraph selbst aufgehoben (nur im Speicher).
+    """
+
+    __slots__ = ("text", "width", "lines", "height", "paragraph", "word_spaces")
+
+    def __init__(self, text, width, lines, height, paragraph=None, word_spaces=None):
+        self.text = text
+        self.width = width
+        self.lines = lines
+        self.height = height
+        self.paragraph = paragraph
+        self.word_spaces = word_spaces
+
+
+def _simple_lines(para):
+    """(Zeilen, Wortabstände) eines umbrochenen Paragraphs oder None, wenn das nicht reicht."""
+    bl = para.blPara
+    if bl.kind != 0:
+        return None
+    lines = []
+    word_spaces = None
+    for i, (extraspace, words) in enumerate(bl.lines):
+        line = " ".join(words)
+        # überlange Zeilen mit Leerzeichen staucht ReportLab über den Wortabstand (wie _leftDrawParaLine)
+        if extraspace < -1e-8 and len(words) > 1:
+            if "\xa0" in line:
+                return None
+            if word_spaces is None:
+                word_spaces = [0] * len(bl.lines)
+            word_spaces[i] = extraspace / (len(words) - 1)
+        lines.append(line)
+    return lines, word_spaces
+
+
+class TextLayoutCache:
+    """LRU-Cache für Textumbrüche, Schlüssel (Text, Font, Größe, Zeilenabstand, Breite).
+
+    Mit path wird der Cache beim Start geladen und mit save() wieder
+    geschrieben, damit wiederholte Exporte den Textumbruch überspringen.
+    """
+
+    def __init__(self, max_entries=20000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._widths = OrderedDict()  # (text, font, size) -> Breite in Punkten
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._new = set()  # Schlüssel neuer einfacher Umbrüche seit take_new_entries()
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load(path)
+
+    @staticmethod
+    def key(text, style, width):
+        return (text, style.fontName, style.fontSize, style.leading, round(width, 3))
+
+    def layout(self, text, style, width):
+        """Umbruch von text in style auf width Punkte (gecacht)."""
+        return self.lookup(text, style, width)[1]
+
+    def lookup(self, text, style, width):
+        """(Treffer, Umbruch) wie layout(); für Sitzungen, die selbst mitzählen."""
+        key = self.key(text, style, width)
+        with self._lock:
+            layout = self._entries.get(key)
+            if layout is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, layout
+            self.misses += 1
+
+        para = Paragraph(text, style)
+        _, height = para.wrap(width, 100)
+        simple = _simple_lines(para)
+        if simple is not None:
+            layout = TextLayout(text, width, simple[0], height, word_spaces=simple[1])
+        else:
+            layout = TextLayout(text, width, None, height, para)
+
+        with self._lock:
+            self._entries[key] = layout
+            self._dirty = True
+            if layout.paragraph is None:
+                self._new.add(key)
+            while len(self._entries) > self.max_entries:
+                self._new.discard(self._entries.popitem(last=False)[0])
+        return False, layout
+
+    def fits_line(self, text, style, width):
+        """True, wenn text ohne Umbruch und ohne Markup in width passt.
+
+        Dann sieht drawString genauso aus wie ein Paragraph; die Breiten
+        werden pro (Text, Font, Größe) gecacht.
+        """
+        if not text or "<" in text or "&" in text or text != " ".join(text.split()):
+            return False
+        key = (text, style.fontName, style.fontSize)
+        with self._lock:
+            text_width = self._widths.get(key)
+        if text_width is None:
+            text_width = stringWidth(text, style.fontName, style.fontSize)
+            with self._lock:
+                self._widths[key] = text_width
+                while len(self._widths) > self.max_entries:
+                    self._widths.popitem(last=False)
+        return text_width <= width
+
+    def load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._add_entries(data.get("entries", []))
+
+    def _add_entries(self, entries):
+        """Einträge im JSON-Format [Schlüssel, Zeilen, Höhe, Wortabstände]; gibt die Zahl neuer zurück.
+
+        Danach wird wie in layout() auf max_entries gekürzt; die Datei ist
+        in LRU-Reihenfolge gespeichert, es fallen also die ältesten weg.
+        """
+        added = 0
+        for key, lines, height, *word_spaces in entries:
+            key = tuple(key)
+            if key not in self._entries:
+                added += 1
+            self._entries[key] = TextLayout(key[0], key[4], lines, height, word_spaces=word_spaces[0] if word_spaces else None)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._new.discard(self._entries.popitem(last=False)[0])
+        return added
+
+    @staticmethod
+    def _entry(key, layout):
+        return [list(key), layout.lines, layout.height, layout.word_spaces]
+
+    def take_new_entries(self):
+        """Einfache Umbrüche, die seit dem letzten Aufruf neu berechnet wurden (JSON-Format).
+
+        Für den parallelen Export: die Worker geben sie zurück, der
+        Hauptprozess übernimmt sie mit merge_entries() und speichert.
+        """
+        with self._lock:
+            entries = [self._entry(key, self._entries[key]) for key in self._new if key in self._entries]
+            self._new.clear()
+        return entries
+
+    def merge_entries(self, entries):
+        """Übernimmt Einträge aus take_new_entries() eines anderen Prozesses."""
+        with self._lock:
+            if self._add_entries(entries):
+                self._dirty = True
+
+    def save(self, path=None):
+        """Schreibt alle einfachen Umbrüche nach path (JSON)."""
+        path = path or self.path
+        if not path or not self._dirty:
+            return
+        with self._lock:
+            entries = [self._entry(key, layout)
+                       for key, layout in self._entries.items() if layout.paragraph is None]
+            self._dirty = False
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("Layout-Cache konnte nicht gespeichert werden:", e)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def session(self):
+        return TextLayoutSession(self)
+
+
+class TextLayoutSession:
+    """Sicht auf einen TextLayoutCache für genau einen Export.
+
+    Zählt Treffer/Fehlversuche nur für diesen Export; die Zähler des Caches
+    laufen über alle Exporte im Prozess, auch gleichzeitige Jobs der
+    ExportQueue.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def layout(self, text, style, width):
+        hit, layout = self.cache.lookup(text, style, width)
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return layout
+
+    def fits_line(self, text, style, width):
+        return self.cache.fits_line(text, style, width)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def fit_font_size(layouts, text, style_for, width, max_height, min_size, max_size, step=0.5):
+    """Größte Schriftgröße (im Raster step), bei der text in width x max_height passt.
+
+    style_for(size) liefert den ParagraphStyle zu einer Größe. Gesucht wird
+    binär über die gecachten Umbrüche, also höchstens log2(Stufen) Messungen.
+    Gibt (size, layout, fits) zurück; passt nicht einmal min_size, wird
+    min_size mit fits=False geliefert.
+    """
+    layout = layouts.layout(text, style_for(max_size), width)
+    if layout.height <= max_height or max_size <= min_size:
+        return max_size, layout, layout.height <= max_height
+
+    steps = int(round((max_size - min_size) / step))
+    best = None
+    lo, hi = 0, steps - 1  # Index i entspricht min_size + i*step; steps selbst passt nicht
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        size = min_size + mid * step
+        candidate = layouts.layout(text, style_for(size), width)
+        if candidate.height <= max_height:
+            best = size, candidate
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    if best is None:
+        return min_size, layouts.layout(text, style_for(min_size), width), False
+    return best[0], best[1], True
+
+
+def layout_lines(layout):
+    """Zeilen eines Umbruchs als Strings; bei Markup ohne Auszeichnung (für die Tk-Vorschau)."""
+    if layout.lines is not None:
+        return layout.lines
+    bl = layout.paragraph.blPara
+    if bl.kind == 0:
+        return [" ".join(words) for _, words in bl.lines]
+    return ["".join(frag.text for frag in line.words).strip() for line in bl.lines]
+
+
+def draw_text_layout(c, x, y, layout, style):
+    """Zeichnet einen Umbruch wie Paragraph.drawOn (linke untere Ecke bei x, y).
+
+    Gecachte Paragraphs werden vor drawOn flach kopiert: drawOn setzt
+    para.canv, und Jobs der ExportQueue zeichnen denselben Umbruch
+    gleichzeitig in verschiedene Canvases.
+    """
+    if layout.paragraph is not None:
+        para = layout.paragraph
+        if para.style.textColor != style.textColor:
+            para = Paragraph(layout.text, style)
+            para.wrap(layout.width, 100)
+        else:
+            para = copy.copy(para)
+        para.drawOn(c, x, y)
+        return
+
+    c.saveState()
+    c.translate(x, y)
+    if layout.lines:
+        c.saveState()
+        c.setFillColor(style.textColor)
+        # erste Grundlinie wie bei Paragraph: Höhe minus Schriftgröße
+        tx = c.beginText(0, layout.height - style.fontSize)
+        tx.setFont(style.fontName, style.fontSize, style.leading)
+        if layout.word_spaces is None:
+            for line in layout.lines:
+                tx.textLine(line)
+        else:
+            for line, word_space in zip(layout.lines, layout.word_spaces):
+                if word_space:
+                    tx.setWordSpace(word_space)
+                    tx.textLine(line)
+                    tx.setWordSpace(0)
+                else:
+                    tx.textLine(line)
+        c.drawText(tx)
+        c.restoreState()
+    c.restoreState()
+
+
+# Standard-Cache für den ganzen Prozess
+layout_cache = TextLayoutCache()
+
+_persistent_caches = {}
+_persistent_lock = threading.Lock()
+
+
+def persistent_layout_cache(path):
+    """Ein Cache pro Datei und Prozess; beim ersten Zugriff von der Platte geladen."""
+    with _persistent_lock:
+        if path not in _persistent_caches:
+            _persistent_caches[path] = TextLayoutCache(path=path)
+        return _persistent_caches[path]
@@ -0,0 +1,183 @@
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+ROW_HEIGHT = 24
+HIGHLIGHT_BG = "#d0ebff"  # zartes Blau
+
+
+def spell_key(spell):
+    """Schlüssel (Name, Quelle) in Kleinbuchstaben; gleiche Zauber aus verschiedenen Quellen bleiben getrennt."""
+    return (spell.get("name", "").lower(), spell.get("source", "Core").lower())
+
+
+class SpellListModel:
+    """Zeilen und Auswahl der Zauberliste, ohne Widgets.
+
+    rows: gefilterte Zauber in Anzeigereihenfolge (nach Name sortiert).
+    checked: Schlüssel (spell_key) der Zauber in der Sammlung.
+    selected: Schlüssel des Zaubers in der Detailansicht oder None.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.checked = set()
+        self.selected = None
+        self._names = []
+
+    def set_rows(self, spells):
+        self.rows = spells
+        self._names = [spell.get("name", "").lower() for spell in spells]
+
+    def is_checked(self, spell):
+        return spell_key(spell) in self.checked
+
+    def set_checked(self, spell, value):
+        if value:
+            self.checked.add(spell_key(spell))
+        else:
+            self.checked.discard(spell_key(spell))
+
+    def find_prefix(self, prefix):
+        """Index der ersten Zeile, deren Name mit prefix beginnt, sonst None (binäre Suche)."""
+        prefix = prefix.lower()
+        i = bisect.bisect_left(self._names, prefix)
+        if i < len(self._names) and self._names[i].startswith(prefix):
+            return i
+        return None
+
+    def index_of(self, spell):
+        key = spell_key(spell)
+        i = bisect.bisect_left(self._names, key[0])
+        while i < len(self.rows) and self._names[i] == key[0]:
+            if spell_key(self.rows[i]) == key:
+                return i
+            i += 1
+        return None
+
+
+class VirtualSpellList:
+    """Scrollbare Zauberliste, die nur Widgets für sichtbare Zeilen hat.
+
+    Ein fester Pool aus Zeilen (Frame, Checkbutton, Label) wird beim
+    Scrollen neu beschriftet und verschoben; Filtern tauscht nur
+    model.rows aus. Die Kosten hängen also von der Fensterhöhe ab, nicht
+    von der Zahl der Zauber.
+    on_toggle(spell, checked) und on_select(spell) werden bei Klicks aufgerufen.
+    """
+
+    def __init__(self, parent, model, on_toggle, on_select, width=300, height=400):
+        self.model = model
+        self.on_toggle = on_toggle
+        self.on_select = on_select
+        self.frame = ttk.Frame(parent)
+        self.body = tk.Frame(self.frame, width=width, height=height)
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.frame.rowconfigure(0, weight=1)
+        self.frame.columnconfigure(0, weight=1)
+
+        self.top = 0  # Scrollposition in Pixeln
+        self.view_height = height
+        self.pool = []  # [(frame, var, checkbutton, label)]
+        self.body.bind("<Configure>", self._on_configure)
+
+        # Mausrad nur, solange die Maus über der Liste ist
+        self.body.bind("<Enter>", lambda e: self._bind_wheel(True))
+        self.body.bind("<Leave>", lambda e: self._bind_wheel(False))
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def _bind_wheel(self, active):
+        if active:
+            self.body.bind_all("<MouseWheel>", lambda e: self.scroll_pixels(int(-1 * (e.delta / 120)) * ROW_HEIGHT))
+            self.body.bind_all("<Button-4>", lambda e: self.scroll_pixels(-ROW_HEIGHT))
+            self.body.bind_all("<Button-5>", lambda e: self.scroll_pixels(ROW_HEIGHT))
+        else:
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.body.unbind_all(sequence)
+
+    def _on_configure(self, event):
+        self.view_height = max(event.height, ROW_HEIGHT)
+        self._ensure_pool(self.view_height // ROW_HEIGHT + 2)
+        self.render()
+
+    def _ensure_pool(self, size):
+        while len(self.pool) < size:
+            slot = len(self.pool)
+            row = tk.Frame(self.body)
+            var = tk.BooleanVar()
+            cb = tk.Checkbutton(row, variable=var, command=lambda s=slot: self._toggle(s))
+            cb.pack(side="left")
+            label = tk.Label(row, fg="blue", cursor="hand2", anchor="w")
+            label.pack(side="left", fill="x", expand=True, padx=(5, 0))
+            label.bind("<Button-1>", lambda e, s=slot: self._select(s))
+            self.pool.append((row, var, cb, label))
+
+    def _spell_at_slot(self, slot):
+        index = self.top // ROW_HEIGHT + slot
+        return self.model.rows[index] if index < len(self.model.rows) else None
+
+    def _toggle(self, slot):
+        spell = self._spell_at_slot(slot)
+        if spell is not None:
+            checked = self.pool[slot][1].get()
+            self.model.set_checked(spell, checked)
+            self.on_toggle(spell, checked)
+
+    def _select(self, slot):
+        spell = self._spell_at_slot(slot)
+        if spell is not None:
+            self.on_select(spell)
+
+    def max_top(self):
+        return max(0, len(self.model.rows) * ROW_HEIGHT - self.view_height)
+
+    def refresh(self):
+        """Nach geänderten model.rows: Position begrenzen und neu zeichnen."""
+        self.top = min(self.top, self.max_top())
+        self.render()
+
+    def render(self):
+        """Beschriftet und platziert die Pool-Zeilen für die aktuelle Scrollposition."""
+        rows = self.model.rows
+        first, offset = divmod(self.top, ROW_HEIGHT)
+        default_bg = self.body.cget("bg")
+        for slot, (row, var, cb, label) in enumerate(self.pool):
+            index = first + slot
+            if index >= len(rows):
+                row.place_forget()
+                continue
+            spell = rows[index]
+            key = spell_key(spell)
+            var.set(key in self.model.checked)
+            label.config(
+                text=f"{spell.get('name', 'Unbenannt')} ({spell.get('source', 'Core')})",
+                bg=HIGHLIGHT_BG if key == self.model.selected else default_bg,
+            )
+            row.place(x=0, y=slot * ROW_HEIGHT - offset, relwidth=1, height=ROW_HEIGHT)
+        total = len(rows) * ROW_HEIGHT
+        if total <= self.view_height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.view_height) / total)
+
+    def scroll_pixels(self, delta):
+        self.top = max(0, min(self.top + delta, self.max_top()))
+        self.render()
+
+    def yview(self, *args):
+        """Scrollbar-Befehl: ("moveto", Anteil) oder ("scroll", n, "units"/"pages")."""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.model.rows) * ROW_HEIGHT)
+            self.scroll_pixels(0)
+        elif args[0] == "scroll":
+            step = ROW_HEIGHT if args[2] == "units" else max(ROW_HEIGHT, self.view_height - ROW_HEIGHT)
+            self.scroll_pixels(int(args[1]) * step)
+
+    def scroll_to(self, index):
+        """Zeile index mittig ins Bild scrollen."""
+        self.top = index * ROW_HEIGHT + ROW_HEIGHT // 2 - self.view_height // 2
+        self.scroll_pixels(0)